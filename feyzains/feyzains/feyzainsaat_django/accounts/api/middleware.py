@@ -1,33 +1,48 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.contrib.auth import aget_user
 from django.contrib.auth.middleware import get_user
-from django.conf import settings
-import jwt
-from jwt.exceptions import InvalidTokenError
-from accounts.models import User
+from feyzainsaat_django.authentication import aauthenticate_request, authenticate_request
 
 class JWTAuthenticationMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         try:
             mobile_header = request.headers.get('X-Platform')
             if mobile_header == 'mobile':
                 request.user = get_user(request)  # get the user from the session
     
                 # if the user is not authenticated and there is an Authorization header, try to authenticate with JWT
+                # (aynı önbellekli doğrulama; token istek başına bir kez çözülür)
                 if not request.user.is_authenticated:
-                    authorization_header = request.headers.get('Authorization')
-                    if authorization_header:
-                        try:
-                            token = authorization_header.split(' ')[1]
-                            decoded_token = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-                            user_id = decoded_token.get('user_id')
-                            user = User.objects.get(id=user_id)
-                            request.user = user
-                        except (InvalidTokenError, User.DoesNotExist):
-                            pass  # if JWT authentication fails, leave request.user as it is
+                    user_auth_tuple = authenticate_request(request)
+                    if user_auth_tuple is not None:
+                        request.user = user_auth_tuple[0]
         except KeyError:
             pass  # handle missing headers gracefully
 
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+    async def __acall__(self, request):
+        if request.headers.get('X-Platform') == 'mobile':
+            user = await aget_user(request)  # session kullanıcısı (async)
+            if not user.is_authenticated:
+                user_auth_tuple = await aauthenticate_request(request)
+                if user_auth_tuple is not None:
+                    user = user_auth_tuple[0]
+            request.user = user
+
+            async def auser():
+                return user
+            request.auser = auser
+
+        return await self.get_response(request)
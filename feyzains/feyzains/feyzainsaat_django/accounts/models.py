@@ -1,7 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Group
 from django.utils import timezone
-from django.db.models import Case, When, Value, IntegerField
 
 
 class Company(models.Model):
@@ -76,13 +75,12 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 class NotificationQuerySet(models.QuerySet):
     def ordered_by_priority_and_date(self):
-        return self.annotate(
-            priority_order=Case(
-                When(priority__name='Çok Yüksek', then=Value(1)),
-                default=Value(2),
-                output_field=IntegerField(),
-            )
-        ).order_by('priority_order', '-created_at')
+        # (user, priority, created_at) indeksini kullanır
+        return self.order_by('priority', '-created_at', '-id')
+
+    def unread(self):
+        # Sadece okunmamış satırları kapsayan kısmi indeksi kullanır
+        return self.filter(is_read=False, is_active=True)
 
 class NotificationManager(models.Manager):
     def get_queryset(self):
@@ -91,14 +89,46 @@ class NotificationManager(models.Manager):
     def ordered_by_priority_and_date(self):
         return self.get_queryset().ordered_by_priority_and_date()
 
+    def unread(self):
+        return self.get_queryset().unread()
+
 class Notification(models.Model):
+    class Priority(models.IntegerChoices):
+        VERY_HIGH = 1, 'Çok Yüksek'
+        HIGH = 2, 'Yüksek'
+        NORMAL = 3, 'Normal'
+        LOW = 4, 'Düşük'
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     message = models.TextField()
+    priority = models.PositiveSmallIntegerField(choices=Priority.choices, default=Priority.NORMAL)
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
 
     objects = NotificationManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'priority', '-created_at'], name='notif_user_priority_idx'),
+            # MySQL kısmi indeksi desteklemez, orada oluşturulmaz (sayaç tablosu yeterli)
+            models.Index(fields=['user', '-created_at'], condition=models.Q(is_read=False, is_active=True),
+                         name='notif_user_unread_idx'),
+        ]
+
     def __str__(self):
         return self.message
+
+
+class NotificationCounter(models.Model):
+    """
+    Kullanıcının okunmamış bildirim sayısı; bildirim zili tek PK okumasıyla
+    çalışsın diye tutulur. Bildirim eklendiğinde/değiştiğinde/silindiğinde
+    accounts/signals.py içinde yeniden hesaplanır.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
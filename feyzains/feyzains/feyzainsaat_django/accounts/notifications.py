@@ -0,0 +1,46 @@
+from django.db import IntegrityError, transaction
+
+from .models import Notification, NotificationCounter
+from .serializers import NotificationSerializer
+from .stream import publish
+
+
+def refresh_unread_count(user_id):
+    """
+    Kullanıcının okunmamış sayısını (kısmi indeksten) sayıp sayaç satırına yazar.
+    Artırıp azaltmak yerine yeniden saymak, sayacın kaymasını engeller.
+    """
+    unread = Notification.objects.unread().filter(user_id=user_id).count()
+    if not NotificationCounter.objects.filter(user_id=user_id).update(unread=unread):
+        try:
+            with transaction.atomic():
+                NotificationCounter.objects.create(user_id=user_id, unread=unread)
+        except IntegrityError:
+            # Aynı anda başka bir istek satırı oluşturdu
+            NotificationCounter.objects.filter(user_id=user_id).update(unread=unread)
+    publish(user_id, {'type': 'unread', 'unread': unread})
+    return unread
+
+
+def publish_notification(notification):
+    data = NotificationSerializer(notification).data
+    publish(notification.user_id, {'type': 'notification', 'id': notification.pk, 'notification': data})
+
+
+def get_unread_count(user_id):
+    unread = NotificationCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first()
+    return unread or 0
+
+
+def mark_as_read(user, notification_ids=None):
+    """
+    Kullanıcının bildirimlerini tek UPDATE ile okundu yapar; `notification_ids`
+    verilmezse hepsini. Başka kullanıcıların bildirimlerine dokunulmaz.
+    """
+    notifications = user.notifications.filter(is_read=False)
+    if notification_ids is not None:
+        notifications = notifications.filter(id__in=notification_ids)
+    with transaction.atomic():
+        updated = notifications.update(is_read=True)
+        unread = refresh_unread_count(user.pk) if updated else get_unread_count(user.pk)
+    return updated, unread
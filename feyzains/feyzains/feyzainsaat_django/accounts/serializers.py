@@ -4,6 +4,8 @@ from rest_framework import serializers
 from accounts.models import *
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from feyzainsaat_django.conditional import make_etag, row_versions
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     def validate(self, attrs):
@@ -16,6 +18,41 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+        # Parola hash'i cevaplarda dönmez (ETag'lere de girmez)
+        extra_kwargs = {'password': {'write_only': True}}
+
+
+def user_version_fields():
+    return [field.attname for field in User._meta.concrete_fields if field.name != 'password']
+
+
+def user_versions(users):
+    """
+    UserSerializer çıktısının versiyonu (ETag için): dönen kolonlar, grup
+    adları ve yetki id'leri. Gruplar ve yetkiler önceden yüklenmiş olmalı.
+    """
+    fields = user_version_fields()
+    return [
+        (row_versions([user], User, fields),
+         [str(group) for group in user.groups.all()],
+         [permission.pk for permission in user.user_permissions.all()])
+        for user in users
+    ]
+
+
+def users_etag(users):
+    """
+    `users` queryset'inin UserSerializer listesi için ETag'i. Nesne ve
+    prefetch yüklenmez; kolonlar ve grup/yetki ara tabloları values_list ile
+    okunur, 304 dönecek istekte kullanıcılar hiç yüklenmez.
+    """
+    groups = User.groups.through.objects.filter(user__in=users)
+    permissions = User.user_permissions.through.objects.filter(user__in=users)
+    return make_etag(
+        list(users.order_by('pk').values_list(*user_version_fields())),
+        list(groups.order_by('pk').values_list('user_id', 'group__name')),
+        list(permissions.order_by('pk').values_list('user_id', 'permission_id')),
+    )
 
     
 class NotificationSerializer(serializers.ModelSerializer):
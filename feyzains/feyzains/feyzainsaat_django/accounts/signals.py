@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from feyzainsaat_django.authentication import invalidate_user
+from .models import Notification, User
+from .notifications import publish_notification, refresh_unread_count
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """
+    Kullanıcı güncellendiğinde/pasife alındığında/silindiğinde JWT kullanıcı
+    önbelleğini geçersiz kılar (bkz. feyzainsaat_django/authentication.py).
+    """
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def notification_changed(sender, instance, created=False, **kwargs):
+    """
+    Bildirim eklendiğinde/güncellendiğinde/silindiğinde okunmamış sayacını
+    günceller; yeni bildirim açık stream'lere gönderilir (bkz. accounts/stream.py).
+    """
+    refresh_unread_count(instance.user_id)
+    if created:
+        publish_notification(instance)
@@ -0,0 +1,162 @@
+import asyncio
+import json
+from threading import Lock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+
+from feyzainsaat_django.authentication import CachedJWTAuthentication
+
+# Abonelik başına bekleyen olay sınırı; dolarsa istemciye `resync` gönderilir
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        # Olay döngüsü thread'inde çalışır
+        if self.queue.full():
+            self.overflowed = True
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        if self.overflowed:
+            self.overflowed = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return {'type': 'resync'}
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    Process içi yayıncı: kullanıcı id'si -> açık stream abonelikleri.
+    `publish` herhangi bir thread'den çağrılabilir. Sadece aynı process'teki
+    abonelere ulaşır; birden fazla worker varsa NOTIFICATION_BROKER ile aynı
+    arayüzü (subscribe/unsubscribe/publish) sağlayan paylaşımlı bir backend
+    (ör. Redis pub/sub) verilmelidir.
+    """
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Olay döngüsü kapanmış; abonelik stream kapanırken silinir
+                pass
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'NOTIFICATION_BROKER', 'accounts.stream.LocalBroker'))()
+    return _broker
+
+
+def publish(user_id, event):
+    """Transaction commit olduktan sonra yayınlar; geri alınan değişiklikler gönderilmez."""
+    transaction.on_commit(lambda: get_broker().publish(user_id, event))
+
+
+def format_event(event):
+    data = json.dumps(event, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+    lines = [f"event: {event['type']}"]
+    if 'id' in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def authenticate_stream(request):
+    """
+    Authorization başlığı ya da (EventSource başlık gönderemediği için) ?token=
+    parametresi ile JWT doğrulaması.
+    """
+    authentication = CachedJWTAuthentication()
+    token = request.GET.get('token')
+    try:
+        if token:
+            return authentication.get_user(authentication.get_validated_token(token))
+        result = authentication.authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events: kullanıcının yeni bildirimleri (`notification`) ve
+    okunmamış sayısı (`unread`) değiştikçe gönderilir. Bağlanınca güncel
+    sayı gönderilir; `resync` gelirse istemci listeyi yeniden çekmelidir.
+    Sadece ASGI altında çalışır.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('Bildirim akışı ASGI sunucusu gerektirir.', status=501)
+
+    user = await sync_to_async(authenticate_stream)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    from .notifications import get_unread_count
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+
+    async def events():
+        # Önce abone olunur, sonra sayı okunur; arada gelen değişiklik kaçmaz
+        subscription = get_broker().subscribe(user.pk)
+        try:
+            unread = await sync_to_async(get_unread_count)(user.pk)
+            yield format_event({'type': 'unread', 'unread': unread})
+            while True:
+                try:
+                    event = await subscription.get(heartbeat)
+                except asyncio.TimeoutError:
+                    # Proxy'ler boşta bağlantıyı kapatmasın
+                    yield ': ping\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,3 +1,217 @@
-from django.test import TestCase
+import asyncio
+import json
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Notification, NotificationCounter, User
+from accounts import stream
+from accounts.stream import LocalBroker
+from feyzainsaat_django.authentication import CachedJWTAuthentication, user_cache
+
+
+class UsersViewETagTests(TestCase):
+    url = '/users/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('admin@test.com', 'Admin', 'User', 'secret')
+        cls.other = User.objects.create_user('other@test.com', 'Other', 'User', 'secret')
+        cls.group = Group.objects.create(name='Muhasebe')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(self.url, headers=headers)
+
+    def test_password_hash_is_not_returned(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all('password' not in user for user in response.json()))
+
+    def test_not_modified_does_not_load_users(self):
+        etag = self.get()['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+        # Kullanıcı kolonları + grup ve yetki ara tabloları; prefetch yok
+        self.assertEqual(len(queries), 3)
+
+    def test_etag_follows_rendered_fields_only(self):
+        etag = self.get()['ETag']
+
+        self.other.set_password('changed')
+        self.other.save()
+        self.assertEqual(self.get(etag).status_code, 304)
+
+        self.other.groups.add(self.group)
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.group.name = 'Finans'
+        self.group.save()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.other.first_name = 'Başka'
+        self.other.save()
+        self.assertEqual(self.get(etag).status_code, 200)
+
+
+@override_settings(AUTH_USER_CACHE_SINGLE_PROCESS=True)
+class CachedJWTAuthenticationTests(TestCase):
+    # Cevabı kullanıcı tablosuna dokunmayan bir endpoint
+    url = '/core/rollups/?by=month'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('jwt@test.com', 'Jwt', 'User', 'secret')
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def get(self):
+        return self.client.get(self.url, headers=self.headers)
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries if '"accounts_user"' in query['sql']]
+
+    def test_token_is_decoded_once_per_request(self):
+        decode = CachedJWTAuthentication.get_validated_token
+        with mock.patch.object(CachedJWTAuthentication, 'get_validated_token', autospec=True,
+                               side_effect=decode) as validated:
+            self.assertEqual(self.get().status_code, 200)
+        # Middleware çözer, DRF aynı sonucu kullanır
+        self.assertEqual(validated.call_count, 1)
+
+    def test_warm_cache_does_not_query_users(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_deactivation_invalidates_the_cache(self):
+        self.user_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_password_change_invalidates_the_cache(self):
+        self.user_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('changed')
+            self.user.save()
+        self.assertEqual(len(self.user_queries()), 1)
+
+    @override_settings(AUTH_USER_CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache_backend_disables_the_cache(self):
+        # Test ayarlarındaki LocMemCache diğer worker'larla paylaşılmaz
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 1)
+
+
+class NotificationMarkReadTests(TestCase):
+    url = '/set_notifications_as_read/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('notify@test.com', 'Notify', 'User', 'secret')
+        cls.other = User.objects.create_user('other@test.com', 'Other', 'User', 'secret')
+        cls.notifications = [Notification.objects.create(user=cls.user, message=f'Bildirim {i}') for i in range(3)]
+        cls.foreign = Notification.objects.create(user=cls.other, message='Başkasının bildirimi')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def unread(self, user):
+        return NotificationCounter.objects.get(user=user).unread
+
+    def test_bulk_mark_read_updates_the_unread_counter(self):
+        self.assertEqual(self.unread(self.user), 3)
+        ids = [self.notifications[0].pk, self.notifications[1].pk, self.foreign.pk]
+        response = self.client.post(self.url, {'notification_ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['updated'], response.json()['unread']), (2, 1))
+        self.assertEqual(self.unread(self.user), 1)
+        self.assertEqual(self.client.get('/notification/unread_count/').json(), {'unread': 1})
+
+        response = self.client.post(self.url, {'all': True}, format='json')
+        self.assertEqual((response.json()['updated'], response.json()['unread']), (1, 0))
+        self.assertEqual(self.unread(self.user), 0)
+        # Başka kullanıcının bildirimi ve sayacı değişmez
+        self.foreign.refresh_from_db()
+        self.assertFalse(self.foreign.is_read)
+        self.assertEqual(self.unread(self.other), 1)
+
+    def test_invalid_ids_are_rejected(self):
+        for data in ({}, {'notification_ids': ['x']}):
+            with self.subTest(data=data):
+                self.assertEqual(self.client.post(self.url, data, format='json').status_code, 400)
+        self.assertEqual(self.unread(self.user), 3)
+
+
+class NotificationStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stream@test.com', 'Stream', 'User', 'secret')
+        Notification.objects.create(user=cls.user, message='Eski bildirim')
+
+    def setUp(self):
+        # Her test kendi process içi yayıncısını kullanır
+        patcher = mock.patch.object(stream, '_broker', LocalBroker())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def notify(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(user=self.user, message='Yeni bildirim',
+                                               priority=Notification.Priority.HIGH)
+
+    async def test_stream_sends_unread_count_then_pushed_notification(self):
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        response = await self.async_client.get('/notification/stream/', {'token': str(token)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        events = aiter(response.streaming_content)
+
+        async def next_event():
+            return (await asyncio.wait_for(anext(events), 5)).decode()
+
+        try:
+            first = await next_event()
+            self.assertEqual(first, 'event: unread\ndata: {"type":"unread","unread":1}\n\n')
+
+            notification = await sync_to_async(self.notify)()
+            unread = await next_event()
+            pushed = await next_event()
+        finally:
+            await events.aclose()
+
+        self.assertEqual(unread, 'event: unread\ndata: {"type":"unread","unread":2}\n\n')
+        header, event_id, data = pushed.strip().split('\n')
+        self.assertEqual((header, event_id), ('event: notification', f'id: {notification.pk}'))
+        payload = json.loads(data.removeprefix('data: '))
+        self.assertEqual((payload['id'], payload['notification']['message']), (notification.pk, 'Yeni bildirim'))
+
+    async def test_stream_requires_a_valid_token(self):
+        response = await self.async_client.get('/notification/stream/', {'token': 'bozuk'})
+        self.assertEqual(response.status_code, 401)
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from .views import *
+from .stream import notification_stream
 
 urlpatterns = [
     path('', Home.as_view(), name='home'),
@@ -11,6 +12,8 @@ urlpatterns = [
 
     path('notification/', NotificationView.as_view()),
     path('set_notifications_as_read/', SetNotificationsAsRead.as_view()),
+    path('notification/unread_count/', UnreadNotificationCountView.as_view()),
+    path('notification/stream/', notification_stream, name='notification_stream'),
     #path('read-excel/', views.read_excel, name='read-excel'),
 
 
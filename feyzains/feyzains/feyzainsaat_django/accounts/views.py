@@ -11,10 +11,12 @@ from django.utils.decorators import method_decorator
 from django.contrib.auth import get_user_model
 
 from .serializers import *
+from .notifications import get_unread_count, mark_as_read
 
 from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.permissions import IsAuthenticated,AllowAny
+from feyzainsaat_django.conditional import not_modified, with_etag
 from feyzainsaat_django.pagination import CustomPageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser
 import json
@@ -124,8 +126,13 @@ class Home(APIView):
 class UsersView(APIView):
     def get(self, request):
         users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        # Kullanıcıda değişiklik zamanı yok; listede dönen alanlar versiyon olarak kullanılır
+        etag = users_etag(users)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        serializer = UserSerializer(users.prefetch_related('groups', 'user_permissions'), many=True)
+        return with_etag(Response(serializer.data), etag)
     
     def check_email_exists(self, email, exclude_user_id=None):
         query = User.objects.filter(email=email)
@@ -307,12 +314,22 @@ class NotificationView(ListAPIView):
 class SetNotificationsAsRead(APIView):
     def post(self, request):
         data = request.data
-        if data.get('notification_ids'):
-            notification_ids = data['notification_ids']
-            notifications = Notification.objects.filter(id__in=notification_ids)
-            for notification in notifications:
-                notification.is_read = True
-                notification.save()
-            return Response({'message': 'Notifications set as read successfully'})
-        
+        notification_ids = data.get('notification_ids')
+        if not data.get('all') and not notification_ids:
+            return Response({'message': 'notification_ids or all is required'}, status=400)
+        if data.get('all'):
+            notification_ids = None
+        elif not isinstance(notification_ids, list):
+            notification_ids = [notification_ids]
+        try:
+            notification_ids = None if notification_ids is None else [int(id) for id in notification_ids]
+        except (TypeError, ValueError):
+            return Response({'message': 'notification_ids must be a list of ids'}, status=400)
+
+        updated, unread = mark_as_read(request.user, notification_ids)
+        return Response({'message': 'Notifications set as read successfully', 'updated': updated, 'unread': unread})
 
+
+class UnreadNotificationCountView(APIView):
+    def get(self, request):
+        return Response({'unread': get_unread_count(request.user.pk)})
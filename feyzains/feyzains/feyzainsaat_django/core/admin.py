@@ -2,10 +2,29 @@ from django.contrib import admin
 
 # Register your models here.
 from .models import *
+from .balances import find_balance_drift, fix_balance_drift
+
+
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ('name', 'balance', 'balance_status')
+    search_fields = ('name',)
+    actions = ['reconcile_balances']
+
+    @admin.action(description='Seçili müşterilerin bakiyesini faturalardan yeniden hesapla')
+    def reconcile_balances(self, request, queryset):
+        drift = find_balance_drift(list(queryset.values_list('id', flat=True)))
+        fixed = fix_balance_drift([row['id'] for row in drift])
+        if fixed:
+            self.message_user(request, f"{len(fixed)} müşterinin bakiyesi düzeltildi: "
+                                       + ', '.join(customer.name for customer in fixed))
+        else:
+            self.message_user(request, 'Seçili müşterilerin bakiyeleri tutarlı.')
+
 
 admin.site.register(PaymenInvoice)
 admin.site.register(Company)
-admin.site.register(Customer)
+admin.site.register(Customer, CustomerAdmin)
+admin.site.register(MaintenanceWatermark)
 admin.site.register(Worksite)
 admin.site.register(Group)
 admin.site.register(Tax)
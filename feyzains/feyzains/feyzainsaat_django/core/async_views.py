@@ -0,0 +1,206 @@
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from feyzainsaat_django.authentication import aauthenticate_request
+from .eager import eager_load
+from .balances import awith_live_balances
+from .reference_cache import DATA_TIMEOUT, alist_versions, data_key, list_validators, set_list_headers
+from .models import Company, Customer, Group, PaymenInvoice, Worksite
+from .serializers import (
+    CompanySerializer, CustomerListSerializer, CustomerSerializer, GroupSerializer, PaymenInvoiceReadSerializer,
+    WorksiteSerializer,
+)
+from .sparse import sparse_params
+from .views import (
+    ChecklistPagination, PaymentPagination, SearchPagination, checklist_queryset, payment_entry_queryset,
+    search_page_queryset,
+)
+
+# Okuma ağırlıklı endpoint'lerin async karşılıkları (ASGI altında thread
+# havuzunu meşgul etmeden beklerler). Filtre, sıralama, sayfalama ve cevap
+# formatı sync view'larla aynıdır; sadece GET desteklenir.
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+class AsyncAPIView(View):
+    """JWT doğrulaması (middleware'in sonucu yeniden kullanılır) ve DRF Request sarmalayıcısı."""
+    http_method_names = ['get', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        result = await aauthenticate_request(request)
+        if result is None or not result[0].is_active:
+            return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = result[0]
+        try:
+            return await super().dispatch(Request(request), *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return json_response(detail, status=exc.status_code)
+
+
+class AsyncListView(AsyncAPIView):
+    """
+    Sayfalanan listeler; alt sınıf pagination_class ve sync view'ın
+    sorgusunu dönen get_queryset(request) tanımlar.
+    """
+    serializer_class = PaymenInvoiceReadSerializer
+    pagination_class = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if cls.pagination_class is None or not hasattr(cls, 'get_queryset'):
+            raise ImproperlyConfigured(f'{cls.__name__} pagination_class ve get_queryset tanımlamalı.')
+        return super().as_view(**initkwargs)
+
+    async def get(self, request):
+        sparse = sparse_params(request)
+        queryset = eager_load(self.get_queryset(request), self.serializer_class, **sparse)
+        paginator = self.pagination_class()
+        rows = await paginator.apaginate_queryset(queryset, request)
+        data = self.serializer_class(rows, many=True, **sparse).data
+        return json_response(paginator.get_paginated_response(data).data)
+
+
+class AsyncPaymentEntryView(AsyncListView):
+    pagination_class = PaymentPagination
+
+    def get_queryset(self, request):
+        return payment_entry_queryset(request.query_params)
+
+
+class AsyncInvoiceView(AsyncListView):
+    # InvoiceView da PaymentPagination kullanır
+    pagination_class = PaymentPagination
+
+    def get_queryset(self, request):
+        return payment_entry_queryset(request.query_params)
+
+
+class AsyncChecklistView(AsyncListView):
+    pagination_class = ChecklistPagination
+
+    def get_queryset(self, request):
+        return checklist_queryset(request.query_params)
+
+    async def get(self, request):
+        try:
+            return await super().get(request)
+        except ValueError:
+            return json_response({'error': 'Tarih formatı hatalı. Format: YYYY-MM-DD olmalı.'}, status=400)
+
+
+class AsyncSearchPageView(AsyncListView):
+    pagination_class = SearchPagination
+
+    def get_queryset(self, request):
+        return search_page_queryset(request.query_params)
+
+    async def get(self, request):
+        try:
+            return await super().get(request)
+        except ValueError as exc:
+            return json_response({'error': str(exc)}, status=400)
+
+
+class AsyncReferenceListView(AsyncAPIView):
+    """
+    Şantiye/grup/şirket/müşteri listeleri; sync view'larla aynı önbellek
+    anahtarını, ETag ve Last-Modified başlıklarını kullanır.
+    """
+    name = None
+    model = None
+    serializer_class = None
+
+    async def get(self, request):
+        version, etag_version = await alist_versions(self.name)
+        etag, last_modified, not_modified = list_validators(request, self.name, etag_version)
+        if not_modified is not None:
+            return not_modified
+
+        data = await cache.aget(data_key(self.name, version))
+        if data is None:
+            queryset = eager_load(self.model.objects.all(), self.serializer_class).order_by('-id')
+            data = self.serializer_class([obj async for obj in queryset], many=True).data
+            await cache.aset(data_key(self.name, version), data, DATA_TIMEOUT)
+        data = await self.add_live_fields(data)
+        return set_list_headers(json_response(data), etag, last_modified)
+
+    async def add_live_fields(self, data):
+        """Önbelleğe girmeyen alanlar (bkz. LIVE_VERSIONS); varsayılan olarak yok."""
+        return data
+
+
+class AsyncWorksiteView(AsyncReferenceListView):
+    name = 'worksite'
+    model = Worksite
+    serializer_class = WorksiteSerializer
+
+
+class AsyncGroupView(AsyncReferenceListView):
+    name = 'group'
+    model = Group
+    serializer_class = GroupSerializer
+
+
+class AsyncCompanyView(AsyncReferenceListView):
+    name = 'company'
+    model = Company
+    serializer_class = CompanySerializer
+
+
+class AsyncCustomerView(AsyncReferenceListView):
+    name = 'customer'
+    model = Customer
+    serializer_class = CustomerListSerializer
+
+    async def add_live_fields(self, data):
+        return await awith_live_balances(data)
+
+
+class AsyncDetailView(AsyncAPIView):
+    model = None
+    serializer_class = None
+
+    async def get(self, request, pk):
+        sparse = sparse_params(request)
+        queryset = eager_load(self.model.objects.all(), self.serializer_class, **sparse)
+        try:
+            obj = await queryset.aget(pk=pk)
+        except self.model.DoesNotExist:
+            return json_response({'detail': 'No %s matches the given query.' % self.model._meta.object_name},
+                                 status=404)
+        return json_response(self.serializer_class(obj, **sparse).data)
+
+
+class AsyncPaymentEntryDetailView(AsyncDetailView):
+    model = PaymenInvoice
+    serializer_class = PaymenInvoiceReadSerializer
+
+
+class AsyncWorksiteDetailView(AsyncDetailView):
+    model = Worksite
+    serializer_class = WorksiteSerializer
+
+
+class AsyncGroupDetailView(AsyncDetailView):
+    model = Group
+    serializer_class = GroupSerializer
+
+
+class AsyncCompanyDetailView(AsyncDetailView):
+    model = Company
+    serializer_class = CompanySerializer
+
+
+class AsyncCustomerDetailView(AsyncDetailView):
+    model = Customer
+    serializer_class = CustomerSerializer
@@ -0,0 +1,252 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.lookups import GreaterThan, LessThan
+
+from .models import BalanceTouchedCustomer, Customer, PaymenInvoice
+from .reference_cache import LIVE_VERSIONS, bump_version
+from .tracking import FieldTracker
+
+# deferred_balance_updates() bloğu içindeyse biriken {customer_id: delta} sözlüğü
+_deferred_deltas = ContextVar('deferred_balance_deltas', default=None)
+# ... ve faturası silinen/taşınan müşteri id'leri (bkz. record_touched_customers)
+_deferred_touched = ContextVar('deferred_touched_customers', default=None)
+# Müşteri listesi önbelleğinde bakiye tutulmaz; bakiye değişince sadece bu
+# versiyon artar, liste isteklerinde bakiyeler with_live_balances ile eklenir.
+BALANCE_VERSION = LIVE_VERSIONS['customer']
+
+
+def invoice_difference(debt, receivable):
+    """Bir kaydın müşteri bakiyesine etkisi: borç - alacak."""
+    return (debt or Decimal(0)) - (receivable or Decimal(0))
+
+
+def balance_status_expression(balance):
+    return Case(
+        When(GreaterThan(balance, 0), then=Value('B')),
+        When(LessThan(balance, 0), then=Value('A')),
+        default=Value('0'),
+    )
+
+
+def apply_balance_delta(customer_id, delta):
+    """
+    Müşteri bakiyesini tek bir atomik UPDATE ile `delta` kadar değiştirir,
+    balance_status'u aynı sorguda yeniden hesaplar.
+    """
+    if not customer_id or not delta:
+        return
+    new_balance = F('balance') + delta
+    # MySQL SET ifadelerini soldan sağa işler; balance_status hesaplanırken
+    # `balance` zaten güncellenmiş olur. Diğer veritabanları eski değeri görür.
+    status_source = F('balance') if connection.vendor == 'mysql' else new_balance
+    Customer.objects.filter(pk=customer_id).update(
+        balance=new_balance,
+        balance_status=balance_status_expression(status_source),
+    )
+    bump_version(BALANCE_VERSION)
+
+
+def live_balance_row(row, balances):
+    balance, status = balances.get(row['id'], (Decimal(0), '0'))
+    return {**row, 'balance': f'{balance:.2f}', 'balance_status': status}
+
+
+def with_live_balances(rows):
+    """Önbellekten gelen müşteri listesine güncel bakiyeleri tek sorguyla ekler."""
+    balances = {
+        pk: (balance, status)
+        for pk, balance, status in Customer.objects.values_list('id', 'balance', 'balance_status')
+    }
+    return [live_balance_row(row, balances) for row in rows]
+
+
+async def awith_live_balances(rows):
+    """with_live_balances'ın async hali."""
+    balances = {
+        pk: (balance, status)
+        async for pk, balance, status in Customer.objects.values_list('id', 'balance', 'balance_status')
+    }
+    return [live_balance_row(row, balances) for row in rows]
+
+
+def apply_balance_deltas(deltas):
+    """
+    {customer_id: delta} sözlüğünü müşteri başına tek UPDATE ile uygular.
+    deferred_balance_updates() içinde çağrılırsa sadece biriktirir.
+    """
+    pending = _deferred_deltas.get()
+    for customer_id, delta in deltas.items():
+        if pending is not None:
+            pending[customer_id] += delta
+        else:
+            apply_balance_delta(customer_id, delta)
+
+
+@contextmanager
+def deferred_balance_updates():
+    """
+    Blok içindeki bakiye değişikliklerini (signal'lar dahil) biriktirir,
+    çıkışta her müşteri için tek UPDATE çalıştırır. Hata olursa hiçbir şey
+    uygulanmaz; blok bir transaction içinde kullanılmalıdır.
+    """
+    if _deferred_deltas.get() is not None:
+        yield
+        return
+    deltas = defaultdict(Decimal)
+    touched = set()
+    token = _deferred_deltas.set(deltas)
+    touched_token = _deferred_touched.set(touched)
+    try:
+        yield
+    finally:
+        _deferred_deltas.reset(token)
+        _deferred_touched.reset(touched_token)
+    apply_balance_deltas(deltas)
+    record_touched_customers(touched)
+
+
+def record_touched_customers(customer_ids):
+    """
+    Faturası silinen ya da başka müşteriye taşınan müşterileri işaretler;
+    artımlı mutabakat (customers_touched_since) bunları updated_date ile
+    bulamaz. deferred_balance_updates() içinde çağrılırsa sadece biriktirir.
+    """
+    customer_ids = {customer_id for customer_id in customer_ids if customer_id}
+    if not customer_ids:
+        return
+    pending = _deferred_touched.get()
+    if pending is not None:
+        pending.update(customer_ids)
+        return
+    BalanceTouchedCustomer.objects.bulk_create(
+        [BalanceTouchedCustomer(customer_id=customer_id) for customer_id in sorted(customer_ids)],
+        update_conflicts=True, unique_fields=['customer_id'], update_fields=['touched_date'],
+    )
+
+
+def collect_balance_deltas(invoices):
+    deltas = defaultdict(Decimal)
+    for invoice in invoices:
+        deltas[invoice.customer_id] += invoice_difference(invoice.debt, invoice.receivable)
+    return deltas
+
+
+# Faturanın bakiyeyi etkileyen alanları; eski değerler signal'larda buradan okunur.
+balance_tracker = FieldTracker('balance', ('customer_id', 'debt', 'receivable'))
+
+
+def balance_state_deltas(old, new):
+    """Eski ve yeni durum arasındaki farkı müşteri bazında döner."""
+    deltas = defaultdict(Decimal)
+    if old is not None:
+        customer_id, debt, receivable = old
+        deltas[customer_id] -= invoice_difference(debt, receivable)
+    if new is not None:
+        customer_id, debt, receivable = new
+        deltas[customer_id] += invoice_difference(debt, receivable)
+    return deltas
+
+
+def apply_balance_change(old, new):
+    """
+    Kaydın eski ve yeni durumu (balance_tracker) arasındaki farkı bakiyelere
+    uygular. Silmede ve müşteri değişikliğinde eski/yeni müşteri ayrıca işaretlenir.
+    """
+    apply_balance_deltas(balance_state_deltas(old, new))
+    if old is not None and (new is None or new[0] != old[0]):
+        record_touched_customers({old[0], new[0] if new is not None else None})
+
+
+# --- Mutabakat (rebuild_balances komutu ve admin aksiyonu) ---
+CENTS = Decimal('0.01')
+
+def balance_status_for(balance):
+    if balance > 0:
+        return 'B'
+    if balance < 0:
+        return 'A'
+    return '0'
+
+
+def compute_balances(customer_ids=None):
+    """Faturalardan tek GROUP BY ile {customer_id: SUM(debt) - SUM(receivable)} hesaplar."""
+    rows = PaymenInvoice.objects.order_by().values('customer_id').annotate(
+        total_debt=Sum('debt'), total_receivable=Sum('receivable'),
+    )
+    if customer_ids is not None:
+        rows = rows.filter(customer_id__in=customer_ids)
+    return {
+        row['customer_id']: invoice_difference(row['total_debt'], row['total_receivable']).quantize(CENTS)
+        for row in rows
+    }
+
+
+def find_balance_drift(customer_ids=None):
+    """
+    Kayıtlı bakiyesi faturalarla tutmayan müşterileri döner:
+    [{'id', 'name', 'balance', 'expected', 'balance_status', 'expected_status'}, ...]
+    """
+    expected = compute_balances(customer_ids)
+    customers = Customer.objects.order_by('id').values_list('id', 'name', 'balance', 'balance_status')
+    if customer_ids is not None:
+        customers = customers.filter(id__in=customer_ids)
+
+    drift = []
+    for customer_id, name, balance, status in customers.iterator():
+        correct = expected.get(customer_id, Decimal(0))
+        correct_status = balance_status_for(correct)
+        if balance != correct or status != correct_status:
+            drift.append({
+                'id': customer_id,
+                'name': name,
+                'balance': balance,
+                'expected': correct,
+                'balance_status': status,
+                'expected_status': correct_status,
+            })
+    return drift
+
+
+def fix_balance_drift(customer_ids):
+    """
+    Verilen müşterilerin bakiyesini faturalardan yeniden yazar, düzeltilenleri döner.
+    Müşteri satırları önce kilitlenir, toplamlar kilitten sonra okunur; böylece
+    aynı anda gelen fatura yazmaları kaybolmaz.
+    """
+    if not customer_ids:
+        return []
+    with transaction.atomic():
+        customers = list(Customer.objects.select_for_update().filter(id__in=customer_ids).order_by('id'))
+        expected = compute_balances([customer.id for customer in customers])
+        fixed = []
+        for customer in customers:
+            correct = expected.get(customer.id, Decimal(0))
+            correct_status = balance_status_for(correct)
+            if customer.balance != correct or customer.balance_status != correct_status:
+                customer.balance = correct
+                customer.balance_status = correct_status
+                fixed.append(customer)
+        Customer.objects.bulk_update(fixed, ['balance', 'balance_status'], batch_size=500)
+        if fixed:
+            bump_version(BALANCE_VERSION)
+    return fixed
+
+
+def customers_touched_since(since):
+    """
+    `since` sonrasında faturası eklenen/değişen (updated_date) ya da faturası
+    silinen/başka müşteriye taşınan (BalanceTouchedCustomer) müşteri id'leri.
+    """
+    updated = set(
+        PaymenInvoice.objects.filter(updated_date__gte=since)
+        .order_by().values_list('customer_id', flat=True).distinct()
+    )
+    touched = set(
+        BalanceTouchedCustomer.objects.filter(touched_date__gte=since).values_list('customer_id', flat=True)
+    )
+    return updated | touched
@@ -0,0 +1,134 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from auditlog.context import disable_auditlog
+from django.db import transaction
+
+from accounts.models import User
+from .models import Company, Customer, Group, PaymenInvoice, Personal, Worksite
+from .search import update_search_fields
+
+# Benchmark verisi: aynı seed ve ölçekle her çalıştırmada birebir aynı satırlar üretilir.
+BENCH_USER_EMAIL = 'bench@feyzainsaat.local'
+BATCH_SIZE = 5000
+START_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+DAYS = 5 * 365
+
+BANKS = ['Ziraat', 'İş Bankası', 'Garanti', 'Yapı Kredi', 'Akbank', 'Halkbank', 'Vakıfbank']
+MATERIALS = ['Çimento', 'Demir', 'Kum', 'Çakıl', 'Tuğla', 'Kereste', 'Boya', 'Seramik', 'İzolasyon']
+NAME_PARTS = ['İSTANBUL', 'Işık', 'Çağrı', 'Şahin', 'Öztürk', 'Güneş', 'Yıldız', 'Doğan', 'Ege', 'Akdeniz']
+SUFFIXES = ['Yapı', 'İnşaat', 'Ltd', 'A.Ş.', 'Beton', 'Nakliyat']
+
+
+def reference_counts(invoices):
+    """Fatura sayısına göre referans tablo boyutları (gerçek dağılıma yakın)."""
+    return {
+        'worksite': max(10, invoices // 2000),
+        'group': max(5, invoices // 10000),
+        'company': max(10, invoices // 5000),
+        'customer': max(50, invoices // 200),
+        'personal': max(100, invoices // 100),
+    }
+
+
+def company_name(rng, index):
+    return f'{rng.choice(NAME_PARTS)} {rng.choice(SUFFIXES)} {index}'
+
+
+def bench_user():
+    user = User.objects.filter(email=BENCH_USER_EMAIL).first()
+    if user is None:
+        user = User.objects.create_user(BENCH_USER_EMAIL, 'Bench', 'User', 'bench')
+    return user
+
+
+def create_named(model, names, user):
+    objects = [model(name=name, created_by=user) for name in names]
+    for obj in objects:
+        update_search_fields(obj)
+    model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+    # MySQL bulk_create id döndürmediği için id'ler tekrar okunur
+    return list(model.objects.filter(created_by=user).order_by('id').values_list('id', flat=True))
+
+
+def generate_invoice(rng, index, refs, user):
+    is_invoice = rng.random() < 0.6
+    date = START_DATE + timedelta(days=rng.randrange(DAYS), seconds=rng.randrange(86400))
+    invoice = PaymenInvoice(
+        date=date,
+        worksite_id=rng.choice(refs['worksite']),
+        group_id=rng.choice(refs['group']),
+        company_id=rng.choice(refs['company']),
+        customer_id=rng.choice(refs['customer']),
+        type='invoice' if is_invoice else 'payment',
+        created_by=user,
+    )
+    if is_invoice:
+        quantity = rng.randint(1, 500)
+        unit_price = Decimal(rng.randint(100, 100000)) / 100
+        price = (quantity * unit_price).quantize(Decimal('0.01'))
+        tax = Decimal(rng.choice([1, 10, 20]))
+        withholding = Decimal(rng.choice([0, 0, 20, 50]))
+        invoice.invoice_no = f'F{index:09d}'
+        invoice.material = rng.choice(MATERIALS)
+        invoice.quantity = quantity
+        invoice.unit_price = unit_price
+        invoice.price = price
+        invoice.tax = tax
+        invoice.tax_amount = (price * tax / 100).quantize(Decimal('0.01'))
+        invoice.withholding = withholding
+        invoice.withholding_amount = (invoice.tax_amount * withholding / 100).quantize(Decimal('0.01'))
+        invoice.receivable = price + invoice.tax_amount - invoice.withholding_amount
+    else:
+        invoice.debt = Decimal(rng.randint(1000, 5000000)) / 100
+        invoice.bank = rng.choice(BANKS)
+        if rng.random() < 0.4:
+            invoice.check_no = f'C{index:09d}'
+            invoice.check_time = date + timedelta(days=rng.randint(0, 180))
+    update_search_fields(invoice)
+    return invoice
+
+
+def generate(invoices, seed=42, stdout=None):
+    """
+    Referans tablolarını, personeli ve `invoices` adet PaymenInvoice satırını
+    üretir. Yazmalar bulk_create ile yapılır; signal'lar çalışmadığı için
+    bakiye ve aylık özetler en sonda toplu olarak yeniden hesaplanmalıdır
+    (bench_seed komutu bunu yapar).
+    """
+    rng = random.Random(seed)
+    counts = reference_counts(invoices)
+    user = bench_user()
+    started = time.monotonic()
+
+    with disable_auditlog():
+        with transaction.atomic():
+            refs = {
+                'worksite': create_named(Worksite, [f'Şantiye {i}' for i in range(counts['worksite'])], user),
+                'group': create_named(Group, [f'Grup {i}' for i in range(counts['group'])], user),
+                'company': create_named(Company, [company_name(rng, i) for i in range(counts['company'])], user),
+                'customer': create_named(Customer, [company_name(rng, i) for i in range(counts['customer'])], user),
+            }
+            Personal.objects.bulk_create([
+                Personal(
+                    name=f'Personel {i}',
+                    creation_date=START_DATE,
+                    identity_number=f'{10000000000 + i}',
+                    entry=START_DATE + timedelta(days=rng.randrange(DAYS)),
+                    exit=START_DATE + timedelta(days=DAYS),
+                    worksite_id=rng.choice(refs['worksite']),
+                    created_by=user,
+                )
+                for i in range(counts['personal'])
+            ], batch_size=BATCH_SIZE)
+
+        for offset in range(0, invoices, BATCH_SIZE):
+            batch = [generate_invoice(rng, index, refs, user)
+                     for index in range(offset, min(offset + BATCH_SIZE, invoices))]
+            with transaction.atomic():
+                PaymenInvoice.objects.bulk_create(batch)
+            if stdout is not None:
+                stdout.write(f'{offset + len(batch)}/{invoices} fatura ({time.monotonic() - started:.0f}s)')
+    return counts
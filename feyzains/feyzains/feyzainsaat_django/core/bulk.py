@@ -0,0 +1,225 @@
+from copy import copy
+
+from auditlog.cid import get_cid
+from auditlog.context import auditlog_value, disable_auditlog
+from auditlog.diff import model_instance_diff
+from auditlog.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.encoding import smart_str
+
+from .balances import (
+    apply_balance_change, apply_balance_deltas, balance_tracker, collect_balance_deltas,
+    deferred_balance_updates,
+)
+from .models import PaymenInvoice
+from .rollups import (
+    apply_rollup_deltas, collect_rollup_deltas, deferred_rollup_updates, rollup_state_deltas,
+    rollup_tracker,
+)
+from .search import SEARCH_FIELDS, update_search_fields
+from .serializers import PaymenInvoiceBulkSerializer
+
+MAX_OPERATIONS = 1000
+BATCH_SIZE = 500
+OPERATIONS = ('create', 'update', 'delete')
+
+
+class BulkOperationError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class PaymenInvoiceBulkProcessor:
+    """
+    [{"op": "create|update|delete", "id": ..., "data": {...}}, ...] listesini
+    tek transaction içinde uygular. İlişkili kayıtlar model başına tek sorguyla
+    yüklenir, yazmalar bulk_create/bulk_update ile yapılır, müşteri bakiyeleri
+    ve aylık özetler en sonda satır başına tek UPDATE ile güncellenir. Herhangi bir satırda
+    hata varsa hiçbir değişiklik yapılmaz.
+
+    Auditlog signal'ları kapatılır, log kayıtları toplu olarak yazılır.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+        self.errors = []
+        self.content_type = ContentType.objects.get_for_model(PaymenInvoice)
+        self.log_entries = []
+
+    def run(self, operations):
+        operations = self.check_operations(operations)
+        invoices = self.load_invoices(operations)
+        context = {'related_cache': self.load_related(operations)}
+
+        creates, updates, deletes = [], [], []
+        for index, operation in operations:
+            op = operation['op']
+            if op == 'delete':
+                deletes.append(invoices[operation['id']])
+                continue
+            serializer = PaymenInvoiceBulkSerializer(
+                invoices.get(operation.get('id')),
+                data=operation.get('data') or {},
+                partial=op == 'update',
+                context=context,
+            )
+            if not serializer.is_valid():
+                self.errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            if op == 'create':
+                creates.append(PaymenInvoice(created_by=self.user, **serializer.validated_data))
+            else:
+                updates.append((invoices[operation['id']], serializer.validated_data))
+
+        if self.errors:
+            raise BulkOperationError(self.errors)
+
+        with transaction.atomic(), deferred_balance_updates(), deferred_rollup_updates(), disable_auditlog():
+            self.delete(deletes)
+            self.update(updates)
+            self.create(creates)
+            LogEntry.objects.bulk_create(self.log_entries, batch_size=BATCH_SIZE)
+
+        return {
+            'created': [invoice.pk for invoice in creates],
+            'updated': [invoice.pk for invoice, _ in updates],
+            'deleted': [invoice.pk for invoice in deletes],
+        }
+
+    def check_operations(self, operations):
+        if not isinstance(operations, list) or not operations:
+            raise BulkOperationError([{'index': None, 'errors': 'İşlem listesi boş olamaz.'}])
+        if len(operations) > MAX_OPERATIONS:
+            raise BulkOperationError([{'index': None, 'errors': f'En fazla {MAX_OPERATIONS} işlem gönderilebilir.'}])
+
+        checked = []
+        seen_ids = set()
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+                self.errors.append({'index': index, 'errors': f"op {' / '.join(OPERATIONS)} olmalı."})
+                continue
+            if operation['op'] != 'create':
+                try:
+                    operation['id'] = int(operation.get('id'))
+                except (TypeError, ValueError):
+                    self.errors.append({'index': index, 'errors': 'Geçerli bir id gönderilmeli.'})
+                    continue
+                if operation['id'] in seen_ids:
+                    self.errors.append({'index': index, 'errors': 'Aynı kayıt için birden fazla işlem gönderilemez.'})
+                    continue
+                seen_ids.add(operation['id'])
+            checked.append((index, operation))
+        if self.errors:
+            raise BulkOperationError(self.errors)
+        return checked
+
+    def load_invoices(self, operations):
+        ids = [operation['id'] for _, operation in operations if operation['op'] != 'create']
+        # __str__ müşteri adını kullandığı için auditlog için customer birlikte gelir
+        invoices = PaymenInvoice.objects.select_related('customer').in_bulk(ids)
+        for index, operation in operations:
+            if operation['op'] != 'create' and operation['id'] not in invoices:
+                self.errors.append({'index': index, 'errors': 'Kayıt bulunamadı.'})
+        if self.errors:
+            raise BulkOperationError(self.errors)
+        return invoices
+
+    def load_related(self, operations):
+        """Gönderilen tüm FK id'lerini model başına tek in_bulk sorgusuyla yükler."""
+        fields = [field for field in PaymenInvoice._meta.concrete_fields
+                  if field.is_relation and field.name != 'created_by']
+        cache = {}
+        for field in fields:
+            ids = set()
+            for _, operation in operations:
+                value = (operation.get('data') or {}).get(field.name)
+                if isinstance(value, (int, str)) and str(value).isdigit():
+                    ids.add(int(value))
+            cache[field.related_model] = field.related_model.objects.in_bulk(ids)
+        return cache
+
+    def create(self, invoices):
+        if not invoices:
+            return
+        for invoice in invoices:
+            update_search_fields(invoice)
+        if connection.features.can_return_rows_from_bulk_insert:
+            PaymenInvoice.objects.bulk_create(invoices, batch_size=BATCH_SIZE)
+            apply_balance_deltas(collect_balance_deltas(invoices))
+            apply_rollup_deltas(collect_rollup_deltas(invoices))
+            for invoice in invoices:
+                balance_tracker.remember(invoice)
+                rollup_tracker.remember(invoice)
+        else:
+            # MySQL bulk_create'te oluşan id'leri döndürmüyor; kayıtlar tek tek
+            # eklenir, bakiye ve özet signal'ları deferred_*_updates'e yazar.
+            for invoice in invoices:
+                invoice.save()
+        for invoice in invoices:
+            self.log(invoice, LogEntry.Action.CREATE, model_instance_diff(None, invoice))
+
+    def update(self, updates):
+        if not updates:
+            return
+        fields = set(SEARCH_FIELDS['paymeninvoice']) | {'updated_date'}
+        now = timezone.now()
+        for invoice, validated_data in updates:
+            old = copy(invoice)
+            for name, value in validated_data.items():
+                setattr(invoice, name, value)
+            fields.update(validated_data)
+            update_search_fields(invoice)
+            invoice.updated_date = now
+
+            old_state = balance_tracker.get(invoice)
+            new_state = balance_tracker.current(invoice)
+            apply_balance_change(old_state, new_state)
+            balance_tracker.set(invoice, new_state)
+
+            old_state = rollup_tracker.get(invoice)
+            new_state = rollup_tracker.current(invoice)
+            apply_rollup_deltas(rollup_state_deltas(old_state, new_state))
+            rollup_tracker.set(invoice, new_state)
+
+            changes = model_instance_diff(old, invoice)
+            if changes:
+                self.log(invoice, LogEntry.Action.UPDATE, changes)
+        PaymenInvoice.objects.bulk_update([invoice for invoice, _ in updates], sorted(fields),
+                                          batch_size=BATCH_SIZE)
+
+    def delete(self, invoices):
+        if not invoices:
+            return
+        for invoice in invoices:
+            self.log(invoice, LogEntry.Action.DELETE, model_instance_diff(invoice, None))
+        # Bakiye ve özet düşümü post_delete signal'ında, deferred_*_updates içinde biriktirilir.
+        PaymenInvoice.objects.filter(pk__in=[invoice.pk for invoice in invoices]).delete()
+
+    def log(self, invoice, action, changes):
+        self.log_entries.append(build_log_entry(self.content_type, invoice, action, changes, self.user))
+
+
+def build_log_entry(content_type, invoice, action, changes, user):
+    """
+    Auditlog signal'ları kapalıyken (disable_auditlog) toplu yazılacak
+    LogEntry; actor istekteki kullanıcı, remote_addr ve cid auditlog
+    context'inden alınır.
+    """
+    try:
+        remote_addr = auditlog_value.get().get('remote_addr')
+    except LookupError:
+        remote_addr = None
+    return LogEntry(
+        content_type=content_type,
+        object_pk=str(invoice.pk),
+        object_id=invoice.pk,
+        object_repr=smart_str(invoice),
+        action=action,
+        changes=changes,
+        actor=user if getattr(user, 'is_authenticated', False) else None,
+        remote_addr=remote_addr,
+        cid=get_cid(),
+    )
@@ -0,0 +1,146 @@
+import logging
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+
+class EagerLoader:
+    """
+    Serializer ağacını okuyup gereken select_related/prefetch_related
+    yollarını çıkarır. Yollar serializer sınıfı başına bir kez hesaplanır.
+
+    Sparse serializer'lar (?fields=/?expand=, bkz. core/sparse.py) için
+    ayrıca okunacak kolonların listesi (`only`) çıkarılır; bunlar isteğe
+    özel olduğu için önbelleğe alınmaz.
+    """
+    _cache = {}
+
+    def __init__(self, serializer_class, serializer=None):
+        self.serializer_class = serializer_class
+        self.select_related = []
+        self.prefetch_related = []
+        if serializer is None:
+            serializer = serializer_class()
+        self.only = [] if getattr(serializer, 'sparse', False) else None
+        self.collect(serializer, prefix='', in_prefetch=False)
+
+    @classmethod
+    def for_serializer(cls, serializer_class, **serializer_kwargs):
+        if serializer_kwargs:
+            return cls(serializer_class, serializer_class(**serializer_kwargs))
+        loader = cls._cache.get(serializer_class)
+        if loader is None:
+            loader = cls._cache[serializer_class] = cls(serializer_class)
+        return loader
+
+    def collect(self, serializer, prefix, in_prefetch):
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        if model is None:
+            return
+
+        # Prefetch edilen ilişkilerin kolonları ayrı sorguda okunur, projeksiyona girmez
+        project = self.only is not None and not in_prefetch
+        columns = [model._meta.pk.name]
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                columns = [f.name for f in model._meta.concrete_fields]
+                continue
+            source = field.source.replace('.', '__')
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                # Property/metot: hangi kolonlara baktığı bilinmez, model tam okunur
+                columns = [f.name for f in model._meta.concrete_fields]
+                continue
+            if not model_field.is_relation:
+                columns.append(source)
+                continue
+
+            path = f'{prefix}{source}'
+            many = model_field.many_to_many or model_field.one_to_many
+            if not many:
+                columns.append(source)
+
+            if isinstance(field, serializers.ListSerializer):
+                self.prefetch_related.append(path)
+                self.collect(field.child, f'{path}__', in_prefetch=True)
+            elif isinstance(field, serializers.BaseSerializer):
+                if many or in_prefetch:
+                    self.prefetch_related.append(path)
+                else:
+                    self.select_related.append(path)
+                self.collect(field, f'{path}__', in_prefetch=in_prefetch or many)
+            elif isinstance(field, serializers.ManyRelatedField):
+                self.prefetch_related.append(path)
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                # FK'nin id'si zaten satırda var, ek sorgu gerekmez.
+                continue
+            elif isinstance(field, serializers.RelatedField):
+                if many or in_prefetch:
+                    self.prefetch_related.append(path)
+                else:
+                    self.select_related.append(path)
+        if project:
+            self.only.extend(f'{prefix}{name}' for name in dict.fromkeys(columns))
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.only is not None:
+            # Sıralama kolonları da okunur; cursor sayfalama son satırdan değer alır
+            ordering = [key.lstrip('-') for key in queryset.query.order_by
+                        if isinstance(key, str) and '__' not in key and key.lstrip('-') != '?']
+            queryset = queryset.only(*self.only, *ordering)
+        return queryset
+
+    def queries_saved(self, row_count):
+        """
+        Eager loading olmasaydı her satır ve her ilişki için atılacak
+        sorgu sayısından, prefetch için atılan sorgular düşülür.
+        """
+        if not row_count:
+            return 0
+        relations = len(self.select_related) + len(self.prefetch_related)
+        return max(row_count * relations - len(self.prefetch_related), 0)
+
+
+def eager_load(queryset, serializer_class, **serializer_kwargs):
+    return EagerLoader.for_serializer(serializer_class, **serializer_kwargs).apply(queryset)
+
+
+class EagerLoadingMixin:
+    """
+    APIView'lar için: `self.eager(queryset, SerializerClass)` ile sorguyu
+    optimize eder, cevaba kaç sorgu kazanıldığını `X-Queries-Saved`
+    başlığı olarak ekler.
+    """
+    queries_saved_header = 'X-Queries-Saved'
+
+    def eager(self, queryset, serializer_class, **serializer_kwargs):
+        loader = EagerLoader.for_serializer(serializer_class, **serializer_kwargs)
+        if not hasattr(self, '_eager_loaders'):
+            self._eager_loaders = []
+        self._eager_loaders.append(loader)
+        return loader.apply(queryset)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        loaders = getattr(self, '_eager_loaders', None)
+        data = getattr(response, 'data', None)
+        if loaders and data is not None and response.status_code < 400:
+            if isinstance(data, dict) and isinstance(data.get('results'), list):
+                row_count = len(data['results'])
+            elif isinstance(data, list):
+                row_count = len(data)
+            else:
+                row_count = 1
+            saved = sum(loader.queries_saved(row_count) for loader in loaders)
+            response[self.queries_saved_header] = str(saved)
+            logger.debug("%s: eager loading %s sorgu kazandırdı", self.__class__.__name__, saved)
+        return response
@@ -0,0 +1,277 @@
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+
+from auditlog.context import disable_auditlog
+from auditlog.diff import model_instance_diff
+from auditlog.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .balances import apply_balance_deltas, collect_balance_deltas, deferred_balance_updates
+from .bulk import build_log_entry
+from .models import Company, Customer, Group, PaymenInvoice, Worksite
+from .rollups import apply_rollup_deltas, collect_rollup_deltas, deferred_rollup_updates
+from .search import normalize_search, update_search_fields
+
+BATCH_SIZE = 500
+MAX_ERRORS = 100
+
+# Excel başlığı (normalize edilmiş) -> PaymenInvoice alanı
+COLUMN_ALIASES = {
+    'fatura no': 'invoice_no', 'invoice_no': 'invoice_no',
+    'tarih': 'date', 'date': 'date',
+    'şantiye': 'worksite', 'worksite': 'worksite', 'worksite_id': 'worksite_id',
+    'grup': 'group', 'group': 'group', 'group_id': 'group_id',
+    'şirket': 'company', 'firma': 'company', 'company': 'company', 'company_id': 'company_id',
+    'müşteri': 'customer', 'cari': 'customer', 'customer': 'customer', 'customer_id': 'customer_id',
+    'tür': 'type', 'tip': 'type', 'type': 'type',
+    'borç': 'debt', 'debt': 'debt',
+    'alacak': 'receivable', 'receivable': 'receivable',
+    'banka': 'bank', 'bank': 'bank',
+    'çek no': 'check_no', 'check_no': 'check_no',
+    'çek tarihi': 'check_time', 'vade': 'check_time', 'check_time': 'check_time',
+    'malzeme': 'material', 'material': 'material',
+    'miktar': 'quantity', 'quantity': 'quantity',
+    'birim fiyat': 'unit_price', 'unit_price': 'unit_price',
+    'tutar': 'price', 'fiyat': 'price', 'price': 'price',
+    'kdv': 'tax', 'tax': 'tax',
+    'kdv tutarı': 'tax_amount', 'tax_amount': 'tax_amount',
+    'tevkifat': 'withholding', 'withholding': 'withholding',
+    'tevkifat tutarı': 'withholding_amount', 'withholding_amount': 'withholding_amount',
+}
+
+RELATED_MODELS = {
+    'worksite': Worksite,
+    'group': Group,
+    'company': Company,
+    'customer': Customer,
+}
+
+# İlişkili kayıtlar ad kolonundan ya da açık id kolonundan (ör. "Müşteri ID") bulunur
+ID_COLUMNS = {f'{name}_id': name for name in RELATED_MODELS}
+COLUMN_ALIASES.update({
+    f'{title} {suffix}': f'{field}_id'
+    for title, field in list(COLUMN_ALIASES.items()) if field in RELATED_MODELS
+    # "ID" normalize edilince "ıd" olur
+    for suffix in ('id', 'ıd')
+})
+
+REQUIRED_COLUMNS = ('date', 'worksite', 'group', 'company', 'customer')
+DATETIME_FIELDS = ('date', 'check_time')
+DATE_FORMATS = ('%d.%m.%Y %H:%M', '%d.%m.%Y', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d/%m/%Y')
+ENTRY_TYPES = ('invoice', 'payment')
+
+
+class ExcelImportError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class PaymenInvoiceImporter:
+    """
+    Excel dosyasını openpyxl read-only modunda satır satır okur, satırları
+    BATCH_SIZE'lık gruplar halinde doğrulayıp bulk_create ile yazar.
+    Müşteri bakiyeleri ve aylık özetler en sonda satır başına tek UPDATE ile
+    güncellenir; auditlog kayıtları core/bulk.py'deki gibi toplu yazılır.
+    Hata varsa hiçbir şey yazılmaz.
+    """
+
+    def __init__(self, user=None, dry_run=False):
+        self.user = user
+        self.dry_run = dry_run
+        self.errors = []
+        self.created = 0
+        self.content_type = ContentType.objects.get_for_model(PaymenInvoice)
+        self.lookups = {
+            name: self.build_lookup(model) for name, model in RELATED_MODELS.items()
+        }
+
+    def build_lookup(self, model):
+        """
+        Referans tabloları küçük; tek sorguda yüklenir. Ad (normalize) -> id
+        eşlemesinde aynı ada sahip birden fazla kayıt varsa ad belirsizdir
+        (None) ve satır hata verir.
+        """
+        ids = set()
+        names = {}
+        for pk, search_name in model.objects.values_list('id', 'search_name'):
+            ids.add(pk)
+            names[search_name] = None if search_name in names else pk
+        return {'ids': ids, 'names': names}
+
+    def run(self, file, sheet_name=None):
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            sheet = workbook[sheet_name] if sheet_name else workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            columns = self.read_header(next(rows, None))
+
+            with transaction.atomic():
+                with deferred_balance_updates(), deferred_rollup_updates(), disable_auditlog():
+                    self.import_rows(columns, rows)
+                if self.errors:
+                    raise ExcelImportError(self.errors)
+                # Bakiye/özet güncellemeleri de denensin diye geri alma en sonda işaretlenir
+                if self.dry_run:
+                    transaction.set_rollback(True)
+        finally:
+            workbook.close()
+        return self.created
+
+    def import_rows(self, columns, rows):
+        batch = []
+        for row_number, row in enumerate(rows, start=2):
+            if not row or all(cell in (None, '') for cell in row):
+                continue
+            invoice = self.build_invoice(row_number, columns, row)
+            if invoice is not None:
+                batch.append(invoice)
+            if len(self.errors) >= MAX_ERRORS:
+                break
+            if len(batch) >= BATCH_SIZE:
+                self.flush(batch)
+                batch = []
+        self.flush(batch)
+
+    def read_header(self, header):
+        if not header:
+            raise ExcelImportError([{'row': 1, 'error': 'Başlık satırı bulunamadı.'}])
+        columns = {}
+        for index, title in enumerate(header):
+            field = COLUMN_ALIASES.get(normalize_search(title))
+            if field and field not in columns.values():
+                columns[index] = field
+        given = {ID_COLUMNS.get(field, field) for field in columns.values()}
+        missing = [name for name in REQUIRED_COLUMNS if name not in given]
+        if missing:
+            raise ExcelImportError([{'row': 1, 'error': f"Eksik kolonlar: {', '.join(missing)}"}])
+        return columns
+
+    def build_invoice(self, row_number, columns, row):
+        values = {}
+        row_errors = {}
+        for index, field in columns.items():
+            value = row[index] if index < len(row) else None
+            if isinstance(value, str):
+                value = value.strip()
+            try:
+                values[field] = self.clean_value(field, value)
+            except ValidationError as exc:
+                row_errors[field] = exc.messages
+        for id_field, field in ID_COLUMNS.items():
+            pk = values.pop(id_field, None)
+            if pk is None:
+                continue
+            if values.get(field) not in (None, pk):
+                row_errors[field] = ['Ad ve id kolonları farklı kayıtları gösteriyor.']
+            values[field] = pk
+        for field in REQUIRED_COLUMNS:
+            if field not in row_errors and f'{field}_id' not in row_errors and values.get(field) is None:
+                row_errors[field] = ['Bu alan zorunludur.']
+        if row_errors:
+            self.errors.append({'row': row_number, 'errors': row_errors})
+            return None
+
+        invoice = PaymenInvoice(created_by=self.user, **{
+            f'{name}_id' if name in RELATED_MODELS else name: value
+            for name, value in values.items()
+        })
+        update_search_fields(invoice)
+        return invoice
+
+    def clean_value(self, field, value):
+        if value in (None, ''):
+            return None
+        if field in ID_COLUMNS:
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            try:
+                pk = int(str(value))
+            except ValueError:
+                raise ValidationError(f'"{value}" geçerli bir id değil.')
+            if pk not in self.lookups[ID_COLUMNS[field]]['ids']:
+                raise ValidationError(f'{pk} id\'li kayıt bulunamadı.')
+            return pk
+        if field in RELATED_MODELS:
+            # Sayı hücresi de ad olarak aranır (ör. "1453" adlı şantiye); id için id kolonu kullanılır
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            names = self.lookups[field]['names']
+            key = normalize_search(value)
+            if key not in names:
+                raise ValidationError(f'"{value}" bulunamadı.')
+            if names[key] is None:
+                raise ValidationError(f'"{value}" adında birden fazla kayıt var; id kolonunu kullanın.')
+            return names[key]
+        if field in DATETIME_FIELDS:
+            return self.parse_datetime(value)
+        if field == 'type':
+            value = str(value).lower()
+            if value not in ENTRY_TYPES:
+                raise ValidationError(f"Tür {' / '.join(ENTRY_TYPES)} olmalı.")
+            return value
+
+        model_field = PaymenInvoice._meta.get_field(field)
+        if model_field.get_internal_type() == 'DecimalField':
+            value = self.parse_decimal(value)
+        else:
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            if not isinstance(value, str) and model_field.get_internal_type() == 'CharField':
+                value = str(value)
+        return model_field.clean(value, None)
+
+    def parse_decimal(self, value):
+        if isinstance(value, str) and ',' in value:
+            # Türkçe biçim: 1.234,56
+            value = value.replace('.', '').replace(',', '.')
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            raise ValidationError(f'"{value}" geçerli bir sayı değil.')
+
+    def parse_datetime(self, value):
+        if isinstance(value, datetime):
+            parsed = value
+        elif isinstance(value, date):
+            parsed = datetime.combine(value, time.min)
+        else:
+            for date_format in DATE_FORMATS:
+                try:
+                    parsed = datetime.strptime(str(value), date_format)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValidationError(f'"{value}" geçerli bir tarih değil.')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def flush(self, batch):
+        if not batch or self.errors:
+            return
+        if connection.features.can_return_rows_from_bulk_insert:
+            PaymenInvoice.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            apply_balance_deltas(collect_balance_deltas(batch))
+            apply_rollup_deltas(collect_rollup_deltas(batch))
+        else:
+            # MySQL bulk_create'te oluşan id'leri döndürmüyor (LogEntry'ler için
+            # gerekli); kayıtlar tek tek eklenir, bakiye ve özet signal'ları
+            # deferred_*_updates'e yazar.
+            for invoice in batch:
+                invoice.save()
+
+        # object_repr müşteri adını kullanır; müşteriler parti başına tek sorguda gelir
+        customers = Customer.objects.in_bulk({invoice.customer_id for invoice in batch})
+        entries = []
+        for invoice in batch:
+            invoice.customer = customers[invoice.customer_id]
+            entries.append(build_log_entry(self.content_type, invoice, LogEntry.Action.CREATE,
+                                           model_instance_diff(None, invoice), self.user))
+        LogEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        self.created += len(batch)
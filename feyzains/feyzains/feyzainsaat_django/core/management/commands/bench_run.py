@@ -0,0 +1,133 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import redirect_stdout
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.bench import bench_user
+from core.models import PaymenInvoice
+
+# (ad, url) — liste ekranlarının ilk sayfası, tipik filtreler ve cursor modu
+SCENARIOS = [
+    ('search_page', '/core/search_page/'),
+    ('search_page_range', '/core/search_page/?start_date=2023-01-01&end_date=2023-03-31'),
+    ('search_page_cursor', '/core/search_page/?cursor='),
+    ('checklist', '/core/checklist/'),
+    ('checklist_range', '/core/checklist/?start_date=2023-01-01&end_date=2023-03-31'),
+    ('payment_entry', '/core/payment_entry/?type=payment'),
+    ('payment_entry_customer', '/core/payment_entry/?type=payment&customer=yapi'),
+    ('payment_entry_cursor', '/core/payment_entry/?type=payment&cursor='),
+    ('invoice', '/core/invoice/'),
+    ('invoice_material', '/core/invoice/?material=cimento'),
+    ('invoice_cursor', '/core/invoice/?cursor='),
+    ('worksite_list', '/core/worksite/'),
+    ('group_list', '/core/group/'),
+    ('company_list', '/core/company/'),
+    ('customer_list', '/core/customer/'),
+]
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Liste uçlarını (search_page, checklist, payment_entry, invoice, referans listeleri) "
+        "process içinde tam middleware zinciriyle çağırır; p50/p90/p99 gecikme, throughput ve "
+        "istek başına sorgu sayısını JSON olarak yazar. Veri için önce bench_seed çalıştırılmalı."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Senaryo başına ölçülen istek sayısı.')
+        parser.add_argument('--warmup', type=int, default=20, help='Ölçülmeyen ısınma istekleri.')
+        parser.add_argument('--only', help='Virgülle ayrılmış senaryo adları.')
+        parser.add_argument('--label', help='Sonuca eklenecek etiket (varsayılan git commit).')
+        parser.add_argument('--output', help='Sonuç dosyası (varsayılan stdout).')
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options['only']:
+            names = set(options['only'].split(','))
+            scenarios = [scenario for scenario in SCENARIOS if scenario[0] in names]
+            if not scenarios:
+                raise CommandError(f"Senaryo bulunamadı. Mevcut: {', '.join(name for name, _ in SCENARIOS)}")
+
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(bench_user())}')
+        results = {}
+        # Görünümlerdeki print()'ler ölçümü ve çıktıyı bozmasın
+        with open(os.devnull, 'w') as devnull:
+            for name, url in scenarios:
+                with redirect_stdout(devnull):
+                    results[name] = self.measure(client, url, options['warmup'], options['iterations'])
+                self.stderr.write(
+                    f"{name}: p50 {results[name]['p50_ms']} ms, p99 {results[name]['p99_ms']} ms, "
+                    f"{results[name]['queries']} sorgu"
+                )
+
+        report = {
+            'label': options['label'] or git_revision(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'invoices': PaymenInvoice.objects.count(),
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def measure(self, client, url, warmup, iterations):
+        for _ in range(warmup):
+            client.get(url)
+
+        # request_started queries_log'u sıfırladığı için sayım execute_wrapper ile yapılır
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} {response.status_code} döndü.')
+
+        timings = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+
+        return {
+            'url': url,
+            'p50_ms': round(percentile(timings, 50) * 1000, 3),
+            'p90_ms': round(percentile(timings, 90) * 1000, 3),
+            'p99_ms': round(percentile(timings, 99) * 1000, 3),
+            'mean_ms': round(statistics.mean(timings) * 1000, 3),
+            'rps': round(iterations / elapsed, 1),
+            'queries': len(queries),
+            'response_bytes': len(response.content),
+        }
@@ -0,0 +1,53 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core.balances import find_balance_drift, fix_balance_drift
+from core.bench import generate
+from core.models import PaymenInvoice
+from core.rollups import rebuild_rollups
+
+SCALES = {'k': 1000, 'm': 1000000}
+
+
+def parse_scale(value):
+    value = value.strip().lower()
+    try:
+        if value[-1] in SCALES:
+            return int(float(value[:-1]) * SCALES[value[-1]])
+        return int(value)
+    except (ValueError, IndexError):
+        raise CommandError('--invoices formatı hatalı. Örnek: 10000, 10k, 1m, 5m.')
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark için deterministik sentetik veri üretir (şantiye, grup, şirket, müşteri, "
+        "personel ve fatura/ödeme). Aynı --seed ve --invoices her zaman aynı veriyi üretir. "
+        "Boş bir veritabanında (ör. settings_bench) çalıştırılmalıdır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoices', default='10k', help='Fatura sayısı: 10k, 100k, 1m, 5m ... (varsayılan 10k)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flush', action='store_true', help='Önce veritabanını tamamen boşalt (sadece benchmark veritabanında kullanın).')
+
+    def handle(self, *args, **options):
+        invoices = parse_scale(options['invoices'])
+
+        if options['flush']:
+            self.flush()
+        elif PaymenInvoice.objects.exists():
+            raise CommandError('Veritabanında fatura var; sonuçlar karşılaştırılamaz. --flush kullanın.')
+
+        counts = generate(invoices, seed=options['seed'], stdout=self.stdout)
+        self.stdout.write('Bakiyeler ve aylık özetler hesaplanıyor...')
+        fix_balance_drift([row['id'] for row in find_balance_drift()])
+        rebuild_rollups()
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'{invoices} fatura, {summary} üretildi (seed={options["seed"]}).'))
+
+    def flush(self):
+        # Benchmark veritabanı ayrı olduğu için tamamen boşaltılır; satır satır
+        # silmek bakiye/özet/auditlog signal'larını her fatura için çalıştırırdı.
+        call_command('flush', interactive=False, verbosity=0)
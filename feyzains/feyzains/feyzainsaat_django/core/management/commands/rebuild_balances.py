@@ -0,0 +1,71 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.balances import customers_touched_since, find_balance_drift, fix_balance_drift
+from core.models import MaintenanceWatermark
+
+WATERMARK_NAME = 'rebuild_balances'
+
+
+class Command(BaseCommand):
+    help = (
+        "Müşteri bakiyelerini faturalardan (SUM(debt) - SUM(receivable)) yeniden hesaplar, "
+        "tutmayanları raporlar; --fix ile düzeltir. --incremental sadece son çalışmadan "
+        "beri faturası eklenen, değişen, silinen (tek tek, cascade ya da toplu) veya başka "
+        "müşteriye taşınan müşterilere bakar. Doğrudan SQL ile yapılan değişiklikler "
+        "signal'lardan geçmediği için yakalanmaz; arada bir tam kontrol yapılmalı."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Tutmayan bakiyeleri düzelt.')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Sadece son başarılı çalışmadan beri değişen müşterileri kontrol et.')
+        parser.add_argument('--since', help='Bu tarihten (YYYY-MM-DD veya ISO datetime) beri değişenleri kontrol et.')
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        since = self.get_since(options)
+
+        customer_ids = None
+        if since is not None:
+            customer_ids = customers_touched_since(since)
+            self.stdout.write(f"{since:%Y-%m-%d %H:%M} sonrası değişen müşteri sayısı: {len(customer_ids)}")
+
+        drift = find_balance_drift(customer_ids)
+        for row in drift:
+            self.stdout.write(
+                f"#{row['id']} {row['name']}: kayıtlı {row['balance']} ({row['balance_status']}), "
+                f"olması gereken {row['expected']} ({row['expected_status']}), "
+                f"fark {row['expected'] - row['balance']}"
+            )
+
+        if drift and options['fix']:
+            fixed = fix_balance_drift([row['id'] for row in drift])
+            self.stdout.write(self.style.SUCCESS(f"{len(fixed)} müşterinin bakiyesi düzeltildi."))
+        elif drift:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} müşterinin bakiyesi tutmuyor (düzeltmek için --fix)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Tüm bakiyeler tutarlı."))
+
+        # Watermark sadece her şey tutarlıyken ilerler; aksi halde sonraki
+        # artımlı çalışma aynı müşterileri tekrar görür.
+        if options['incremental'] and (not drift or options['fix']):
+            MaintenanceWatermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'value': started})
+
+    def get_since(self, options):
+        if options['since']:
+            value = parse_datetime(options['since'])
+            if value is None:
+                day = parse_date(options['since'])
+                if day is None:
+                    raise CommandError('--since formatı hatalı. Format: YYYY-MM-DD veya ISO datetime.')
+                value = datetime.combine(day, time.min)
+            return timezone.make_aware(value) if timezone.is_naive(value) else value
+        if options['incremental']:
+            watermark = MaintenanceWatermark.objects.filter(name=WATERMARK_NAME).values_list('value', flat=True).first()
+            # İlk çalışmada watermark yoksa tam kontrol yapılır.
+            return watermark
+        return None
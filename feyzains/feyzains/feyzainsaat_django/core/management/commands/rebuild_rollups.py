@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Aylık fatura özet tablosunu (PaymenInvoiceMonthlyRollup) faturalardan yeniden üretir. "
+        "--since verilirse sadece o aydan sonrası yeniden hesaplanır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Bu aydan (YYYY-MM veya YYYY-MM-DD) itibaren yeniden üret.')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            value = options['since']
+            since = parse_date(f'{value}-01' if len(value) == 7 else value)
+            if since is None:
+                raise CommandError('--since formatı hatalı. Format: YYYY-MM veya YYYY-MM-DD.')
+
+        created = rebuild_rollups(since)
+        self.stdout.write(self.style.SUCCESS(f"{created} özet satırı oluşturuldu."))
@@ -0,0 +1,86 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PaymenInvoice
+from .search import search_q
+
+# Çek vade takvimi (ChequeCalendarView). Tek GROUP BY ile gün kovaları
+# okunur; hafta ve ay toplamları bu kovalardan üretilir.
+CALENDAR_FILTERS = ('company', 'customer', 'bank')
+CALENDAR_DAYS = 365
+MAX_CALENDAR_DAYS = 3 * 366
+
+
+def maturing_cheques(start, end, filters=None):
+    """
+    `start`-`end` (date, ikisi de dahil) arasında vadesi gelen çekler.
+    check_time aralığı paymeninv_check_time_idx indeksinden okunur; filtreler
+    ChecklistView'daki gibi ad araması yapar.
+    """
+    cheques = PaymenInvoice.objects.filter(
+        check_no__gt='',
+        check_time__range=(
+            timezone.make_aware(datetime.combine(start, time.min)),
+            timezone.make_aware(datetime.combine(end, time.max)),
+        ),
+    )
+    for name, value in (filters or {}).items():
+        if value:
+            cheques = cheques.filter(search_q(name, value))
+    return cheques
+
+
+def day_buckets(cheques):
+    """Yerel saatle gün bazında [(gün, adet, tutar)], güne göre sıralı."""
+    rows = (
+        cheques.order_by()
+        .annotate(day=TruncDate('check_time', output_field=DateField()))
+        .values('day')
+        .annotate(count=Count('id'), debt=Sum('debt'))
+        .order_by('day')
+    )
+    return [(row['day'], row['count'], row['debt'] or Decimal(0)) for row in rows]
+
+
+def week_start(day):
+    # Haftalar pazartesi başlar
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def roll_up(days, bucket):
+    """Gün kovalarını `bucket(gün)` anahtarına göre toplar; sıra korunur."""
+    totals = {}
+    for day, count, debt in days:
+        total = totals.setdefault(bucket(day), [0, Decimal(0)])
+        total[0] += count
+        total[1] += debt
+    return list(totals.items())
+
+
+def maturity_calendar(cheques):
+    days = day_buckets(cheques)
+    count = sum(row[1] for row in days)
+    debt = sum((row[2] for row in days), Decimal(0))
+    return {
+        'total': {'count': count, 'debt': f'{debt:.2f}'},
+        'days': [
+            {'date': day.isoformat(), 'count': count, 'debt': f'{debt:.2f}'}
+            for day, count, debt in days
+        ],
+        'weeks': [
+            {'week': day.isoformat(), 'count': count, 'debt': f'{debt:.2f}'}
+            for day, (count, debt) in roll_up(days, week_start)
+        ],
+        'months': [
+            {'month': day.strftime('%Y-%m'), 'count': count, 'debt': f'{debt:.2f}'}
+            for day, (count, debt) in roll_up(days, month_start)
+        ],
+    }
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_customer_balance_customer_balance_status_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymeninvoice',
+            index=models.Index(fields=['type', 'date', 'id'], name='paymeninv_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymeninvoice',
+            index=models.Index(fields=['date', 'id'], name='paymeninv_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymeninvoice',
+            index=models.Index(fields=['check_time', 'id'], name='paymeninv_check_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymeninvoice',
+            index=models.Index(fields=['check_no'], name='paymeninv_check_no_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymeninvoice',
+            index=models.Index(fields=['customer', 'date'], name='paymeninv_customer_date_idx'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:37
+
+import core.search
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def fill_search_columns(apps, schema_editor):
+    for model_name, columns in core.search.SEARCH_FIELDS.items():
+        model = apps.get_model('core', model_name)
+        batch = []
+        for obj in model.objects.only('id', *columns.values()).iterator(chunk_size=BATCH_SIZE):
+            for search_field, source in columns.items():
+                setattr(obj, search_field, core.search.normalize_search(getattr(obj, source)))
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, list(columns))
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, list(columns))
+
+
+def fulltext_indexes(apps):
+    for model_name, columns in core.search.SEARCH_FIELDS.items():
+        table = apps.get_model('core', model_name)._meta.db_table
+        for column in columns:
+            yield table, column, f'{table}_{column}_ft'
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    # Sadece MySQL: ngram parser ile alt-dizi aramasına uygun FULLTEXT indeksler.
+    # Stopword listesi kapatılmazsa "is", "an" gibi ngram'lar indekse girmez.
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('SET SESSION innodb_ft_enable_stopword = OFF')
+    for table, column, name in fulltext_indexes(apps):
+        schema_editor.execute(f'CREATE FULLTEXT INDEX {name} ON {table} ({column}) WITH PARSER ngram')
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for table, column, name in fulltext_indexes(apps):
+        schema_editor.execute(f'DROP INDEX {name} ON {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_paymeninvoice_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='search_name',
+            field=core.search.SearchField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='search_name',
+            field=core.search.SearchField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='search_name',
+            field=core.search.SearchField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='paymeninvoice',
+            name='bank_search',
+            field=core.search.SearchField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='paymeninvoice',
+            name='check_no_search',
+            field=core.search.SearchField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='paymeninvoice',
+            name='material_search',
+            field=core.search.SearchField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='worksite',
+            name='search_name',
+            field=core.search.SearchField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:47
+
+import core.rollups
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_rollups(apps, schema_editor):
+    invoice_model = apps.get_model('core', 'PaymenInvoice')
+    rollup_model = apps.get_model('core', 'PaymenInvoiceMonthlyRollup')
+    rollup_model.objects.bulk_create(
+        (rollup_model(**values) for values in core.rollups.aggregate_rollups(invoice_model.objects.all())),
+        batch_size=core.rollups.BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_balance_reconciliation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymenInvoiceMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('debt', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('receivable', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('withholding_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('row_count', models.IntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.company')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.customer')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.group')),
+                ('worksite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.worksite')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer', 'month'], name='rollup_customer_month_idx'), models.Index(fields=['worksite', 'month'], name='rollup_worksite_month_idx'), models.Index(fields=['group', 'month'], name='rollup_group_month_idx'), models.Index(fields=['company', 'month'], name='rollup_company_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('month', 'customer', 'worksite', 'group', 'company'), name='rollup_month_dimensions_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
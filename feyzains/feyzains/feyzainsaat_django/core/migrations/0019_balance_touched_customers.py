@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_monthly_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceTouchedCustomer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customer_id', models.IntegerField(unique=True)),
+                ('touched_date', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
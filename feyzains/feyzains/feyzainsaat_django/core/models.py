@@ -1,5 +1,6 @@
 from django.db import models
 from accounts.models import User
+from .search import SearchField, SearchFieldsModel
 
 # Create your models here.
 class Category(models.Model):
@@ -40,22 +41,25 @@ class Comment(models.Model):
 
 
 
-class Worksite(models.Model):
+class Worksite(SearchFieldsModel):
     name = models.CharField(max_length=255)
     created_date = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    search_name = SearchField()
 
-class Group(models.Model):
+class Group(SearchFieldsModel):
     name = models.CharField(max_length=255)
     created_date = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    search_name = SearchField()
 
-class Company(models.Model):
+class Company(SearchFieldsModel):
     name = models.CharField(max_length=255)
     created_date = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='company_created_by')
+    search_name = SearchField()
 
-class Customer(models.Model):
+class Customer(SearchFieldsModel):
     name = models.CharField(max_length=255)
     created_date = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
@@ -69,6 +73,7 @@ class Customer(models.Model):
         ),
         default='0'
     )
+    search_name = SearchField()
 
     def __str__(self):
         return self.name
@@ -133,7 +138,7 @@ class Personal(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 
-class PaymenInvoice(models.Model):
+class PaymenInvoice(SearchFieldsModel):
     invoice_no = models.CharField(max_length=100, null=True, blank=True)
     date = models.DateTimeField()
     worksite = models.ForeignKey(Worksite, on_delete=models.CASCADE)
@@ -159,9 +164,84 @@ class PaymenInvoice(models.Model):
     withholding_amount = models.DecimalField(max_digits=10, decimal_places=2,null=True, blank=True)
     receivable = models.DecimalField(max_digits=15, decimal_places=2,null=True, blank=True)
 
+    # Arama kolonları (bkz. core/search.py)
+    bank_search = SearchField()
+    check_no_search = SearchField()
+    material_search = SearchField()
+
     created_date = models.DateTimeField(auto_now_add=True)
+    # Artımlı bakiye kontrolü (rebuild_balances --incremental) bu alana bakar.
+    # bulk_update auto_now'u doldurmaz, toplu güncellemelerde elle set edilmeli.
+    updated_date = models.DateTimeField(auto_now=True, db_index=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        # Liste ekranlarının filtre/sıralama kalıplarına göre bileşik indeksler.
+        # Sonlarındaki `id`, cursor sayfalamadaki tie-breaker içindir.
+        indexes = [
+            models.Index(fields=['type', 'date', 'id'], name='paymeninv_type_date_idx'),
+            models.Index(fields=['date', 'id'], name='paymeninv_date_idx'),
+            models.Index(fields=['check_time', 'id'], name='paymeninv_check_time_idx'),
+            models.Index(fields=['check_no'], name='paymeninv_check_no_idx'),
+            models.Index(fields=['customer', 'date'], name='paymeninv_customer_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.customer.name} - {self.check_no}"
-    
\ No newline at end of file
+
+
+class PaymenInvoiceMonthlyRollup(models.Model):
+    """
+    PaymenInvoice toplamlarının ay ve müşteri/şantiye/grup/şirket kırılımındaki
+    özeti. Kayıt ekleme/güncelleme/silmede artımlı güncellenir (core/rollups.py),
+    `rebuild_rollups` komutu ile baştan üretilebilir.
+    """
+    month = models.DateField()  # ayın ilk günü (Europe/Istanbul)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='+')
+    worksite = models.ForeignKey(Worksite, on_delete=models.CASCADE, related_name='+')
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='+')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+')
+    debt = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    receivable = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    withholding_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    row_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'customer', 'worksite', 'group', 'company'],
+                                    name='rollup_month_dimensions_uniq'),
+        ]
+        # Her kırılım için (boyut, ay) indeksi; ay aralığı sorguları unique indeksi kullanır.
+        indexes = [
+            models.Index(fields=['customer', 'month'], name='rollup_customer_month_idx'),
+            models.Index(fields=['worksite', 'month'], name='rollup_worksite_month_idx'),
+            models.Index(fields=['group', 'month'], name='rollup_group_month_idx'),
+            models.Index(fields=['company', 'month'], name='rollup_company_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.customer_id}"
+
+class MaintenanceWatermark(models.Model):
+    """Periyodik bakım komutlarının en son nereye kadar çalıştığı (ör. rebuild_balances)."""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class BalanceTouchedCustomer(models.Model):
+    """
+    Faturası silinen ya da başka müşteriye taşınan müşteriler. Bu değişiklikler
+    PaymenInvoice.updated_date'te görünmediği için `rebuild_balances --incremental`
+    müşterileri buradan da okur. Müşteri başına tek satır tutulur.
+    """
+    # FK değil: müşteri silinirken (cascade) yazılabilir
+    customer_id = models.IntegerField(unique=True)
+    touched_date = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.customer_id}: {self.touched_date}"
@@ -0,0 +1,183 @@
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+
+from feyzainsaat_django.conditional import not_modified, with_etag
+
+# Değeri olduğu gibi JSON'a giden alanlar (to_representation çağrısı atlanır)
+IDENTITY_FIELDS = {
+    drf_fields.CharField: str,
+    drf_fields.IntegerField: int,
+}
+
+
+class ProjectionNotSupported(Exception):
+    pass
+
+
+class ValuesProjection:
+    """
+    Salt okunur liste cevapları için serializer'ın `values()` karşılığı.
+    Serializer ağacından okunacak kolonlar çıkarılır; satırlar model nesnesi
+    oluşturulmadan, ilişkiler JOIN'li kolonlardan iç içe sözlük olarak
+    kurulur. Alan formatlaması serializer alanlarının `to_representation`'ı
+    ile yapıldığı için çıktı serializer'ınkiyle birebir aynıdır.
+
+    Kolona karşılık gelmeyen alan (metot, bağımlılığı bildirilmemiş property,
+    çoklu ilişki) içeren serializer'lar desteklenmez; `for_serializer` None döner ve view normal
+    serializer'a düşer.
+    """
+    _cache = {}
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.columns = []
+        self.plan = self.build(serializer, prefix='')
+        self.pk_column = self.model._meta.pk.name
+        if self.pk_column not in self.columns:
+            self.columns.append(self.pk_column)
+
+    @classmethod
+    def for_serializer(cls, serializer_class, **serializer_kwargs):
+        if not getattr(settings, 'FAST_LIST_SERIALIZATION', True):
+            return None
+        if serializer_kwargs:
+            # ?fields=/?expand= ile budanmış serializer; isteğe özel, önbelleğe alınmaz
+            try:
+                return cls(serializer_class(**serializer_kwargs))
+            except ProjectionNotSupported:
+                return None
+        if serializer_class not in cls._cache:
+            try:
+                cls._cache[serializer_class] = cls(serializer_class())
+            except ProjectionNotSupported:
+                cls._cache[serializer_class] = None
+        return cls._cache[serializer_class]
+
+    def column(self, path):
+        if path not in self.columns:
+            self.columns.append(path)
+        return path
+
+    def build(self, serializer, prefix):
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        if model is None:
+            raise ProjectionNotSupported(type(serializer).__name__)
+
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' or '.' in field.source:
+                raise ProjectionNotSupported(name)
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                plan.append((name, None, self.build_computed(serializer, model, field, prefix)))
+                continue
+            if model_field.many_to_many or model_field.one_to_many or model_field.one_to_one and model_field.auto_created:
+                raise ProjectionNotSupported(name)
+
+            path = self.column(f'{prefix}{field.source}')
+            if isinstance(field, serializers.BaseSerializer):
+                if isinstance(field, serializers.ListSerializer):
+                    raise ProjectionNotSupported(name)
+                plan.append((name, path, self.build(field, f'{path}__')))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                # values() FK kolonunda zaten id'yi döner
+                plan.append((name, path, None))
+            elif isinstance(field, serializers.RelatedField):
+                raise ProjectionNotSupported(name)
+            else:
+                convert = IDENTITY_FIELDS.get(type(field), field.to_representation)
+                plan.append((name, path, convert))
+        return plan
+
+    def build_computed(self, serializer, model, field, prefix):
+        """
+        Model property'si: serializer `projection_columns` ile hangi kolonlara
+        baktığını bildirmişse property kolon değerleriyle çalıştırılır.
+        """
+        depends = getattr(serializer, 'projection_columns', {}).get(field.source)
+        prop = getattr(model, field.source, None)
+        if depends is None or not isinstance(prop, property):
+            raise ProjectionNotSupported(field.field_name)
+        paths = [self.column(f'{prefix}{name}') for name in depends]
+        fget, convert = prop.fget, field.to_representation
+
+        def computed(row):
+            value = fget(SimpleNamespace(**{name: row[path] for name, path in zip(depends, paths)}))
+            return None if value is None else convert(value)
+        return computed
+
+    def apply(self, queryset):
+        """Sorguyu values() sorgusuna çevirir; sıralama kolonları cursor sayfalama için eklenir."""
+        ordering = []
+        for key in queryset.query.order_by:
+            if isinstance(key, str) and key.lstrip('-') != '?':
+                key = key.lstrip('-')
+                ordering.append(self.pk_column if key == 'pk' else key)
+        columns = list(dict.fromkeys(self.columns + ordering))
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def represent(self, row, plan):
+        data = {}
+        for name, path, convert in plan:
+            if path is None:
+                data[name] = convert(row)
+                continue
+            value = row[path]
+            if value is None:
+                data[name] = None
+            elif convert is None:
+                data[name] = value
+            elif isinstance(convert, list):
+                data[name] = self.represent(row, convert)
+            else:
+                data[name] = convert(value)
+        return data
+
+    def to_representation(self, rows):
+        plan = self.plan
+        return [self.represent(row, plan) for row in rows]
+
+
+def serialize_list(queryset, serializer_class, **serializer_kwargs):
+    """Listeyi projeksiyonla (destekleniyorsa) ya da serializer ile üretir."""
+    projection = ValuesProjection.for_serializer(serializer_class, **serializer_kwargs)
+    if projection is None:
+        return serializer_class(queryset, many=True, **serializer_kwargs).data
+    return projection.to_representation(projection.apply(queryset))
+
+
+def paginated_response(paginator, queryset, request, serializer_class, etag=None, **serializer_kwargs):
+    """
+    `serialize_list`'in sayfalı hali; cevap paginator'ın formatındadır.
+    `etag(paginator, rows)` verilirse sayfa satırları okunduktan sonra ETag
+    üretilir; istemcideki sürüm güncelse serialize edilmeden 304 döner.
+    """
+    projection = ValuesProjection.for_serializer(serializer_class, **serializer_kwargs)
+    if projection is None:
+        page = paginator.paginate_queryset(queryset, request)
+    else:
+        rows = projection.apply(queryset)
+        # values() ilişkili kolonlar için JOIN'leri sorguya ekler; sayfa numaralı
+        # moddaki COUNT(*) JOIN'siz asıl sorgudan alınır
+        rows.count = queryset.count
+        page = paginator.paginate_queryset(rows, request)
+
+    tag = etag(paginator, page) if etag is not None else None
+    if tag is not None:
+        response = not_modified(request, tag)
+        if response is not None:
+            return response
+
+    if projection is None:
+        data = serializer_class(page, many=True, **serializer_kwargs).data
+    else:
+        data = projection.to_representation(page)
+    response = paginator.get_paginated_response(data)
+    return with_etag(response, tag) if tag is not None else response
@@ -0,0 +1,129 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .tracking import FieldTracker
+
+# Formlarda kullanılan referans listeleri (şantiye, grup, şirket, müşteri).
+REFERENCE_LISTS = ('worksite', 'group', 'company', 'customer')
+# Listelerde created_by olarak dönen kullanıcı kolonları (core UserSerializer: username, email)
+REFERENCE_USER_FIELDS = ('first_name', 'last_name', 'email')
+DATA_TIMEOUT = 24 * 60 * 60
+# Önbelleğe alınan listeye girmeyip her istekte veritabanından eklenen alanların
+# versiyonu. Müşteri bakiyesi her fatura yazmasında değişir; listenin tamamını
+# yeniden kurmak yerine sadece bakiyeler okunur (bkz. core/balances.py).
+LIVE_VERSIONS = {'customer': 'customer_balance'}
+
+
+reference_user_tracker = FieldTracker('reference_user', REFERENCE_USER_FIELDS)
+
+
+def version_key(name):
+    return f'refdata:{name}:version'
+
+
+def get_version(name):
+    """
+    Listenin güncel versiyonu; değişiklik zamanı (mikrosaniye) olarak tutulur,
+    Last-Modified da buradan üretilir.
+    """
+    version = cache.get(version_key(name))
+    if version is None:
+        version = time.time_ns() // 1000
+        # Aynı anda başka bir worker yazdıysa onunki geçerli
+        if not cache.add(version_key(name), version, None):
+            version = cache.get(version_key(name), version)
+    return version
+
+
+async def aget_version(name):
+    """get_version'ın async hali (async view'lar için)."""
+    version = await cache.aget(version_key(name))
+    if version is None:
+        version = time.time_ns() // 1000
+        if not await cache.aadd(version_key(name), version, None):
+            version = await cache.aget(version_key(name), version)
+    return version
+
+
+def reference_versions():
+    """Tüm referans listelerinin versiyonları; bu listeleri iç içe döndüren cevapların ETag'i için."""
+    return tuple(get_version(name) for name in (*REFERENCE_LISTS, *LIVE_VERSIONS.values()))
+
+
+def list_versions(name):
+    """
+    Listenin (veri, ETag) versiyonları. Canlı alanı olan listelerde ETag
+    versiyonu iki versiyondan büyüğüdür; diğerlerinde ikisi aynıdır.
+    """
+    version = get_version(name)
+    live = LIVE_VERSIONS.get(name)
+    return version, max(version, get_version(live)) if live else version
+
+
+async def alist_versions(name):
+    """list_versions'ın async hali."""
+    version = await aget_version(name)
+    live = LIVE_VERSIONS.get(name)
+    return version, max(version, await aget_version(live)) if live else version
+
+
+def bump_version(*names):
+    """
+    Listeleri geçersiz kılar. Transaction içindeyse commit sonrasına ertelenir;
+    aksi halde commit'ten önce gelen bir istek eski veriyi yeni versiyonla saklayabilir.
+    """
+    def bump():
+        version = time.time_ns() // 1000
+        cache.set_many({version_key(name): version for name in names}, None)
+    transaction.on_commit(bump)
+
+
+def data_key(name, version):
+    return f'refdata:{name}:{version}'
+
+
+def list_validators(request, name, version):
+    """
+    Listenin ETag'i ve Last-Modified zamanı; istemcinin elindeki sürüm
+    güncelse üçüncü değer 304 cevabıdır, değilse None.
+    """
+    etag = quote_etag(f'{name}-{version}')
+    last_modified = version // 1_000_000
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        not_modified['Last-Modified'] = http_date(last_modified)
+    return etag, last_modified, not_modified
+
+
+def set_list_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Tarayıcı saklayabilir ama her seferinde ETag ile doğrulamalı
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cached_list_response(request, name, build, live=None):
+    """
+    `build()` sonucunu versiyon anahtarıyla önbellekte tutar, ETag/Last-Modified
+    ekler. İstemcinin elindeki sürüm güncelse veritabanına gitmeden 304 döner.
+    `live(data)` verilirse önbellekten gelen listeye canlı alanları ekler.
+    """
+    version, etag_version = list_versions(name)
+    etag, last_modified, not_modified = list_validators(request, name, etag_version)
+    if not_modified is not None:
+        return not_modified
+
+    data = cache.get(data_key(name, version))
+    if data is None:
+        data = build()
+        cache.set(data_key(name, version), data, DATA_TIMEOUT)
+    if live is not None:
+        data = live(data)
+    return set_list_headers(Response(data), etag, last_modified)
@@ -0,0 +1,157 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DateField, F, Sum, Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import PaymenInvoice, PaymenInvoiceMonthlyRollup
+from .tracking import FieldTracker
+
+ROLLUP_DIMENSIONS = ('customer_id', 'worksite_id', 'group_id', 'company_id')
+ROLLUP_AMOUNTS = ('debt', 'receivable', 'tax_amount', 'withholding_amount')
+# Özet anahtarı: (ay, müşteri, şantiye, grup, şirket); değer: tutarlar + satır sayısı
+ROLLUP_KEY = ('month',) + ROLLUP_DIMENSIONS
+ROLLUP_VALUES = ROLLUP_AMOUNTS + ('row_count',)
+BATCH_SIZE = 1000
+
+rollup_tracker = FieldTracker('rollup', ('date',) + ROLLUP_DIMENSIONS + ROLLUP_AMOUNTS)
+
+# deferred_rollup_updates() bloğu içindeyse biriken {anahtar: [değerler]} sözlüğü
+_deferred_deltas = ContextVar('deferred_rollup_deltas', default=None)
+
+
+def rollup_month(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+def add_rollup_state(deltas, state, sign):
+    date, *values = state
+    key = (rollup_month(date),) + tuple(values[:len(ROLLUP_DIMENSIONS)])
+    row = deltas.setdefault(key, [Decimal(0)] * len(ROLLUP_AMOUNTS) + [0])
+    for index, amount in enumerate(values[len(ROLLUP_DIMENSIONS):]):
+        row[index] += sign * (amount or Decimal(0))
+    row[-1] += sign
+
+
+def rollup_state_deltas(old, new):
+    """Eski ve yeni durum arasındaki farkı özet satırı bazında döner; sıfır farklar atılır."""
+    deltas = {}
+    if old is not None:
+        add_rollup_state(deltas, old, -1)
+    if new is not None:
+        add_rollup_state(deltas, new, 1)
+    return {key: values for key, values in deltas.items() if any(values)}
+
+
+def collect_rollup_deltas(invoices):
+    deltas = {}
+    for invoice in invoices:
+        add_rollup_state(deltas, rollup_tracker.current(invoice), 1)
+    return deltas
+
+
+def merge_rollup_deltas(target, deltas):
+    for key, values in deltas.items():
+        row = target.setdefault(key, [Decimal(0)] * len(ROLLUP_AMOUNTS) + [0])
+        for index, value in enumerate(values):
+            row[index] += value
+    return target
+
+
+def apply_rollup_delta(key, values):
+    lookup = dict(zip(ROLLUP_KEY, key))
+    changes = {name: F(name) + value for name, value in zip(ROLLUP_VALUES, values)}
+    rollups = PaymenInvoiceMonthlyRollup.objects.filter(**lookup)
+    if rollups.update(**changes):
+        return
+    # Satır yoksa ve kayıt düşülüyorsa (ör. cascade ile özet zaten silindi) yapılacak bir şey yok.
+    if values[-1] <= 0:
+        return
+    try:
+        with transaction.atomic():
+            PaymenInvoiceMonthlyRollup.objects.create(**lookup, **dict(zip(ROLLUP_VALUES, values)))
+    except IntegrityError:
+        # Aynı anda başka bir istek satırı oluşturdu
+        rollups.update(**changes)
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Özet satırlarını F-ifadeli UPDATE ile günceller, yoksa oluşturur.
+    deferred_rollup_updates() içinde çağrılırsa sadece biriktirir.
+    """
+    pending = _deferred_deltas.get()
+    if pending is not None:
+        merge_rollup_deltas(pending, deltas)
+        return
+    for key, values in deltas.items():
+        apply_rollup_delta(key, values)
+
+
+@contextmanager
+def deferred_rollup_updates():
+    """Toplu işlemlerde özet güncellemelerini biriktirip satır başına tek sorguyla uygular."""
+    if _deferred_deltas.get() is not None:
+        yield
+        return
+    deltas = {}
+    token = _deferred_deltas.set(deltas)
+    try:
+        yield
+    finally:
+        _deferred_deltas.reset(token)
+    apply_rollup_deltas({key: values for key, values in deltas.items() if any(values)})
+
+
+def aggregate_rollups(invoices):
+    """Fatura sorgusundan tek GROUP BY ile özet satırlarını (dict) üretir."""
+    rows = (
+        invoices.order_by()
+        .annotate(rollup_month=TruncMonth('date', output_field=DateField()))
+        .values('rollup_month', *ROLLUP_DIMENSIONS)
+        .annotate(
+            total_debt=Sum('debt'),
+            total_receivable=Sum('receivable'),
+            total_tax_amount=Sum('tax_amount'),
+            total_withholding_amount=Sum('withholding_amount'),
+            total_row_count=Count('id'),
+        )
+    )
+    for row in rows.iterator():
+        values = {'month': row['rollup_month']}
+        values.update({name: row[name] for name in ROLLUP_DIMENSIONS})
+        values.update({name: row[f'total_{name}'] or Decimal(0) for name in ROLLUP_VALUES})
+        yield values
+
+
+def rebuild_rollups(since=None):
+    """
+    Özet tablosunu faturalardan yeniden üretir. `since` (date) verilirse
+    sadece o ayın başından sonraki aylar silinip yeniden hesaplanır.
+    """
+    rollups = PaymenInvoiceMonthlyRollup.objects.all()
+    invoices = PaymenInvoice.objects.all()
+    if since is not None:
+        since = since.replace(day=1)
+        rollups = rollups.filter(month__gte=since)
+        invoices = invoices.filter(date__gte=timezone.make_aware(datetime.combine(since, time.min)))
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for values in aggregate_rollups(invoices):
+            batch.append(PaymenInvoiceMonthlyRollup(**values))
+            if len(batch) >= BATCH_SIZE:
+                PaymenInvoiceMonthlyRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        PaymenInvoiceMonthlyRollup.objects.bulk_create(batch)
+        created += len(batch)
+    return created
@@ -0,0 +1,120 @@
+import re
+
+from django.db import models
+from django.db.models import Q
+from django.db.models.lookups import Contains
+
+# Türkçe büyük/küçük harf dönüşümü: Python'un lower() fonksiyonu 'I' -> 'i'
+# ve 'İ' -> 'i̇' yaptığı için önce bu iki harf elle çevrilir.
+TURKISH_CASEFOLD = str.maketrans({'I': 'ı', 'İ': 'i'})
+WHITESPACE = re.compile(r'\s+')
+
+# MySQL ngram parser'ının varsayılan ngram_token_size değeri.
+NGRAM_TOKEN_SIZE = 2
+
+
+def normalize_search(value):
+    if value is None:
+        return ''
+    value = str(value).translate(TURKISH_CASEFOLD).lower()
+    return WHITESPACE.sub(' ', value).strip()
+
+
+class SearchField(models.CharField):
+    """
+    Kaynak alanın normalize edilmiş kopyasını tutan kolon. Değeri
+    `update_search_fields` doldurur, formlarda/serializer'larda görünmez.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', 255)
+        kwargs.setdefault('default', '')
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+
+class SearchFieldsModel(models.Model):
+    """
+    Arama kolonu olan modellerin tabanı. Kolonlar pre_save'de kaynak
+    alanlardan üretilir (core/signals.py); `save(update_fields=[...])`
+    kaynak alanı içeriyorsa arama kolonu da yazılsın diye listeye eklenir.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is not None:
+            update_fields = with_search_fields(self._meta.model_name, update_fields)
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+@SearchField.register_lookup
+class NgramSearch(Contains):
+    """
+    `alan__search=terim`: MySQL'de ngram FULLTEXT indeksini MATCH ile kullanır,
+    sonucu LIKE ile kesinleştirir. Diğer veritabanlarında düz `contains`.
+    Terim önceden `normalize_search` ile normalize edilmiş olmalıdır.
+    """
+    lookup_name = 'search'
+
+    def get_rhs_op(self, connection, rhs):
+        return connection.operators['contains'] % rhs
+
+    def as_mysql(self, compiler, connection):
+        like_sql, like_params = super().as_sql(compiler, connection)
+        term = self.rhs.replace('"', ' ').strip()
+        if len(term) < NGRAM_TOKEN_SIZE:
+            return like_sql, like_params
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        return (
+            f'MATCH ({lhs_sql}) AGAINST (%s IN BOOLEAN MODE) AND {like_sql}',
+            (*lhs_params, f'"{term}"', *like_params),
+        )
+
+
+# Model adı -> {arama kolonu: kaynak alan}
+SEARCH_FIELDS = {
+    'worksite': {'search_name': 'name'},
+    'group': {'search_name': 'name'},
+    'company': {'search_name': 'name'},
+    'customer': {'search_name': 'name'},
+    'paymeninvoice': {
+        'bank_search': 'bank',
+        'check_no_search': 'check_no',
+        'material_search': 'material',
+    },
+}
+
+# Liste ekranlarındaki filtre parametresi -> PaymenInvoice üzerinden arama kolonu
+SEARCH_FILTERS = {
+    'worksite': 'worksite__search_name',
+    'group': 'group__search_name',
+    'company': 'company__search_name',
+    'customer': 'customer__search_name',
+    'bank': 'bank_search',
+    'check_no': 'check_no_search',
+    'material': 'material_search',
+}
+
+
+def update_search_fields(instance):
+    for search_field, source in SEARCH_FIELDS.get(instance._meta.model_name, {}).items():
+        setattr(instance, search_field, normalize_search(getattr(instance, source)))
+
+
+def with_search_fields(model_name, update_fields):
+    """update_fields'e, kaynak alanı listede olan arama kolonlarını ekler."""
+    update_fields = set(update_fields)
+    for search_field, source in SEARCH_FIELDS.get(model_name, {}).items():
+        if source in update_fields:
+            update_fields.add(search_field)
+    return update_fields
+
+
+def search_q(name, value):
+    term = normalize_search(value)
+    if not term:
+        return Q()
+    return Q(**{f'{SEARCH_FILTERS[name]}__search': term})
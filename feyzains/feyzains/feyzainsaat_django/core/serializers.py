@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import *
+from .sparse import SparseFieldsMixin
 
 class SnippetSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,39 +8,48 @@ class SnippetSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # User.username property'sinin kolonları (core/projection.py)
+    projection_columns = {'username': ('first_name', 'last_name')}
+
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
 
-class WorksiteSerializer(serializers.ModelSerializer):
+class WorksiteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
 
 
     class Meta:
         model = Worksite
-        fields = '__all__'
+        exclude = ['search_name']
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
 
     class Meta:
         model = Group
-        fields = '__all__'
+        exclude = ['search_name']
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
 
     class Meta:
         model = Company
-        fields = '__all__'
+        exclude = ['search_name']
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
 
     class Meta:
         model = Customer
-        fields = '__all__'
+        exclude = ['search_name']
+
+
+class CustomerListSerializer(CustomerSerializer):
+    # Önbellekteki müşteri listesi; bakiye her istekte ayrıca eklenir (core/balances.py)
+    class Meta(CustomerSerializer.Meta):
+        exclude = ['search_name', 'balance', 'balance_status']
 
 class TaxSerializer(serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
@@ -93,16 +103,16 @@ class PersonalSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class PaymenInvoiceSerializer(serializers.ModelSerializer):
+class PaymenInvoiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     
 
     class Meta:
         model = PaymenInvoice
-        fields = '__all__'
+        exclude = ['bank_search', 'check_no_search', 'material_search']
     
 
-class PaymenInvoiceReadSerializer(serializers.ModelSerializer):
+class PaymenInvoiceReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     worksite = WorksiteSerializer()
     group = GroupSerializer()
@@ -111,5 +121,32 @@ class PaymenInvoiceReadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PaymenInvoice
-        fields = '__all__'
-        
\ No newline at end of file
+        exclude = ['bank_search', 'check_no_search', 'material_search']
+        
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    İlişkili kaydı context['related_cache'][model] sözlüğünden alır; toplu
+    işlemlerde her satır için ayrı sorgu atılmaz. Önbellek yoksa normal davranır.
+    """
+
+    def to_internal_value(self, data):
+        cache = self.context.get('related_cache', {}).get(self.get_queryset().model)
+        if cache is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            obj = cache.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class PaymenInvoiceBulkSerializer(PaymenInvoiceSerializer):
+    serializer_related_field = CachedPrimaryKeyRelatedField
+
+    class Meta(PaymenInvoiceSerializer.Meta):
+        pass
@@ -1,70 +1,106 @@
 # signals.py
-from decimal import Decimal
-from django.db.models.signals import post_save, pre_save, post_delete
+from django.db.models.signals import post_init, post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import PaymenInvoice, Customer
+from .balances import apply_balance_change, balance_tracker
+from .rollups import apply_rollup_deltas, rollup_state_deltas, rollup_tracker
+from .models import PaymenInvoice, Customer, Worksite, Group, Company
+from .search import update_search_fields
+from .reference_cache import REFERENCE_LISTS, bump_version, reference_user_tracker
+from accounts.models import User
 
 print("Signals loaded")
 
+@receiver(post_init, sender=PaymenInvoice)
+def paymeninvoice_post_init(sender, instance, **kwargs):
+    """
+    Veritabanından okunan kaydın bakiyeyi ve aylık özeti etkileyen alanlarını saklar; böylece
+    güncellemede eski kaydı tekrar okumaya gerek kalmaz.
+    """
+    balance_tracker.remember(instance)
+    rollup_tracker.remember(instance)
+
 @receiver(pre_save, sender=PaymenInvoice)
 def paymeninvoice_pre_save(sender, instance, **kwargs):
     """
-    Fatura güncellenirken, instance.id varsa (yani var olan bir kayıtsa),
-    önce eski kaydı alıp eski bakiyeden bu eski farkı düşeceğiz.
+    Kayıt post_init'te yakalanamadıysa (ör. alanları defer edilmiş ya da elle
+    oluşturulmuş instance) eski değerleri tek bir hafif sorguyla alır.
     """
-    if instance.pk:
-        try:
-            old_invoice = PaymenInvoice.objects.get(pk=instance.pk)
-        except PaymenInvoice.DoesNotExist:
-            return  # Yoksa bir şey yapma
-        old_difference = (old_invoice.debt or Decimal(0)) - (old_invoice.receivable or Decimal(0))
-        customer = old_invoice.customer
-        # Eski farkı müşterinin bakiyesinden çıkar
-        customer.balance = (customer.balance or Decimal(0)) - old_difference
-        # Balance status’u güncelle
-        if customer.balance > 0:
-            customer.balance_status = 'B'
-        elif customer.balance < 0:
-            customer.balance_status = 'A'
-        else:
-            customer.balance_status = '0'
-        customer.save()
+    if instance._state.adding:
+        return
+    for tracker in (balance_tracker, rollup_tracker):
+        if tracker.get(instance) is None:
+            tracker.load(instance)
 
 @receiver(post_save, sender=PaymenInvoice)
-def paymeninvoice_post_save(sender, instance, created, **kwargs):
+def paymeninvoice_post_save(sender, instance, created, update_fields=None, **kwargs):
     """
-    Yeni fatura eklendiğinde veya güncellendiğinde, instance'daki (debt - receivable)
-    değerini müşterinin bakiyesine ekle.
+    Eski ve yeni (debt - receivable) farkını müşteri bakiyesine atomik UPDATE ile uygular.
+    Müşteri değiştiyse eski müşteriden düşülür, yenisine eklenir. Aylık özet
+    tablosu da aynı şekilde farkla güncellenir.
     """
-    new_difference = (instance.debt or Decimal(0)) - (instance.receivable or Decimal(0))
-    customer = instance.customer
-    customer.balance = (customer.balance or Decimal(0)) + new_difference
-
-    # Balance durumunu güncelle
-    if customer.balance > 0:
-        customer.balance_status = 'B'
-    elif customer.balance < 0:
-        customer.balance_status = 'A'
-    else:
-        customer.balance_status = '0'
+    old = None if created else balance_tracker.get(instance)
+    new = balance_tracker.saved(instance, old, update_fields)
+    apply_balance_change(old, new)
+    balance_tracker.set(instance, new)
 
-    customer.save()
+    old = None if created else rollup_tracker.get(instance)
+    new = rollup_tracker.saved(instance, old, update_fields)
+    apply_rollup_deltas(rollup_state_deltas(old, new))
+    rollup_tracker.set(instance, new)
 
 @receiver(post_delete, sender=PaymenInvoice)
 def paymeninvoice_post_delete(sender, instance, **kwargs):
     """
-    Fatura silindiğinde, o faturanın (debt - receivable) değerini müşterinin bakiyesinden çıkar.
+    Fatura silindiğinde, o faturanın (debt - receivable) değerini müşterinin bakiyesinden
+    ve tutarlarını aylık özetten çıkar.
+    """
+    old = balance_tracker.get(instance) or balance_tracker.current(instance)
+    apply_balance_change(old, None)
+    old = rollup_tracker.get(instance) or rollup_tracker.current(instance)
+    apply_rollup_deltas(rollup_state_deltas(old, None))
+
+@receiver(pre_save, sender=Worksite)
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=Company)
+@receiver(pre_save, sender=Customer)
+@receiver(pre_save, sender=PaymenInvoice)
+def search_fields_pre_save(sender, instance, **kwargs):
+    """
+    Arama kolonlarını (search_name, bank_search, ...) kaynak alanlardan yeniden üretir.
     """
-    deleted_difference = (instance.debt or Decimal(0)) - (instance.receivable or Decimal(0))
-    customer = instance.customer
-    customer.balance = (customer.balance or Decimal(0)) - deleted_difference
+    update_search_fields(instance)
 
-    # Balance durumunu güncelle
-    if customer.balance > 0:
-        customer.balance_status = 'B'
-    elif customer.balance < 0:
-        customer.balance_status = 'A'
-    else:
-        customer.balance_status = '0'
 
-    customer.save()
+@receiver(post_save, sender=Worksite)
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Worksite)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Customer)
+def reference_list_changed(sender, instance, **kwargs):
+    """
+    Önbellekteki referans listesini (core/reference_cache.py) geçersiz kılar.
+    """
+    bump_version(sender._meta.model_name)
+
+
+@receiver(post_init, sender=User)
+def reference_user_post_init(sender, instance, **kwargs):
+    reference_user_tracker.remember(instance)
+
+
+@receiver(post_save, sender=User)
+def reference_list_user_changed(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Listelerde created_by olarak kullanıcının adı ve e-postası dönüyor; sadece
+    bunlar değiştiyse listeler geçersiz kılınır (last_login gibi alanlar değil).
+    """
+    if created:
+        return
+    old = reference_user_tracker.get(instance)
+    new = reference_user_tracker.saved(instance, old, update_fields)
+    reference_user_tracker.set(instance, new)
+    if old != new:
+        bump_version(*REFERENCE_LISTS)
@@ -0,0 +1,85 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+# ?fields=id,date,customer.name  -> sadece bu alanlar (noktalı alan ilişkiyi açar)
+# ?expand=customer,customer.created_by  -> ilişki iç içe nesne olarak döner
+FIELDS_QUERY_PARAM = 'fields'
+EXPAND_QUERY_PARAM = 'expand'
+
+
+def split_param(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def sparse_params(request):
+    """
+    İstekteki ?fields= / ?expand= değerlerini serializer argümanlarına
+    çevirir. İkisi de yoksa boş sözlük döner ve cevap eskisi gibi kalır.
+    """
+    params = {}
+    for name in (FIELDS_QUERY_PARAM, EXPAND_QUERY_PARAM):
+        value = request.query_params.get(name)
+        if value is not None:
+            params[name] = split_param(value)
+    return params
+
+
+def group_dotted(names):
+    """['id', 'customer.name', 'customer.created_by.email'] -> ({'id', 'customer'}, {'customer': [...]})"""
+    top, nested = [], {}
+    for name in names:
+        head, _, rest = name.partition('.')
+        if head not in top:
+            top.append(head)
+        if rest:
+            nested.setdefault(head, []).append(rest)
+    return top, nested
+
+
+class SparseFieldsMixin:
+    """
+    `fields` ve `expand` argümanlarıyla serializer'ı budar. İkisinden biri
+    verilince serializer "sparse" moda geçer: listede olmayan alanlar
+    çıkarılır, açılmayan ilişkiler id olarak döner (her seviyede). Hiçbiri
+    verilmezse serializer hiç değişmez.
+
+    EagerLoader sparse serializer için sorguya `only()` projeksiyonu da ekler,
+    böylece kullanılmayan kolonlar veritabanından da okunmaz.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse = fields is not None or expand is not None
+        if not self.sparse:
+            return
+
+        selected, nested_fields = group_dotted(fields) if fields is not None else (None, {})
+        expanded, nested_expand = group_dotted(expand or [])
+        expanded = set(expanded) | set(nested_fields)
+
+        unknown = [name for name in (selected or []) + sorted(expanded) if name not in self.fields]
+        if unknown:
+            raise ValidationError({'fields': [f"Bilinmeyen alan: {', '.join(unknown)}"]})
+
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+        for name, field in list(self.fields.items()):
+            if not isinstance(field, serializers.BaseSerializer):
+                continue
+            if name not in expanded:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, many=isinstance(field, serializers.ListSerializer),
+                    source=field.source if field.source != name else None,
+                )
+            elif isinstance(field, SparseFieldsMixin) and not isinstance(field, serializers.ListSerializer):
+                self.fields[name] = type(field)(
+                    *field._args,
+                    fields=nested_fields.get(name),
+                    expand=nested_expand.get(name, []),
+                    **field._kwargs,
+                )
+            elif name in nested_fields or name in nested_expand:
+                raise ValidationError({'fields': [f'{name} alanı budanamaz.']})
@@ -0,0 +1,132 @@
+import json
+from base64 import b64decode, b64encode
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import DecimalField, F, Q, Sum, Value, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from .balances import invoice_difference
+from .models import PaymenInvoice
+
+# Ekstre satırlarında dönen alanlar; values() ile okunur, model nesnesi üretilmez.
+STATEMENT_FIELDS = (
+    'id', 'date', 'type', 'invoice_no', 'bank', 'check_no', 'check_time', 'material',
+    'debt', 'receivable', 'worksite__name', 'group__name', 'company__name',
+)
+AMOUNT = DecimalField(max_digits=20, decimal_places=2)
+ZERO = Value(Decimal(0), output_field=AMOUNT)
+DATETIME = serializers.DateTimeField()
+
+
+class InvalidStatementCursor(Exception):
+    pass
+
+
+def customer_invoices(customer_id, start=None, end=None):
+    invoices = PaymenInvoice.objects.filter(customer_id=customer_id)
+    if start is not None:
+        invoices = invoices.filter(date__gte=start)
+    if end is not None:
+        invoices = invoices.filter(date__lte=end)
+    return invoices
+
+
+def opening_balance(customer_id, start):
+    """`start` öncesindeki hareketlerin toplamı (devir bakiyesi)."""
+    if start is None:
+        return Decimal(0)
+    totals = PaymenInvoice.objects.filter(customer_id=customer_id, date__lt=start).aggregate(
+        debt=Sum('debt'), receivable=Sum('receivable'),
+    )
+    return invoice_difference(totals['debt'], totals['receivable'])
+
+
+def period_totals(customer_id, start=None, end=None):
+    totals = customer_invoices(customer_id, start, end).aggregate(
+        debt=Sum('debt'), receivable=Sum('receivable'),
+    )
+    return totals['debt'] or Decimal(0), totals['receivable'] or Decimal(0)
+
+
+def statement_rows(customer_id, start=None, end=None, position=None, carried=Decimal(0), limit=100):
+    """
+    (date, id) sırasıyla ekstre satırları. Yürüyen bakiye veritabanında
+    pencere fonksiyonu ile hesaplanır ve sayfa başındaki `carried` bakiyeye
+    eklenir (ilk sayfada devir, sonrakilerde cursor'daki bakiye).
+    `position` verilirse o satırdan sonrası okunur. `limit + 1` satır döner.
+    """
+    invoices = customer_invoices(customer_id, start, end)
+    if position is not None:
+        invoices = invoices.filter(
+            Q(date__gt=position['date']) | Q(date=position['date'], id__gt=position['id'])
+        )
+
+    movement = Coalesce('debt', ZERO) - Coalesce('receivable', ZERO)
+    rows = (
+        invoices.annotate(running=Window(
+            Sum(movement, output_field=AMOUNT),
+            order_by=[F('date').asc(), F('id').asc()],
+            frame=RowRange(start=None, end=0),
+        ))
+        .order_by('date', 'id')
+        .values(*STATEMENT_FIELDS, 'running')[:limit + 1]
+    )
+    for row in rows:
+        # Serializer'lardaki DecimalField çıktısı gibi string döner
+        row['balance'] = f"{carried + row.pop('running'):.2f}"
+        for name in ('debt', 'receivable'):
+            if row[name] is not None:
+                row[name] = f'{row[name]:.2f}'
+        for name in ('date', 'check_time'):
+            row[name] = DATETIME.to_representation(row[name]) if row[name] else None
+        yield row
+
+
+def previous_cursor(customer_id, start, end, first, carried, limit=100):
+    """
+    `first` satırıyla başlayan sayfadan bir önceki sayfanın cursor'ı. Önceki
+    sayfanın satırları geriye doğru okunur ve hareketleri sayfa başındaki
+    `carried` bakiyeden düşülür. Önceki sayfa ilk sayfaysa '' (cursor'suz),
+    öncesinde satır yoksa None döner.
+    """
+    first_date = parse_datetime(first['date'])
+    rows = list(
+        customer_invoices(customer_id, start, end)
+        .filter(Q(date__lt=first_date) | Q(date=first_date, id__lt=first['id']))
+        .order_by('-date', '-id')
+        .values('id', 'date', 'debt', 'receivable')[:limit + 1]
+    )
+    if not rows:
+        return None
+    if len(rows) <= limit:
+        return ''
+    balance = carried - sum(invoice_difference(row['debt'], row['receivable']) for row in rows[:limit])
+    before = rows[limit]
+    return encode_position({
+        'date': DATETIME.to_representation(before['date']),
+        'id': before['id'],
+        'balance': f'{balance:.2f}',
+    })
+
+
+def encode_position(row):
+    payload = {'d': row['date'], 'id': row['id'], 'b': row['balance']}
+    return b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_position(cursor):
+    try:
+        payload = json.loads(b64decode(cursor.encode()).decode())
+        position = {
+            'date': parse_datetime(payload['d']),
+            'id': int(payload['id']),
+            'balance': Decimal(payload['b']),
+        }
+    except (TypeError, ValueError, KeyError, InvalidOperation):
+        raise InvalidStatementCursor()
+    if position['date'] is None:
+        raise InvalidStatementCursor()
+    return position
@@ -1,3 +1,970 @@
-from django.test import TestCase
+import json
+import re
+from base64 import b64encode
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
 
-# Create your tests here.
+from io import BytesIO, StringIO
+from zoneinfo import ZoneInfo
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from auditlog.context import set_actor
+from auditlog.models import LogEntry
+from openpyxl import Workbook
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import update_last_login
+from django.core.management import call_command
+from django.db import connection, models, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from feyzainsaat_django import renderers
+from feyzainsaat_django.renderers import FastJSONRenderer
+from .balances import deferred_balance_updates
+from .importer import ExcelImportError, PaymenInvoiceImporter
+from .maturities import MAX_CALENDAR_DAYS
+from .reference_cache import get_version, reference_versions
+from .rollups import ROLLUP_KEY, ROLLUP_VALUES, aggregate_rollups
+from .search import normalize_search, search_q
+from .models import *
+
+
+class PaymenInvoiceQueryPlanTests(TestCase):
+    """
+    Ana liste uçlarının attığı sorgulara EXPLAIN uygular; core_paymeninvoice
+    tablosu indekssiz (full table scan) okunursa test başarısız olur.
+    """
+    table = PaymenInvoice._meta.db_table
+
+    # Uç -> ana liste sorgusunun kullanması gereken indeks
+    endpoints = [
+        ('/core/checklist/', 'paymeninv_check_time_idx'),
+        ('/core/checklist/?start_date=2025-01-01&end_date=2025-02-01', 'paymeninv_check_time_idx'),
+        ('/core/checklist/?cursor=', 'paymeninv_check_time_idx'),
+        ('/core/checklist/calendar/?start_date=2025-01-01&end_date=2025-12-31', 'paymeninv_check_time_idx'),
+        ('/core/checklist/calendar/?start_date=2025-01-01&end_date=2025-12-31&bank=ziraat', 'paymeninv_check_time_idx'),
+        ('/core/search_page/', 'paymeninv_date_idx'),
+        ('/core/search_page/?cursor=', 'paymeninv_date_idx'),
+        ('/core/search_page/?start_date=2025-01-01&end_date=2025-02-01', 'paymeninv_check_time_idx'),
+        ('/core/payment_entry/?type=payment', 'paymeninv_type_date_idx'),
+        ('/core/payment_entry/?type=payment&cursor=', 'paymeninv_type_date_idx'),
+        ('/core/invoice/', 'paymeninv_type_date_idx'),
+        ('/core/invoice/?cursor=', 'paymeninv_type_date_idx'),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('plan@test.com', 'Plan', 'Test', 'secret')
+        worksite = Worksite.objects.create(name='Şantiye', created_by=cls.user)
+        group = Group.objects.create(name='Grup', created_by=cls.user)
+        company = Company.objects.create(name='Şirket', created_by=cls.user)
+        customer = Customer.objects.create(name='Müşteri', created_by=cls.user)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for i in range(30):
+            PaymenInvoice.objects.create(
+                date=start + timedelta(days=i),
+                worksite=worksite, group=group, company=company, customer=customer,
+                type='payment' if i % 2 else 'invoice',
+                debt=Decimal('100.00') if i % 2 else None,
+                receivable=None if i % 2 else Decimal('50.00'),
+                check_no=f'C{i}' if i % 3 == 0 else None,
+                check_time=start + timedelta(days=i) if i % 3 == 0 else None,
+                created_by=cls.user,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return [row[3] for row in cursor.fetchall()]
+            cursor.execute(f'EXPLAIN {sql}')
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def full_scans(self, plan):
+        if connection.vendor == 'sqlite':
+            return [step for step in plan if step.strip() == f'SCAN {self.table}']
+        if connection.vendor == 'mysql':
+            return [step for step in plan if step.get('table') == self.table and step.get('type') == 'ALL']
+        self.skipTest(f'{connection.vendor} için plan kontrolü yok')
+
+    def used_indexes(self, plan):
+        if connection.vendor == 'sqlite':
+            pattern = re.compile(rf'^(?:SCAN|SEARCH) {self.table} USING (?:COVERING )?INDEX (\w+)')
+            return {match[1] for step in plan if (match := pattern.match(step.strip()))}
+        return {step.get('key') for step in plan if step.get('table') == self.table}
+
+    def test_list_endpoints_do_not_scan_paymeninvoice(self):
+        for url, index in self.endpoints:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+                indexes = set()
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT') or self.table not in sql:
+                        continue
+                    plan = self.explain(sql)
+                    self.assertFalse(self.full_scans(plan), f'{url} full table scan yapıyor:\n{sql}\n{plan}')
+                    indexes |= self.used_indexes(plan)
+                self.assertIn(index, indexes, f'{url} beklenen indeksi kullanmıyor')
+
+
+class ReferenceDataMixin:
+    """Şantiye/grup/şirket ve müşterileri oluşturur; faturalar `invoice()` ile eklenir."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('test@test.com', 'Test', 'User', 'secret')
+        cls.worksite = Worksite.objects.create(name='Şantiye', created_by=cls.user)
+        cls.group = Group.objects.create(name='Grup', created_by=cls.user)
+        cls.company = Company.objects.create(name='Şirket', created_by=cls.user)
+        cls.customer_a = Customer.objects.create(name='Müşteri A', created_by=cls.user)
+        cls.customer_b = Customer.objects.create(name='Müşteri B', created_by=cls.user)
+        cls.customer_c = Customer.objects.create(name='Müşteri C', created_by=cls.user)
+
+    def invoice(self, customer, debt=None, receivable=None, **fields):
+        fields.setdefault('date', datetime(2025, 1, 15, tzinfo=timezone.utc))
+        for name in ('worksite', 'group', 'company'):
+            fields.setdefault(name, getattr(self, name))
+        return PaymenInvoice.objects.create(
+            customer=customer, debt=debt, receivable=receivable, created_by=self.user, **fields,
+        )
+
+    def assertBalancesMatchInvoices(self):
+        for customer in Customer.objects.all():
+            totals = PaymenInvoice.objects.filter(customer=customer).aggregate(
+                debt=models.Sum('debt'), receivable=models.Sum('receivable'),
+            )
+            expected = (totals['debt'] or Decimal(0)) - (totals['receivable'] or Decimal(0))
+            status = 'B' if expected > 0 else 'A' if expected < 0 else '0'
+            self.assertEqual((customer.balance, customer.balance_status), (expected, status), customer.name)
+
+    def assertRollupsMatchInvoices(self):
+        expected = {
+            tuple(row[name] for name in ROLLUP_KEY): tuple(row[name] for name in ROLLUP_VALUES)
+            for row in aggregate_rollups(PaymenInvoice.objects.all())
+        }
+        stored = {
+            tuple(row[name] for name in ROLLUP_KEY): tuple(row[name] for name in ROLLUP_VALUES)
+            for row in PaymenInvoiceMonthlyRollup.objects.filter(row_count__gt=0).values()
+        }
+        self.assertEqual(stored, expected)
+
+
+class IncrementalBalanceCheckTests(ReferenceDataMixin, TestCase):
+
+    def rebuild_incremental(self):
+        out = StringIO()
+        call_command('rebuild_balances', '--incremental', stdout=out)
+        return out.getvalue()
+
+    def test_incremental_check_sees_deleted_and_reassigned_invoices(self):
+        deleted = self.invoice(self.customer_a, debt=Decimal('100.00'))
+        moved = self.invoice(self.customer_b, debt=Decimal('40.00'))
+        self.invoice(self.customer_c, receivable=Decimal('10.00'))
+        self.assertIn('Tüm bakiyeler tutarlı.', self.rebuild_incremental())
+
+        # Bakiyeleri bozup sadece silme ve müşteri değişikliği yapıyoruz;
+        # A ve B'nin kalan faturalarının updated_date'i değişmiyor.
+        Customer.objects.filter(pk__in=[self.customer_a.pk, self.customer_b.pk]).update(balance=Decimal('999.00'))
+        deleted.delete()
+        moved.customer = self.customer_c
+        moved.save()
+
+        output = self.rebuild_incremental()
+        self.assertIn(f'#{self.customer_a.pk} ', output)
+        self.assertIn(f'#{self.customer_b.pk} ', output)
+
+    def test_incremental_check_sees_bulk_and_cascade_deletes(self):
+        self.invoice(self.customer_a, debt=Decimal('100.00'))
+        other_worksite = Worksite.objects.create(name='Diğer', created_by=self.user)
+        self.invoice(self.customer_b, debt=Decimal('40.00'), worksite=other_worksite)
+        self.assertIn('Tüm bakiyeler tutarlı.', self.rebuild_incremental())
+
+        Customer.objects.filter(pk__in=[self.customer_a.pk, self.customer_b.pk]).update(balance=Decimal('999.00'))
+        PaymenInvoice.objects.filter(customer=self.customer_a).delete()
+        other_worksite.delete()
+
+        output = self.rebuild_incremental()
+        self.assertIn(f'#{self.customer_a.pk} ', output)
+        self.assertIn(f'#{self.customer_b.pk} ', output)
+
+
+class CustomerBalanceTests(ReferenceDataMixin, TestCase):
+    """Bakiyeler her değişiklikten sonra SUM(debt) - SUM(receivable) ile aynı olmalı."""
+
+    def test_create_edit_and_delete(self):
+        first = self.invoice(self.customer_a, debt=Decimal('100.00'))
+        self.invoice(self.customer_a, receivable=Decimal('30.00'))
+        self.assertBalancesMatchInvoices()
+
+        # post_init'te saklanan eski değerler üzerinden fark uygulanır
+        invoice = PaymenInvoice.objects.get(pk=first.pk)
+        invoice.debt = Decimal('50.00')
+        invoice.receivable = Decimal('75.00')
+        invoice.save()
+        self.assertBalancesMatchInvoices()
+
+        PaymenInvoice.objects.get(pk=first.pk).delete()
+        self.assertBalancesMatchInvoices()
+
+    def test_reassign_customer(self):
+        invoice = self.invoice(self.customer_a, debt=Decimal('100.00'), receivable=Decimal('20.00'))
+        invoice.customer = self.customer_b
+        invoice.debt = Decimal('60.00')
+        invoice.save()
+        self.assertBalancesMatchInvoices()
+        self.assertEqual(Customer.objects.get(pk=self.customer_a.pk).balance, Decimal('0.00'))
+
+    def test_deferred_fields_and_update_fields(self):
+        invoice = self.invoice(self.customer_a, debt=Decimal('100.00'))
+
+        # Alanları defer edilmiş instance: eski değerler pre_save'de okunur
+        deferred = PaymenInvoice.objects.only('id', 'bank').get(pk=invoice.pk)
+        deferred.customer_id = self.customer_b.pk
+        deferred.save()
+        self.assertBalancesMatchInvoices()
+
+        # update_fields dışındaki değişiklik veritabanına yazılmaz, bakiyeye de yansımamalı
+        invoice = PaymenInvoice.objects.get(pk=invoice.pk)
+        invoice.debt = Decimal('10.00')
+        invoice.receivable = Decimal('500.00')
+        invoice.save(update_fields=['debt'])
+        self.assertBalancesMatchInvoices()
+
+    def test_queryset_and_cascade_delete(self):
+        other_worksite = Worksite.objects.create(name='Diğer', created_by=self.user)
+        for index in range(3):
+            self.invoice(self.customer_a, debt=Decimal('10.00') * (index + 1))
+            self.invoice(self.customer_b, receivable=Decimal('5.00'), worksite=other_worksite)
+        self.invoice(self.customer_b, debt=Decimal('7.00'))
+
+        PaymenInvoice.objects.filter(customer=self.customer_a, debt__lt=Decimal('30.00')).delete()
+        self.assertBalancesMatchInvoices()
+        other_worksite.delete()
+        self.assertBalancesMatchInvoices()
+
+    def test_deferred_batch_applies_once_per_customer(self):
+        invoices = [self.invoice(self.customer_a, debt=Decimal('10.00')) for _ in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic(), deferred_balance_updates():
+                for invoice in invoices:
+                    invoice.customer = self.customer_b
+                    invoice.save()
+                self.invoice(self.customer_c, receivable=Decimal('4.00'))
+        self.assertBalancesMatchInvoices()
+        balance_updates = [query for query in queries.captured_queries
+                           if query['sql'].startswith('UPDATE') and Customer._meta.db_table in query['sql']]
+        self.assertEqual(len(balance_updates), 3)
+
+    def test_deferred_batch_discards_changes_on_error(self):
+        invoice = self.invoice(self.customer_a, debt=Decimal('10.00'))
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic(), deferred_balance_updates():
+                invoice.debt = Decimal('99.00')
+                invoice.save()
+                raise RuntimeError
+        self.assertBalancesMatchInvoices()
+
+
+class PaymentEntryBulkTests(ReferenceDataMixin, TestCase):
+    url = '/core/payment_entries/bulk/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_data(self, customer, **fields):
+        data = {
+            'date': '2025-02-10T10:00:00Z', 'worksite': self.worksite.pk, 'group': self.group.pk,
+            'company': self.company.pk, 'customer': customer.pk, 'type': 'invoice',
+        }
+        data.update(fields)
+        return data
+
+    def snapshot(self):
+        return (
+            list(PaymenInvoice.objects.order_by('id').values_list('id', 'customer_id', 'debt', 'receivable')),
+            list(Customer.objects.order_by('id').values_list('id', 'balance', 'balance_status')),
+            list(PaymenInvoiceMonthlyRollup.objects.order_by('id').values_list(*ROLLUP_KEY, *ROLLUP_VALUES)),
+            LogEntry.objects.count(),
+        )
+
+    def test_invalid_row_rolls_back_whole_batch(self):
+        kept = self.invoice(self.customer_a, debt=Decimal('100.00'))
+        removed = self.invoice(self.customer_b, debt=Decimal('50.00'))
+        before = self.snapshot()
+
+        response = self.client.post(self.url, [
+            {'op': 'create', 'data': self.create_data(self.customer_a, debt='10.00')},
+            {'op': 'update', 'id': kept.pk, 'data': {'debt': '1.00', 'customer': self.customer_c.pk}},
+            {'op': 'delete', 'id': removed.pk},
+            {'op': 'create', 'data': self.create_data(self.customer_b, debt='abc')},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [3])
+        self.assertEqual(self.snapshot(), before)
+
+        response = self.client.post(self.url, [
+            {'op': 'delete', 'id': removed.pk},
+            {'op': 'update', 'id': kept.pk + removed.pk + 1000, 'data': {'debt': '1.00'}},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], [{'index': 1, 'errors': 'Kayıt bulunamadı.'}])
+        self.assertEqual(self.snapshot(), before)
+
+    def test_error_report_lists_every_invalid_row(self):
+        invoice = self.invoice(self.customer_a, debt=Decimal('100.00'))
+        before = self.snapshot()
+
+        response = self.client.post(self.url, {'operations': [
+            {'op': 'create', 'data': self.create_data(self.customer_a, debt='abc')},
+            {'op': 'update', 'id': invoice.pk, 'data': {'debt': '5.00'}},
+            {'op': 'create', 'data': {'debt': '5.00'}},
+            {'op': 'update', 'id': invoice.pk, 'data': {'customer': 999999}},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        # Aynı kayda ikinci işlem ön kontrolde reddedilir, diğer satırlar doğrulanmaz
+        self.assertEqual(response.data['errors'], [
+            {'index': 3, 'errors': 'Aynı kayıt için birden fazla işlem gönderilemez.'},
+        ])
+
+        response = self.client.post(self.url, [
+            {'op': 'create', 'data': self.create_data(self.customer_a, debt='abc')},
+            {'op': 'update', 'id': invoice.pk, 'data': {'debt': '5.00'}},
+            {'op': 'create', 'data': {'debt': '5.00'}},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(set(errors), {0, 2})
+        self.assertIn('debt', errors[0])
+        self.assertIn('customer', errors[2])
+        self.assertEqual(self.snapshot(), before)
+
+    def test_valid_batch_maintains_balances_and_rollups(self):
+        updated = self.invoice(self.customer_a, debt=Decimal('100.00'))
+        moved = self.invoice(self.customer_a, debt=Decimal('40.00'))
+        removed = self.invoice(self.customer_b, receivable=Decimal('25.00'))
+
+        response = self.client.post(self.url, [
+            {'op': 'create', 'data': self.create_data(self.customer_b, debt='70.00')},
+            {'op': 'create', 'data': self.create_data(self.customer_c, receivable='15.50', date='2025-03-01T10:00:00Z')},
+            {'op': 'update', 'id': updated.pk, 'data': {'debt': '60.00', 'receivable': '5.00'}},
+            {'op': 'update', 'id': moved.pk, 'data': {'customer': self.customer_c.pk, 'date': '2025-03-05T10:00:00Z'}},
+            {'op': 'delete', 'id': removed.pk},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(response.data['updated'], [updated.pk, moved.pk])
+        self.assertEqual(response.data['deleted'], [removed.pk])
+        self.assertFalse(PaymenInvoice.objects.filter(pk=removed.pk).exists())
+        self.assertBalancesMatchInvoices()
+        self.assertRollupsMatchInvoices()
+        self.assertEqual(LogEntry.objects.filter(object_id__in=response.data['created']).count(), 2)
+
+
+class FastListSerializationTests(ReferenceDataMixin, TestCase):
+    """
+    values() projeksiyonu + FastJSONRenderer (orjson) ile serializer +
+    DRF JSONRenderer çıktısı bayt bayt aynı olmalı.
+    """
+
+    urls = [
+        '/core/checklist/',
+        '/core/checklist/?fields=id,debt,customer.name',
+        '/core/search_page/',
+        '/core/search_page/?cursor=&order_by=check_time',
+        '/core/payment_entry/?pageSize=5',
+        '/core/payment_entry/?cursor=&pageSize=2&order_by=customer__name',
+        '/core/payment_entry/?expand=customer.created_by&pageSize=3',
+        '/core/invoice/?type=payment',
+        '/core/customer/',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Customer.objects.filter(pk=cls.customer_a.pk).update(name='Satır\u2028ayracı "tırnak" \\ ü')
+        start = datetime(2025, 1, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+        amounts = [Decimal('0.01'), Decimal('12345678.90'), Decimal('100.00'), None]
+        for i in range(8):
+            customer = (cls.customer_a, cls.customer_b, cls.customer_c)[i % 3]
+            PaymenInvoice.objects.create(
+                date=start + timedelta(days=i), worksite=cls.worksite, group=cls.group,
+                company=cls.company, customer=customer, type='payment' if i % 2 else 'invoice',
+                debt=amounts[i % 4], receivable=amounts[(i + 1) % 4],
+                check_no=f'Ç{i}' if i % 2 else None,
+                check_time=start + timedelta(days=30 + i) if i % 2 else None,
+                material='Çimento' if i % 3 == 0 else '', created_by=cls.user,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def fetch(self, url):
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.content
+
+    def test_renderer_matches_drf(self):
+        data = {
+            'text': 'a\u2028b\u2029c "ç" \\ /', 'amount': Decimal('1234.50'), 'small': Decimal('0.0001'),
+            'date': datetime(2025, 1, 1, 12, 0, 0, 500, tzinfo=timezone.utc), 'none': None,
+            'list': [1, 2.5, True, {'nested': 'ü'}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_list_endpoints_render_identically(self):
+        for url in self.urls:
+            # orjson yokken FastJSONRenderer DRF'in JSONRenderer'ına düşer
+            with override_settings(FAST_LIST_SERIALIZATION=False), mock.patch.object(renderers, 'orjson', None):
+                expected = self.fetch(url)
+            self.assertEqual(self.fetch(url), expected, url)
+
+
+class ReferenceListUserVersionTests(ReferenceDataMixin, TestCase):
+    """Kullanıcı kaydı sadece listelerde dönen alanları değiştiyse referans listelerini geçersiz kılar."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def save(self, **kwargs):
+        before = reference_versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(**kwargs)
+        return reference_versions() != before
+
+    def test_login_does_not_bump_versions(self):
+        before = reference_versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.user)
+        self.assertEqual(reference_versions(), before)
+
+    def test_unchanged_save_does_not_bump_versions(self):
+        self.user.is_staff = not self.user.is_staff
+        self.assertFalse(self.save())
+
+    def test_rendered_field_change_bumps_versions(self):
+        self.user.first_name = 'Yeni'
+        self.assertTrue(self.save())
+        self.user.email = 'yeni@test.com'
+        self.assertTrue(self.save(update_fields=['email']))
+        # update_fields dışındaki değişiklik veritabanına yazılmaz
+        self.user.last_name = 'Soyad'
+        self.assertFalse(self.save(update_fields=['is_staff']))
+        # Testlerde auditlog senkron yazar; commit callback'leri kayıt kaybettirmez
+        updates = LogEntry.objects.get_for_object(self.user).filter(action=LogEntry.Action.UPDATE)
+        self.assertEqual([set(entry.changes_dict) for entry in updates.order_by('id')], [{'first_name'}, {'email'}])
+
+
+
+class CustomerListBalanceTests(ReferenceDataMixin, TestCase):
+    """Fatura yazmaları önbellekteki müşteri listesini eskitmez; bakiye her istekte güncel döner."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def balances(self, response):
+        return {row['id']: (row['balance'], row['balance_status']) for row in response.json()}
+
+    def test_invoice_write_keeps_cached_list_and_returns_live_balance(self):
+        for url in ('/core/customer/', '/core/async/customer/'):
+            with self.subTest(url=url):
+                cache.clear()
+                first = self.client.get(url)
+                self.assertEqual(self.balances(first)[self.customer_a.pk], ('0.00', '0'))
+                version = get_version('customer')
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    invoice = self.invoice(self.customer_a, debt=Decimal('125.50'))
+                self.assertEqual(get_version('customer'), version)
+
+                # Eski ETag artık geçerli değil; liste önbellekten, bakiye tek sorguyla gelir
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, headers={'If-None-Match': first['ETag']})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], first['ETag'])
+                self.assertEqual([query['sql'] for query in queries.captured_queries if 'core_customer' in query['sql']],
+                                 [str(Customer.objects.values_list('id', 'balance', 'balance_status').query)])
+                self.assertEqual(self.balances(response)[self.customer_a.pk], ('125.50', 'B'))
+                self.assertEqual(response.json()[-1].keys(), first.json()[-1].keys())
+
+                self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+                with self.captureOnCommitCallbacks(execute=True):
+                    invoice.delete()
+
+
+class PaymenInvoiceImporterTests(ReferenceDataMixin, TestCase):
+    header = ['Tarih', 'Şantiye', 'Grup', 'Şirket', 'Müşteri', 'Borç']
+
+    def workbook(self, header, *rows):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        file = BytesIO()
+        workbook.save(file)
+        file.seek(0)
+        return file
+
+    def run_import(self, header, *rows):
+        return PaymenInvoiceImporter(user=self.user).run(self.workbook(header, *rows))
+
+    def row(self, customer, debt=100):
+        return ['15.01.2025', 'Şantiye', 'Grup', 'Şirket', customer, debt]
+
+    def test_names_are_matched_after_normalization(self):
+        self.assertEqual(self.run_import(self.header, self.row('  müşteri   a ')), 1)
+        invoice = PaymenInvoice.objects.get()
+        self.assertEqual(invoice.customer, self.customer_a)
+        self.assertEqual(invoice.debt, Decimal('100'))
+        self.assertBalancesMatchInvoices()
+
+    def test_ambiguous_name_is_a_row_error(self):
+        Customer.objects.create(name='MÜŞTERİ A', created_by=self.user)
+        with self.assertRaises(ExcelImportError) as raised:
+            self.run_import(self.header, self.row('Müşteri B'), self.row('Müşteri A'))
+        self.assertEqual([error['row'] for error in raised.exception.errors], [3])
+        self.assertIn('customer', raised.exception.errors[0]['errors'])
+        self.assertFalse(PaymenInvoice.objects.exists())
+
+    def test_numeric_cell_is_a_name_not_an_id(self):
+        numbered = Customer.objects.create(name='1453', created_by=self.user)
+        self.run_import(self.header, self.row(1453))
+        self.assertEqual(PaymenInvoice.objects.get().customer, numbered)
+
+        # Bu id'li bir müşteri var ama adı sayı değil; ad olarak bulunamaz
+        with self.assertRaises(ExcelImportError) as raised:
+            self.run_import(self.header, self.row(self.customer_b.pk))
+        self.assertIn('customer', raised.exception.errors[0]['errors'])
+
+    def test_id_column_resolves_by_id(self):
+        Customer.objects.create(name='Müşteri A', created_by=self.user)
+        header = ['Tarih', 'Şantiye', 'Grup', 'Şirket', 'Müşteri ID', 'Borç']
+        self.run_import(header, self.row(self.customer_a.pk), self.row(str(self.customer_b.pk)))
+        self.assertEqual(
+            list(PaymenInvoice.objects.order_by('id').values_list('customer_id', flat=True)),
+            [self.customer_a.pk, self.customer_b.pk],
+        )
+
+        with self.assertRaises(ExcelImportError) as raised:
+            self.run_import(header, self.row(999999), self.row('abc'))
+        self.assertEqual([list(error['errors']) for error in raised.exception.errors],
+                         [['customer_id'], ['customer_id']])
+
+    def test_name_and_id_columns_must_agree(self):
+        header = self.header + ['Müşteri ID']
+        self.run_import(header, self.row('Müşteri A') + [self.customer_a.pk], self.row('') + [self.customer_b.pk])
+        with self.assertRaises(ExcelImportError) as raised:
+            self.run_import(header, self.row('Müşteri A') + [self.customer_b.pk])
+        self.assertIn('customer', raised.exception.errors[0]['errors'])
+        self.assertEqual(PaymenInvoice.objects.count(), 2)
+
+    def test_created_rows_are_audited(self):
+        LogEntry.objects.all().delete()
+        with set_actor(self.user, '10.0.0.7'):
+            self.run_import(self.header, self.row('Müşteri A', 100), self.row('Müşteri B', 250))
+        invoices = list(PaymenInvoice.objects.order_by('id'))
+        entries = list(LogEntry.objects.get_for_model(PaymenInvoice).order_by('object_id'))
+        self.assertEqual([entry.object_id for entry in entries], [invoice.pk for invoice in invoices])
+        self.assertEqual({entry.action for entry in entries}, {LogEntry.Action.CREATE})
+        self.assertEqual({(entry.actor_id, entry.remote_addr) for entry in entries}, {(self.user.pk, '10.0.0.7')})
+        self.assertEqual([entry.object_repr for entry in entries], [str(invoice) for invoice in invoices])
+        self.assertEqual(entries[1].changes_dict['debt'], ['None', '250'])
+        # Signal'lar kapalı; fatura başına ikinci bir kayıt yazılmaz
+        self.assertEqual(LogEntry.objects.count(), 2)
+        self.assertBalancesMatchInvoices()
+
+        PaymenInvoiceImporter(user=self.user, dry_run=True).run(self.workbook(self.header, self.row('Müşteri C')))
+        self.assertEqual(LogEntry.objects.count(), 2)
+
+    def test_file_that_is_not_xlsx_is_a_bad_request(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for name, content in (('odeme.xlsx', b'tarih;tutar\n'), ('odeme.csv', b'tarih,tutar\n'),
+                              ('bos.xlsx', b'')):
+            with self.subTest(name=name):
+                upload = SimpleUploadedFile(name, content, content_type='application/octet-stream')
+                response = client.post('/core/payment_entry/import/', {'file': upload}, format='multipart')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Dosya okunamadı', response.json()['error'])
+
+
+class KeysetPaginationTests(ReferenceDataMixin, TestCase):
+    """
+    ?cursor= ile ileri ve geri gezinme, NULL ve eşit değerli sıralama
+    alanlarında kayıt atlamadan ve tekrarlamadan tüm listeyi dönmeli.
+    """
+
+    url = '/core/payment_entry/?type=payment&pageSize=3&cursor='
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        day = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        check_times = [None, day, day, None, day + timedelta(days=1), None, day, day + timedelta(days=2),
+                       day + timedelta(days=1), None, day]
+        debts = [None, Decimal('10'), Decimal('10'), Decimal('5'), None, Decimal('10'), Decimal('5'),
+                 None, Decimal('20'), Decimal('10'), Decimal('5')]
+        customers = [cls.customer_b, cls.customer_a, cls.customer_c]
+        for index, (check_time, debt) in enumerate(zip(check_times, debts)):
+            PaymenInvoice.objects.create(
+                date=day, worksite=cls.worksite, group=cls.group, company=cls.company,
+                customer=customers[index % 3], type='payment', debt=debt, check_time=check_time,
+                check_no=f'C{index}' if check_time else None, created_by=cls.user,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def expected(self, field, descending):
+        # NULL en küçük değer; eşitlerde id sıralama yönünde
+        rows = PaymenInvoice.objects.filter(type='payment').values_list('id', field)
+        rows = sorted(rows, key=lambda row: (row[1] is not None, row[1], row[0]), reverse=descending)
+        return [pk for pk, _ in rows]
+
+    def get(self, url):
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.json()
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            data = self.get(url)
+            pages.append([row['id'] for row in data['results']])
+            url = data[link]
+        return pages, data
+
+    def test_walk_forward_and_backward(self):
+        # payment_entry'de order=asc azalan sıralamadır
+        for field, order in (('check_time', 'asc'), ('check_time', 'desc'), ('debt', 'asc'),
+                             ('debt', 'desc'), ('customer__name', 'asc')):
+            with self.subTest(field=field, order=order):
+                expected = self.expected(field, descending=order == 'asc')
+                forward, last = self.walk(f'{self.url}&order_by={field}&order={order}', 'next')
+                self.assertEqual(sum(forward, []), expected)
+                self.assertTrue(all(len(page) == 3 for page in forward[:-1]))
+
+                backward, first = self.walk(last['previous'], 'previous')
+                self.assertEqual(backward[::-1], forward[:-1])
+                self.assertIsNone(first['previous'])
+
+    def test_invalid_cursor_is_not_found(self):
+        def encode(payload):
+            return b64encode(json.dumps(payload).encode()).decode()
+
+        for cursor in ('bozuk', encode(['x']), encode({'v': None}), encode({'v': None, 'id': 'x'}),
+                       encode({'v': 'tarih değil', 'id': 1, 'r': 0})):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/core/payment_entry/?type=payment&order_by=check_time&cursor={cursor}')
+                self.assertEqual(response.status_code, 404)
+
+
+class AsyncViewParityTests(ReferenceDataMixin, TestCase):
+    """core/async/ altındaki view'lar sync karşılıklarıyla aynı cevabı dönmeli."""
+
+    urls = [
+        'payment_entry/?type=payment&pageSize=3',
+        'payment_entry/?type=payment&pageSize=3&page=2&order_by=debt',
+        'payment_entry/?cursor=&pageSize=2&order_by=customer__name&fields=id,customer.name',
+        'invoice/?customer=müşteri a',
+        'checklist/?start_date=2025-02-01&end_date=2025-02-28&order=asc',
+        'checklist/?start_date=2025-02-30&end_date=2025-03-01',
+        'search_page/?customer_ids={a},{b}&cursor=&order_by=check_time',
+        'search_page/?customer_ids=x',
+        'search_page/?start_date=2025-01-01&end_date=bozuk',
+        'worksite/',
+        'group/',
+        'company/',
+        'customer/',
+        'customers/{a}/',
+        'payment_entries/{invoice}/?expand=customer.created_by',
+        'payment_entries/0/',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        start = datetime(2025, 1, 25, 10, tzinfo=timezone.utc)
+        amounts = [Decimal('0.01'), None, Decimal('250.00'), Decimal('250.00')]
+        for i in range(9):
+            cls.last_invoice = PaymenInvoice.objects.create(
+                date=start + timedelta(days=i), worksite=cls.worksite, group=cls.group,
+                company=cls.company, customer=(cls.customer_a, cls.customer_b, cls.customer_c)[i % 3],
+                type='payment' if i % 3 else 'invoice', debt=amounts[i % 4], receivable=amounts[(i + 1) % 4],
+                check_no=f'Ç{i}' if i % 2 else None, check_time=start + timedelta(days=3 * i) if i % 2 else None,
+                created_by=cls.user,
+            )
+
+    def setUp(self):
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def test_async_responses_match_sync(self):
+        ids = {'a': self.customer_a.pk, 'b': self.customer_b.pk, 'invoice': self.last_invoice.pk}
+        for path in self.urls:
+            path = path.format(**ids)
+            with self.subTest(path=path):
+                cache.clear()
+                expected = self.client.get(f'/core/{path}', headers=self.headers)
+                cache.clear()
+                response = async_to_sync(self.async_client.get)(f'/core/async/{path}', headers=self.headers)
+                self.assertEqual(response.status_code, expected.status_code)
+                # Sayfa linkleri kendi URL'lerini gösterir
+                self.assertEqual(json.loads(response.content.decode().replace('/core/async/', '/core/')),
+                                 expected.json())
+
+    def test_reference_list_not_modified(self):
+        etag = self.client.get('/core/customer/', headers=self.headers)['ETag']
+        response = async_to_sync(self.async_client.get)(
+            '/core/async/customer/', headers={**self.headers, 'If-None-Match': etag},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unauthenticated_request_is_rejected(self):
+        response = async_to_sync(self.async_client.get)('/core/async/worksite/')
+        self.assertEqual(response.status_code, 401)
+
+
+class ChequeCalendarTests(ReferenceDataMixin, TestCase):
+    """
+    Vade takvimi kovaları yerel saate (Europe/Istanbul) göre gün, pazartesi
+    başlangıçlı hafta ve ay sınırlarından bölünmeli; tutarsız çek 0 sayılır.
+    """
+
+    url = '/core/checklist/calendar/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        istanbul = ZoneInfo('Europe/Istanbul')
+        cheques = [
+            (datetime(2025, 1, 24, 23, 59), 'Ç0', Decimal('1.00')),    # aralık dışı
+            (datetime(2025, 1, 26, 22, 30), 'Ç1', Decimal('100.00')),  # pazar
+            (datetime(2025, 1, 27, 1, 0), 'Ç2', Decimal('50.00')),     # UTC'de hâlâ 26 ocak
+            (datetime(2025, 1, 31, 23, 59), 'Ç3', None),
+            (datetime(2025, 2, 1, 0, 0), 'Ç4', Decimal('25.50')),
+            (datetime(2025, 2, 1, 10, 0), 'Ç5', Decimal('4.50')),
+            (datetime(2025, 2, 1, 11, 0), None, Decimal('7.00')),      # çek değil
+            (datetime(2025, 2, 1, 12, 0), '', Decimal('7.00')),        # çek değil
+            (datetime(2025, 2, 10, 0, 0), 'Ç6', Decimal('1.00')),      # aralık dışı
+        ]
+        for check_time, check_no, debt in cheques:
+            PaymenInvoice.objects.create(
+                date=datetime(2025, 1, 1, tzinfo=timezone.utc), worksite=cls.worksite, group=cls.group,
+                company=cls.company, customer=cls.customer_b if check_no == 'Ç5' else cls.customer_a,
+                type='payment', debt=debt, check_no=check_no,
+                check_time=check_time.replace(tzinfo=istanbul), created_by=cls.user,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, query):
+        return self.client.get(f'{self.url}?{query}')
+
+    def test_buckets_split_on_local_week_and_month_boundaries(self):
+        response = self.get('start_date=2025-01-25&end_date=2025-02-09')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'start_date': '2025-01-25',
+            'end_date': '2025-02-09',
+            'total': {'count': 5, 'debt': '180.00'},
+            'days': [
+                {'date': '2025-01-26', 'count': 1, 'debt': '100.00'},
+                {'date': '2025-01-27', 'count': 1, 'debt': '50.00'},
+                {'date': '2025-01-31', 'count': 1, 'debt': '0.00'},
+                {'date': '2025-02-01', 'count': 2, 'debt': '30.00'},
+            ],
+            'weeks': [
+                {'week': '2025-01-20', 'count': 1, 'debt': '100.00'},
+                {'week': '2025-01-27', 'count': 4, 'debt': '80.00'},
+            ],
+            'months': [
+                {'month': '2025-01', 'count': 3, 'debt': '150.00'},
+                {'month': '2025-02', 'count': 2, 'debt': '30.00'},
+            ],
+        })
+
+    def test_filters_and_single_day_range(self):
+        data = self.get('start_date=2025-02-01&end_date=2025-02-01&customer=müşteri b').json()
+        self.assertEqual(data['total'], {'count': 1, 'debt': '4.50'})
+        self.assertEqual(data['weeks'], [{'week': '2025-01-27', 'count': 1, 'debt': '4.50'}])
+
+        data = self.get('start_date=2025-01-31&end_date=2025-01-31').json()
+        self.assertEqual(data['total'], {'count': 1, 'debt': '0.00'})
+
+    def test_end_date_defaults_to_a_year_after_start(self):
+        data = self.get('start_date=2025-01-25').json()
+        self.assertEqual(data['end_date'], '2026-01-25')
+        self.assertEqual(data['total'], {'count': 6, 'debt': '181.00'})
+
+    def test_invalid_ranges_are_rejected(self):
+        too_long = (date(2025, 1, 1) + timedelta(days=MAX_CALENDAR_DAYS + 1)).isoformat()
+        for query in ('start_date=25-01-2025', 'start_date=2025-02-30&end_date=2025-03-01',
+                      'start_date=2025-01-01&end_date=bozuk', 'start_date=2025-02-01&end_date=2025-01-31',
+                      f'start_date=2025-01-01&end_date={too_long}'):
+            with self.subTest(query=query):
+                self.assertEqual(self.get(query).status_code, 400)
+
+        limit = (date(2025, 1, 1) + timedelta(days=MAX_CALENDAR_DAYS)).isoformat()
+        self.assertEqual(self.get(f'start_date=2025-01-01&end_date={limit}').status_code, 200)
+
+
+class RollupViewTests(ReferenceDataMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_month_range_filters_and_invalid_months_are_rejected(self):
+        for month, debt in ((1, 100), (2, 50), (3, 25)):
+            self.invoice(self.customer_a, debt=Decimal(debt), date=datetime(2024, month, 10, tzinfo=timezone.utc))
+        response = self.client.get('/core/rollups/?by=month&start=2024-02&end=2024-03')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['month'], row['debt']) for row in response.json()],
+                         [('2024-02', '50.00'), ('2024-03', '25.00')])
+
+        for query in ('start=2024-13', 'end=2024-02-30', 'start=2024-1', 'end=bozuk'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/core/rollups/?by=month&{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Tarih formatı hatalı', response.json()['error'])
+
+
+class SearchFieldTests(ReferenceDataMixin, TestCase):
+    def test_turkish_casefold(self):
+        for value, expected in (
+            ('İSTANBUL', 'istanbul'),
+            ('IŞIK', 'ışık'),
+            ('Iğdır', 'ığdır'),
+            ('ŞİŞLİ  ĞÜZEL\tÇÖP', 'şişli ğüzel çöp'),
+            (None, ''),
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(normalize_search(value), expected)
+
+    def test_search_lookup_ignores_turkish_case(self):
+        isik = Customer.objects.create(name='IŞIK Yapı', created_by=self.user)
+        istanbul = Customer.objects.create(name='İstanbul İnşaat', created_by=self.user)
+        isik_invoice = self.invoice(isik, debt=Decimal(10), bank='ŞEKERBANK')
+        istanbul_invoice = self.invoice(istanbul, debt=Decimal(10), bank='Ziraat')
+        for name, term, expected in (
+            ('customer', 'ışık', isik_invoice),
+            ('customer', 'IŞIK', isik_invoice),
+            ('customer', 'istanbul', istanbul_invoice),
+            ('customer', 'İSTANBUL', istanbul_invoice),
+            ('customer', 'inşaat', istanbul_invoice),
+            ('bank', 'şeker', isik_invoice),
+        ):
+            with self.subTest(name=name, term=term):
+                self.assertEqual(list(PaymenInvoice.objects.filter(search_q(name, term))), [expected])
+        self.assertEqual(list(Customer.objects.filter(search_name__search='yapı')), [isik])
+        self.assertEqual(list(Customer.objects.filter(search_name__search='ISIK')), [])
+
+    def test_save_with_update_fields_persists_search_column(self):
+        self.customer_a.name = 'IĞDIR Şube'
+        self.customer_a.save(update_fields=['name'])
+        self.customer_a.refresh_from_db()
+        self.assertEqual(self.customer_a.search_name, 'ığdır şube')
+
+        invoice = self.invoice(self.customer_a, debt=Decimal(10), bank='Ziraat')
+        invoice.bank = 'İŞ BANKASI'
+        invoice.save(update_fields=['bank'])
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.bank_search, 'iş bankası')
+
+
+class CustomerStatementTests(ReferenceDataMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        day = datetime(2025, 1, 10, 12, tzinfo=timezone.utc)
+        # (gün farkı, borç, alacak); ilk iki kayıt start_date öncesi, aynı günlü kayıtlar id ile sıralanır
+        movements = [(-5, '100', None), (-1, None, '30'), (0, '50', None), (0, None, '20'), (1, '10', None),
+                     (3, None, '5'), (3, '40', None), (6, None, '70'), (8, '15', None)]
+        for offset, debt, receivable in movements:
+            PaymenInvoice.objects.create(
+                date=day + timedelta(days=offset), worksite=cls.worksite, group=cls.group, company=cls.company,
+                customer=cls.customer_a, type='invoice', created_by=cls.user,
+                debt=debt and Decimal(debt), receivable=receivable and Decimal(receivable),
+            )
+        PaymenInvoice.objects.create(
+            date=day, worksite=cls.worksite, group=cls.group, company=cls.company,
+            customer=cls.customer_b, type='invoice', debt=Decimal('999'), created_by=cls.user,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/core/customers/{self.customer_a.pk}/statement/?start_date=2025-01-10&page_size=3'
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.json()
+
+    def expected_balances(self):
+        balance = Decimal('70')
+        balances = {}
+        invoices = PaymenInvoice.objects.filter(customer=self.customer_a, date__gte=datetime(2025, 1, 10, tzinfo=timezone.utc))
+        for invoice in invoices.order_by('date', 'id'):
+            balance += (invoice.debt or 0) - (invoice.receivable or 0)
+            balances[invoice.pk] = f'{balance:.2f}'
+        return balances
+
+    def test_opening_balance_counts_movements_before_start(self):
+        data = self.get(self.url)
+        self.assertEqual(data['opening_balance'], '70.00')
+        self.assertEqual((data['total_debt'], data['total_receivable'], data['closing_balance']),
+                         ('115.00', '95.00', '90.00'))
+        self.assertEqual(data['results'][0]['balance'], '120.00')
+        self.assertIsNone(data['previous'])
+
+        data = self.get(f'/core/customers/{self.customer_a.pk}/statement/')
+        self.assertEqual(data['opening_balance'], '0.00')
+        self.assertEqual(data['results'][-1]['balance'], '90.00')
+
+    def test_running_balance_carries_across_pages_in_both_directions(self):
+        expected = self.expected_balances()
+
+        forward, url = [], self.url
+        while url:
+            data = self.get(url)
+            forward.append([(row['id'], row['balance']) for row in data['results']])
+            last, url = data, data['next']
+        self.assertEqual([len(page) for page in forward], [3, 3, 1])
+        self.assertEqual(dict(sum(forward, [])), expected)
+        self.assertEqual(list(dict(sum(forward, []))), list(expected))
+
+        backward, url = [], last['previous']
+        while url:
+            data = self.get(url)
+            backward.append([(row['id'], row['balance']) for row in data['results']])
+            url = data['previous']
+        self.assertEqual(backward[::-1], forward[:-1])
+        self.assertEqual(data['opening_balance'], '70.00')
@@ -0,0 +1,47 @@
+class FieldTracker:
+    """
+    Seçili alanların veritabanından okunduğu andaki değerlerini instance
+    üzerinde saklar (post_init). Save/delete signal'ları eski değerleri
+    kaydı tekrar okumadan buradan alır. Durum, `fields` sırasıyla bir tuple'dır.
+    """
+
+    def __init__(self, name, fields):
+        self.attr = f'_{name}_state'
+        self.fields = tuple(fields)
+
+    def get(self, instance):
+        return instance.__dict__.get(self.attr)
+
+    def set(self, instance, state):
+        instance.__dict__[self.attr] = state
+
+    def current(self, instance):
+        return tuple(getattr(instance, name) for name in self.fields)
+
+    def remember(self, instance):
+        """
+        Yüklü alanların değerini saklar. Defer edilmiş alan varsa okumaya
+        zorlamamak için hiçbir şey saklanmaz; pre_save gerektiğinde yükler.
+        """
+        if instance.pk is None or any(name not in instance.__dict__ for name in self.fields):
+            return
+        self.set(instance, self.current(instance))
+
+    def load(self, instance):
+        state = type(instance)._base_manager.filter(pk=instance.pk).values_list(*self.fields).first()
+        self.set(instance, state)
+        return state
+
+    def saved(self, instance, old, update_fields=None):
+        """
+        Kaydedilen satırın değerleri. `update_fields` verildiyse listede
+        olmayan alanlar veritabanına yazılmadığı için eski değerleri geçerlidir.
+        """
+        if old is None or update_fields is None:
+            return self.current(instance)
+        fields = set(update_fields)
+        state = []
+        for name, old_value in zip(self.fields, old):
+            field_name = name[:-3] if name.endswith('_id') else name
+            state.append(getattr(instance, name) if fields & {name, field_name} else old_value)
+        return tuple(state)
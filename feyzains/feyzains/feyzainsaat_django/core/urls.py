@@ -1,5 +1,6 @@
 from django.urls import path
 from .views import *
+from . import async_views
 
 urlpatterns = [
     # path("snippets/", SnippetsView.as_view(), name="snippets_api"),
@@ -12,6 +13,7 @@ urlpatterns = [
 
     path("customer/", CustomerView.as_view(), name="customer_api"),
     path("customers/<int:pk>/", CustomerDetailView.as_view(), name="customer_detail_api"),
+    path("customers/<int:pk>/statement/", CustomerStatementView.as_view(), name="customer_statement_api"),
     # path("taxes/", TaxView.as_view(), name="tax_api"),
     # path("withholdings/", WithholdingView.as_view(), name="withholding_api"),
     # path("payment_entry/", PaymentView.as_view(), name="payment_api"),
@@ -23,6 +25,8 @@ urlpatterns = [
 
     path("payment_entry/", PaymentEntryView.as_view(), name="payment_api"),
     path("payment_entries/<int:pk>/", PaymentEntryDetailView.as_view(), name="payment_entry_detail_api"),
+    path("payment_entries/bulk/", PaymentEntryBulkView.as_view(), name="payment_entry_bulk_api"),
+    path("payment_entry/import/", PaymentEntryImportView.as_view(), name="payment_entry_import_api"),
     path("invoice/", InvoiceView.as_view(), name="invoice_api"),
     path("invoices/<int:pk>/", InvoiceDetailView.as_view(), name="invoice_detail_api"),
 
@@ -31,9 +35,27 @@ urlpatterns = [
     # path("payment_invoices/<int:pk>/", PaymenInvoiceDetailView.as_view(), name="payment_invoice_detail_api"),
 
     path("checklist/", ChecklistView.as_view(), name="checklist_api"),
+    path("checklist/calendar/", ChequeCalendarView.as_view(), name="cheque_calendar_api"),
 
     path("search_page/", SearchPagelistView.as_view(), name="search_page_api"),
     path("search_pages/<int:pk>/", SearchPageDetailView.as_view(), name="search_page_detail_api"),
     path("search_all/", SearchAllView.as_view(), name="search_all_api"),
 
+    path("rollups/", RollupView.as_view(), name="rollup_api"),
+
+    # Async (ASGI) okuma endpoint'leri; cevaplar sync karşılıklarıyla aynı
+    path("async/payment_entry/", async_views.AsyncPaymentEntryView.as_view(), name="async_payment_api"),
+    path("async/payment_entries/<int:pk>/", async_views.AsyncPaymentEntryDetailView.as_view(), name="async_payment_entry_detail_api"),
+    path("async/invoice/", async_views.AsyncInvoiceView.as_view(), name="async_invoice_api"),
+    path("async/checklist/", async_views.AsyncChecklistView.as_view(), name="async_checklist_api"),
+    path("async/search_page/", async_views.AsyncSearchPageView.as_view(), name="async_search_page_api"),
+    path("async/worksite/", async_views.AsyncWorksiteView.as_view(), name="async_worksite_api"),
+    path("async/group/", async_views.AsyncGroupView.as_view(), name="async_group_api"),
+    path("async/company/", async_views.AsyncCompanyView.as_view(), name="async_company_api"),
+    path("async/customer/", async_views.AsyncCustomerView.as_view(), name="async_customer_api"),
+    path("async/worksites/<int:pk>/", async_views.AsyncWorksiteDetailView.as_view(), name="async_worksite_detail_api"),
+    path("async/groups/<int:pk>/", async_views.AsyncGroupDetailView.as_view(), name="async_group_detail_api"),
+    path("async/companies/<int:pk>/", async_views.AsyncCompanyDetailView.as_view(), name="async_company_detail_api"),
+    path("async/customers/<int:pk>/", async_views.AsyncCustomerDetailView.as_view(), name="async_customer_detail_api"),
+
 ]
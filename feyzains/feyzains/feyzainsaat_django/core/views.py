@@ -4,14 +4,38 @@ from accounts.models import User
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
-from datetime import datetime,time
+from datetime import datetime,time,timedelta
 from .serializers import *
 from .models import *
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
-from django.utils.timezone import make_aware
+from django.utils.timezone import localdate, make_aware
 from urllib.parse import urlencode, parse_qs, urlparse, urlunparse
+from feyzainsaat_django.conditional import not_modified, page_etag, queryset_etag, with_etag
+from feyzainsaat_django.pagination import KeysetPaginationMixin
+from feyzainsaat_django.streaming import get_stream_format, stream_response
+from .eager import EagerLoadingMixin
+from .sparse import sparse_params
+from .projection import paginated_response, serialize_list
+from .search import SEARCH_FILTERS, search_q
+from .importer import ExcelImportError, PaymenInvoiceImporter
+from .bulk import BulkOperationError, PaymenInvoiceBulkProcessor
+from .balances import with_live_balances
+from .reference_cache import cached_list_response, reference_versions
+from .maturities import CALENDAR_DAYS, CALENDAR_FILTERS, MAX_CALENDAR_DAYS, maturing_cheques, maturity_calendar
+from .rollups import ROLLUP_VALUES
+from .statements import (
+    InvalidStatementCursor, decode_position, encode_position, opening_balance, period_totals,
+    previous_cursor, statement_rows,
+)
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import Sum
+from django.utils.dateparse import parse_date
+from rest_framework.parsers import MultiPartParser, FormParser
+from zipfile import BadZipFile
+from openpyxl.utils.exceptions import InvalidFileException
 
 
 
@@ -20,13 +44,14 @@ from urllib.parse import urlencode, parse_qs, urlparse, urlunparse
 
 
 # --- Worksite Views ---
-class WorksiteView(APIView):
+class WorksiteView(EagerLoadingMixin, APIView):
     
 
     def get(self, request):
-        worksites = Worksite.objects.all().order_by('-id')
-        serializer = WorksiteSerializer(worksites, many=True)
-        return Response(serializer.data)
+        def build():
+            worksites = self.eager(Worksite.objects.all(), WorksiteSerializer).order_by('-id')
+            return WorksiteSerializer(worksites, many=True).data
+        return cached_list_response(request, 'worksite', build)
 
     def post(self, request):
         serializer = WorksiteSerializer(data=request.data)
@@ -35,16 +60,16 @@ class WorksiteView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class WorksiteDetailView(APIView):
+class WorksiteDetailView(EagerLoadingMixin, APIView):
     
 
     def get(self, request, pk):
-        worksite = get_object_or_404(Worksite, pk=pk)
+        worksite = get_object_or_404(self.eager(Worksite.objects.all(), WorksiteSerializer), pk=pk)
         serializer = WorksiteSerializer(worksite)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        worksite = get_object_or_404(Worksite, pk=pk)
+        worksite = get_object_or_404(self.eager(Worksite.objects.all(), WorksiteSerializer), pk=pk)
         serializer = WorksiteSerializer(worksite, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -59,13 +84,14 @@ class WorksiteDetailView(APIView):
 # Aynı yapıyı diğer modeller için de kopyalayıp aşağıya uyarlayabiliriz.
 
 # --- Group Views ---
-class GroupView(APIView):
+class GroupView(EagerLoadingMixin, APIView):
     
 
     def get(self, request):
-        groups = Group.objects.all().order_by('-id')
-        serializer = GroupSerializer(groups, many=True)
-        return Response(serializer.data)
+        def build():
+            groups = self.eager(Group.objects.all(), GroupSerializer).order_by('-id')
+            return GroupSerializer(groups, many=True).data
+        return cached_list_response(request, 'group', build)
 
     def post(self, request):
         serializer = GroupSerializer(data=request.data)
@@ -74,16 +100,16 @@ class GroupView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class GroupDetailView(APIView):
+class GroupDetailView(EagerLoadingMixin, APIView):
     
 
     def get(self, request, pk):
-        group = get_object_or_404(Group, pk=pk)
+        group = get_object_or_404(self.eager(Group.objects.all(), GroupSerializer), pk=pk)
         serializer = GroupSerializer(group)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        group = get_object_or_404(Group, pk=pk)
+        group = get_object_or_404(self.eager(Group.objects.all(), GroupSerializer), pk=pk)
         serializer = GroupSerializer(group, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -96,13 +122,14 @@ class GroupDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 # --- Company Views ---
-class CompanyView(APIView):
+class CompanyView(EagerLoadingMixin, APIView):
     
 
     def get(self, request):
-        companies = Company.objects.all().order_by('-id')
-        serializer = CompanySerializer(companies, many=True)
-        return Response(serializer.data)
+        def build():
+            companies = self.eager(Company.objects.all(), CompanySerializer).order_by('-id')
+            return CompanySerializer(companies, many=True).data
+        return cached_list_response(request, 'company', build)
 
     def post(self, request):
         serializer = CompanySerializer(data=request.data)
@@ -111,16 +138,16 @@ class CompanyView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class CompanyDetailView(APIView):
+class CompanyDetailView(EagerLoadingMixin, APIView):
     
 
     def get(self, request, pk):
-        company = get_object_or_404(Company, pk=pk)
+        company = get_object_or_404(self.eager(Company.objects.all(), CompanySerializer), pk=pk)
         serializer = CompanySerializer(company)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        company = get_object_or_404(Company, pk=pk)
+        company = get_object_or_404(self.eager(Company.objects.all(), CompanySerializer), pk=pk)
         serializer = CompanySerializer(company, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -133,13 +160,14 @@ class CompanyDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 # --- Customer Views ---
-class CustomerView(APIView):
+class CustomerView(EagerLoadingMixin, APIView):
     
 
     def get(self, request):
-        customers = Customer.objects.all().order_by('-id')
-        serializer = CustomerSerializer(customers, many=True)
-        return Response(serializer.data)
+        def build():
+            customers = self.eager(Customer.objects.all(), CustomerListSerializer).order_by('-id')
+            return serialize_list(customers, CustomerListSerializer)
+        return cached_list_response(request, 'customer', build, live=with_live_balances)
 
     def post(self, request):
         serializer = CustomerSerializer(data=request.data)
@@ -148,16 +176,16 @@ class CustomerView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class CustomerDetailView(APIView):
+class CustomerDetailView(EagerLoadingMixin, APIView):
     
 
     def get(self, request, pk):
-        customer = get_object_or_404(Customer, pk=pk)
+        customer = get_object_or_404(self.eager(Customer.objects.all(), CustomerSerializer), pk=pk)
         serializer = CustomerSerializer(customer)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        customer = get_object_or_404(Customer, pk=pk)
+        customer = get_object_or_404(self.eager(Customer.objects.all(), CustomerSerializer), pk=pk)
         serializer = CustomerSerializer(customer, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -169,11 +197,79 @@ class CustomerDetailView(APIView):
         customer.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class PaymentView(APIView):
+class CustomerStatementView(APIView):
+    """
+    Müşteri ekstresi: ?start_date=&end_date= (YYYY-MM-DD) aralığındaki hareketler
+    tarih sırasıyla, yürüyen bakiye ile. Devir bakiyesi ve dönem toplamları
+    her sayfada döner; sonraki/önceki sayfa `next`/`previous` linkindeki
+    cursor ile alınır.
+    """
+    page_size = 100
+    max_page_size = 1000
+
+    def get(self, request, pk):
+        customer = get_object_or_404(Customer.objects.only('id', 'name'), pk=pk)
+
+        start = end = None
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        try:
+            if start_date:
+                start = make_aware(datetime.combine(datetime.strptime(start_date, '%Y-%m-%d').date(), time.min))
+            if end_date:
+                end = make_aware(datetime.combine(datetime.strptime(end_date, '%Y-%m-%d').date(), time.max))
+        except ValueError:
+            return Response({'error': 'Tarih formatı hatalı. Format: YYYY-MM-DD olmalı.'}, status=400)
+
+        try:
+            page_size = min(int(request.query_params.get('page_size', self.page_size)), self.max_page_size)
+        except ValueError:
+            page_size = self.page_size
+        page_size = max(page_size, 1)
+
+        position = None
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                position = decode_position(cursor)
+            except InvalidStatementCursor:
+                raise NotFound('Geçersiz cursor.')
+
+        opening = opening_balance(customer.pk, start)
+        carried = position['balance'] if position else opening
+        rows = list(statement_rows(customer.pk, start, end, position, carried, page_size))
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        total_debt, total_receivable = period_totals(customer.pk, start, end)
+        url = request.build_absolute_uri()
+        next_link = previous_link = None
+        if has_more:
+            next_link = replace_query_param(url, 'cursor', encode_position(rows[-1]))
+        if position is not None and rows:
+            previous = previous_cursor(customer.pk, start, end, rows[0], carried, page_size)
+            if previous is not None:
+                previous_link = replace_query_param(url, 'cursor', previous) if previous else remove_query_param(url, 'cursor')
+
+        return Response({
+            'customer': {'id': customer.pk, 'name': customer.name},
+            'start_date': start_date,
+            'end_date': end_date,
+            'opening_balance': f'{opening:.2f}',
+            'total_debt': f'{total_debt:.2f}',
+            'total_receivable': f'{total_receivable:.2f}',
+            'closing_balance': f'{opening + total_debt - total_receivable:.2f}',
+            'next': next_link,
+            'previous': previous_link,
+            'results': rows,
+        })
+
+
+class PaymentView(EagerLoadingMixin, APIView):
     
 
     def get(self, request):
-        payments = Payment.objects.all().order_by('-id')
+        payments = self.eager(Payment.objects.all(), PaymentReadSerializer).order_by('-id')
         serializer = PaymentReadSerializer(payments, many=True)
         return Response(serializer.data)
 
@@ -186,16 +282,16 @@ class PaymentView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
-class PaymentDetailView(APIView):
+class PaymentDetailView(EagerLoadingMixin, APIView):
     
 
     def get(self, request, pk):
-        payment = get_object_or_404(Payment, pk=pk)
+        payment = get_object_or_404(self.eager(Payment.objects.all(), PaymentSerializer), pk=pk)
         serializer = PaymentSerializer(payment)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        payment = get_object_or_404(Payment, pk=pk)
+        payment = get_object_or_404(self.eager(Payment.objects.all(), PaymentSerializer), pk=pk)
         serializer = PaymentSerializer(payment, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -209,10 +305,10 @@ class PaymentDetailView(APIView):
 
 
 # --- Personal Views ---
-class PersonalView(APIView):
+class PersonalView(EagerLoadingMixin, APIView):
 
     def get(self, request):
-        personals = Personal.objects.select_related('worksite', 'created_by').all().order_by('-id')
+        personals = self.eager(Personal.objects.all(), PersonalSerializer).order_by('-id')
         serializer = PersonalSerializer(personals, many=True)
         return Response(serializer.data)
 
@@ -224,15 +320,15 @@ class PersonalView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PersonalDetailView(APIView):
+class PersonalDetailView(EagerLoadingMixin, APIView):
 
     def get(self, request, pk):
-        personal = get_object_or_404(Personal, pk=pk)
+        personal = get_object_or_404(self.eager(Personal.objects.all(), PersonalSerializer), pk=pk)
         serializer = PersonalSerializer(personal)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        personal = get_object_or_404(Personal, pk=pk)
+        personal = get_object_or_404(self.eager(Personal.objects.all(), PersonalSerializer), pk=pk)
         serializer = PersonalSerializer(personal, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -277,7 +373,7 @@ class PersonalDetailView(APIView):
 
 
 
-class PaymenInvoiceView(APIView):
+class PaymenInvoiceView(EagerLoadingMixin, APIView):
     # def get(self, request):
         
     #     invoices = PaymenInvoice.objects.all().order_by('-id')
@@ -286,13 +382,14 @@ class PaymenInvoiceView(APIView):
 
     def get(self, request):
         type_param = request.query_params.get('type')  # ?type=payment veya ?type=invoice
+        sparse = sparse_params(request)
         
         if type_param:
-            invoices = PaymenInvoice.objects.filter(type=type_param).order_by('-id')
+            invoices = self.eager(PaymenInvoice.objects.filter(type=type_param), PaymenInvoiceReadSerializer, **sparse).order_by('-id')
         else:
-            invoices = PaymenInvoice.objects.all().order_by('-id')
+            invoices = self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer, **sparse).order_by('-id')
 
-        serializer = PaymenInvoiceReadSerializer(invoices, many=True)
+        serializer = PaymenInvoiceReadSerializer(invoices, many=True, **sparse)
 
         print(f"Gelen type: {type_param}")
         
@@ -310,14 +407,15 @@ class PaymenInvoiceView(APIView):
 
 
 
-class PaymenInvoiceDetailView(APIView):
+class PaymenInvoiceDetailView(EagerLoadingMixin, APIView):
     def get(self, request, pk):
-        invoice = get_object_or_404(PaymenInvoice, pk=pk)
-        serializer = PaymenInvoiceReadSerializer(invoice)
+        sparse = sparse_params(request)
+        invoice = get_object_or_404(self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer, **sparse), pk=pk)
+        serializer = PaymenInvoiceReadSerializer(invoice, **sparse)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        invoice = get_object_or_404(PaymenInvoice, pk=pk)
+        invoice = get_object_or_404(self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer), pk=pk)
         serializer = PaymenInvoiceSerializer(invoice, data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
@@ -331,138 +429,179 @@ class PaymenInvoiceDetailView(APIView):
 
 
 
-class ChecklistPagination(PageNumberPagination):
+def invoice_page_etag(paginator, rows):
+    # Satırlarda iç içe dönen şantiye/grup/şirket/müşteri ve kullanıcı değişince de ETag değişir
+    return page_etag(paginator, rows, PaymenInvoice, ('updated_date',), *reference_versions())
+
+
+class ChecklistPagination(KeysetPaginationMixin, PageNumberPagination):
     page_size = 10
 
-class ChecklistView(APIView):
-    def get(self, request):
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        order_by = request.query_params.get('order_by', 'check_time')  # default: check_time
-        order = request.query_params.get('order', 'desc')  # default: descending
-        company = request.query_params.get('company', '')
-        customer = request.query_params.get('customer', '')
+def checklist_queryset(params):
+    """
+    ChecklistView filtre ve sıralaması; tarih formatı hatalıysa ValueError.
+    """
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    order_by = params.get('order_by', 'check_time')  # default: check_time
+    order = params.get('order', 'desc')  # default: descending
+    company = params.get('company', '')
+    customer = params.get('customer', '')
 
-        checklists = PaymenInvoice.objects.filter(
-            Q(check_no__isnull=False) & ~Q(check_no='')
-        )
+    # check_no > '' hem NULL'ları hem boş stringleri eler ve check_no indeksini kullanabilir
+    checklists = PaymenInvoice.objects.filter(check_no__gt='')
 
-        if start_date and end_date:
-            try:
-                start = make_aware(datetime.combine(datetime.strptime(start_date, '%Y-%m-%d').date(), time.min))
-                end = make_aware(datetime.combine(datetime.strptime(end_date, '%Y-%m-%d').date(), time.max))
+    if start_date and end_date:
+        start = make_aware(datetime.combine(datetime.strptime(start_date, '%Y-%m-%d').date(), time.min))
+        end = make_aware(datetime.combine(datetime.strptime(end_date, '%Y-%m-%d').date(), time.max))
+        checklists = checklists.filter(check_time__range=(start, end))
 
-                checklists = checklists.filter(check_time__range=(start, end))
+    # Şirket adına göre filtreleme (case-insensitive)
+    if company:
+        checklists = checklists.filter(search_q('company', company))
 
-                
-            except ValueError:
-                return Response({'error': 'Tarih formatı hatalı. Format: YYYY-MM-DD olmalı.'}, status=400)
-            
-        # Şirket adına göre filtreleme (case-insensitive)
-        if company:
-            checklists = checklists.filter(company__name__icontains=company)
+    # Müşteri adına göre filtreleme (case-insensitive)
+    if customer:
+        checklists = checklists.filter(search_q('customer', customer))
 
-        # Müşteri adına göre filtreleme (case-insensitive)
-        if customer:
-            checklists = checklists.filter(customer__name__icontains=customer)
+    if order == 'desc':
+        return checklists.order_by(f'-{order_by}')
+    return checklists.order_by(order_by)
 
-        if order == 'desc':
-                checklists = checklists.order_by(f'-{order_by}')
-        else:
-                checklists = checklists.order_by(order_by)
 
-        paginator = ChecklistPagination()
-        result_page = paginator.paginate_queryset(checklists, request)
-        serializer = PaymenInvoiceReadSerializer(result_page, many=True)
+class ChecklistView(EagerLoadingMixin, APIView):
+    def get(self, request):
+        sparse = sparse_params(request)
+        try:
+            checklists = self.eager(checklist_queryset(request.query_params), PaymenInvoiceReadSerializer, **sparse)
+        except ValueError:
+            return Response({'error': 'Tarih formatı hatalı. Format: YYYY-MM-DD olmalı.'}, status=400)
 
-        return paginator.get_paginated_response(serializer.data)
+        # ?stream=json|ndjson: filtrelenmiş sonucun tamamı sayfalanmadan akıtılır
+        stream_format = get_stream_format(request)
+        if stream_format:
+            return stream_response(checklists, PaymenInvoiceReadSerializer, stream_format, serializer_kwargs=sparse)
 
+        paginator = ChecklistPagination()
+        return paginated_response(paginator, checklists, request, PaymenInvoiceReadSerializer,
+                                  etag=invoice_page_etag, **sparse)
 
-class SearchPagination(PageNumberPagination):
-    page_size = 10
 
-class SearchPagelistView(APIView):
-    def get(self, request):
-        # Sıralama ayarları
-        order_by = request.query_params.get('order_by', 'date')
-        order = request.query_params.get('order', 'desc')
+class ChequeCalendarView(APIView):
+    """
+    Çek vade takvimi: vadesi gelen çeklerin gün, hafta (pazartesi başlangıçlı)
+    ve ay bazında adet ve tutar toplamları.
+    ?start_date=&end_date= (YYYY-MM-DD, varsayılan bugünden itibaren bir yıl),
+    ?company=&customer=&bank= ChecklistView'daki gibi ad araması.
+    """
 
-        # Tarih aralığı
+    def get(self, request):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
+        try:
+            start = parse_date(start_date) if start_date else localdate()
+            end = parse_date(end_date) if end_date else start and start + timedelta(days=CALENDAR_DAYS)
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({'error': 'Tarih formatı hatalı. Format: YYYY-MM-DD olmalı.'}, status=400)
+        if end < start:
+            return Response({'error': 'Bitiş tarihi başlangıç tarihinden önce olamaz.'}, status=400)
+        if (end - start).days > MAX_CALENDAR_DAYS:
+            return Response({'error': f'Tarih aralığı en fazla {MAX_CALENDAR_DAYS} gün olabilir.'}, status=400)
+
+        filters = {name: request.query_params.get(name, '') for name in CALENDAR_FILTERS}
+        data = maturity_calendar(maturing_cheques(start, end, filters))
+        return Response({'start_date': start.isoformat(), 'end_date': end.isoformat(), **data})
+
+
+class SearchPagination(KeysetPaginationMixin, PageNumberPagination):
+    page_size = 10
 
-        print("startDateeee:", start_date)
-        print("endDateeee:", end_date)
-        
-        # Çoklu müşteri seçimi için özel işlem
-        customer_param = request.query_params.get('customer_ids', '')
-        customer_ids = []
-        
-        if customer_param:
-            try:
-                # Virgülle ayrılmış müşteri ID'lerini parse et
-                customer_ids = [int(id.strip()) for id in customer_param.split(',') if id.strip()]
-                print("Seçili müşteri ID'leri:", customer_ids)
-            except ValueError:
-                return Response({'error': 'Müşteri ID formatı hatalı.'}, status=400)
-
-        # Filtre parametreleri
-        filters = {
-            'worksite__name__icontains': request.query_params.get('worksite', ''),
-            'group__name__icontains': request.query_params.get('group', ''),
-            'company__name__icontains': request.query_params.get('company', ''),
-            'customer__name__icontains': request.query_params.get('customer', ''),
-            'bank__icontains': request.query_params.get('bank', ''),
-            'check_no__icontains': request.query_params.get('check_no', ''),
-            'material__icontains': request.query_params.get('material', ''),
-            'quantity': request.query_params.get('quantity', ''),
-            'unit_price': request.query_params.get('unit_price', ''),
-            'price': request.query_params.get('price', ''),
-            'tax': request.query_params.get('tax', ''),
-            'withholding': request.query_params.get('withholding', ''),
-            'receivable': request.query_params.get('receivable', ''),
-            'debt': request.query_params.get('debt', '')
-        }
-
-        # İlk queryset
-        queryset = PaymenInvoice.objects.all()
-
-        # Q objesiyle dinamik filtreleme
-        q_objects = Q()
-
-        print("\n--- Aktif Filtreler ---")
-        for field, value in filters.items():
-            if value != '':
-                print(f"{field} = {value}")
-                q_objects &= Q(**{field: value})
-                
-        # Çoklu müşteri filtresi
-        if customer_ids:
-            q_objects &= Q(customer__id__in=customer_ids)
-            print(f"Müşteri filtresi uygulandı: {customer_ids}")
-
-        # Tarih filtrelemesi
-        if start_date and end_date:
-            try:
-                start = make_aware(datetime.combine(datetime.strptime(start_date, '%Y-%m-%d'), time.min))
-                end = make_aware(datetime.combine(datetime.strptime(end_date, '%Y-%m-%d'), time.max))
-                q_objects &= Q(check_time__range=(start, end))
-            except ValueError:
-                return Response({'error': 'Tarih formatı hatalı.'}, status=400)
 
-        # Filtreleri uygula
-        queryset = queryset.filter(q_objects)
-        print("queryseeettt:", queryset.count())
+def search_page_queryset(params):
+    """
+    SearchPagelistView filtre ve sıralaması (async karşılığı da aynı sorguyu
+    kullanır). Müşteri id'leri ya da tarih formatı hatalıysa mesajıyla ValueError.
+    """
+    # Sıralama ayarları
+    order_by = params.get('order_by', 'date')
+
+    # Tarih aralığı
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+
+    # Çoklu müşteri seçimi için özel işlem
+    customer_param = params.get('customer_ids', '')
+    customer_ids = []
+
+    if customer_param:
+        try:
+            # Virgülle ayrılmış müşteri ID'lerini parse et
+            customer_ids = [int(id.strip()) for id in customer_param.split(',') if id.strip()]
+        except ValueError:
+            raise ValueError('Müşteri ID formatı hatalı.') from None
+
+    # Filtre parametreleri (metin filtreleri core/search.py üzerinden indeksli aranır)
+    filters = {
+        'quantity': params.get('quantity', ''),
+        'unit_price': params.get('unit_price', ''),
+        'price': params.get('price', ''),
+        'tax': params.get('tax', ''),
+        'withholding': params.get('withholding', ''),
+        'receivable': params.get('receivable', ''),
+        'debt': params.get('debt', '')
+    }
+
+    # Q objesiyle dinamik filtreleme
+    q_objects = Q()
+
+    for field, value in filters.items():
+        if value != '':
+            q_objects &= Q(**{field: value})
+
+    for name in SEARCH_FILTERS:
+        value = params.get(name, '')
+        if value != '':
+            q_objects &= search_q(name, value)
+
+    # Çoklu müşteri filtresi
+    if customer_ids:
+        q_objects &= Q(customer__id__in=customer_ids)
+
+    # Tarih filtrelemesi
+    if start_date and end_date:
+        try:
+            start = make_aware(datetime.combine(datetime.strptime(start_date, '%Y-%m-%d'), time.min))
+            end = make_aware(datetime.combine(datetime.strptime(end_date, '%Y-%m-%d'), time.max))
+        except ValueError:
+            raise ValueError('Tarih formatı hatalı.') from None
+        q_objects &= Q(check_time__range=(start, end))
+
+    # Filtreleri ve sıralamayı uygula
+    return PaymenInvoice.objects.filter(q_objects).order_by(f'-{order_by}')
+
+
+class SearchPagelistView(EagerLoadingMixin, APIView):
+    def get(self, request):
+        try:
+            queryset = search_page_queryset(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        # ?fields=/?expand= verildiyse serializer ile birlikte SELECT kolonları da budanır
+        sparse = sparse_params(request)
+        queryset = self.eager(queryset, PaymenInvoiceReadSerializer, **sparse)
 
-        # Sıralama uygula
-        order_by = f'-{order_by}'
-        queryset = queryset.order_by(order_by)
+        # ?stream=json|ndjson: filtrelenmiş sonucun tamamı sayfalanmadan akıtılır
+        stream_format = get_stream_format(request)
+        if stream_format:
+            return stream_response(queryset, PaymenInvoiceReadSerializer, stream_format, serializer_kwargs=sparse)
 
         # Sayfalama ve serialize
         paginator = SearchPagination()
-        page = paginator.paginate_queryset(queryset, request)
-        serializer = PaymenInvoiceReadSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(paginator, queryset, request, PaymenInvoiceReadSerializer,
+                                  etag=invoice_page_etag, **sparse)
     
 
     def post(self, request):
@@ -474,14 +613,15 @@ class SearchPagelistView(APIView):
 
 
 
-class SearchPageDetailView(APIView):
+class SearchPageDetailView(EagerLoadingMixin, APIView):
     def get(self, request, pk):
-        searchPage = get_object_or_404(PaymenInvoice, pk=pk)
-        serializer = PaymenInvoiceReadSerializer(searchPage)
+        sparse = sparse_params(request)
+        searchPage = get_object_or_404(self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer, **sparse), pk=pk)
+        serializer = PaymenInvoiceReadSerializer(searchPage, **sparse)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        searchPage = get_object_or_404(PaymenInvoice, pk=pk)
+        searchPage = get_object_or_404(self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer), pk=pk)
         serializer = PaymenInvoiceSerializer(searchPage, data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
@@ -494,11 +634,17 @@ class SearchPageDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class SearchAllView(APIView):
+class SearchAllView(EagerLoadingMixin, APIView):
     def get(self, request):
-        products = PaymenInvoice.objects.all()
-        serializer = PaymenInvoiceSerializer(products, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Tüm tablo belleğe alınmadan parça parça akıtılır; ?stream=ndjson satır satır JSON verir
+        sparse = sparse_params(request)
+        etag = queryset_etag(PaymenInvoice.objects.all(), 'updated_date', *reference_versions())
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        products = self.eager(PaymenInvoice.objects.all().order_by('id'), PaymenInvoiceSerializer, **sparse)
+        return with_etag(stream_response(products, PaymenInvoiceSerializer, get_stream_format(request) or 'json',
+                                         serializer_kwargs=sparse), etag)
 
 # class SearchlistView(APIView):
 #     def get(self, request):
@@ -562,11 +708,16 @@ class SearchAllView(APIView):
 
         # return paginator.get_paginated_response(serialized.data)
 
-class PaymentPagination(PageNumberPagination):
+class PaymentPagination(KeysetPaginationMixin, PageNumberPagination):
     page_size = 10
     page_size_query_param = 'pageSize'
+    # Daha büyük listeler için ?stream=json|ndjson kullanılmalı
+    max_page_size = 1000
 
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return self.get_cursor_paginated_response(data)
+
         request = self.request
 
         # Orijinal query string'ten parametreleri al
@@ -585,45 +736,56 @@ class PaymentPagination(PageNumberPagination):
             'results': data
         })   
 
-class PaymentEntryView(APIView):
+def payment_entry_queryset(params):
+    """
+    PaymentEntryView/InvoiceView listelerinin filtre ve sıralaması (async
+    karşılıkları da aynı sorguyu kullanır, bkz. core/async_views.py).
+    """
+    # Parametreleri al
+    entry_type = params.get('type', 'invoice')
+    order_by = params.get('order_by', 'date')
+    order = params.get('order', 'asc')
+    worksite = params.get('worksite', '')
+    group = params.get('group', '')
+    company = params.get('company', '')
+    customer = params.get('customer', '')
+
+    # Filtre
+    filters = Q()
+    if entry_type:
+        filters &= Q(type=entry_type)
+    if company:
+        filters &= search_q('company', company)
+    if worksite:
+        filters &= search_q('worksite', worksite)
+    if group:
+        filters &= search_q('group', group)
+    if customer:
+        filters &= search_q('customer', customer)
+
+    payments = PaymenInvoice.objects.filter(filters)
+
+    # Sıralama
+    if order == 'asc':
+        return payments.order_by(f'-{order_by}')
+    return payments.order_by(order_by)
+
+
+class PaymentEntryView(EagerLoadingMixin, APIView):
     def get(self, request): 
-        # Parametreleri al
-        entry_type = request.query_params.get('type', 'invoice')
-        order_by = request.query_params.get('order_by', 'date')
-        order = request.query_params.get('order', 'asc')
-        worksite = request.query_params.get('worksite', '')
-        group = request.query_params.get('group', '')
-        company = request.query_params.get('company', '')
-        customer = request.query_params.get('customer', '')
-
-        # Filtre
-        filters = Q()
-        if entry_type:
-            filters &= Q(type=entry_type)
-        if company:
-            filters &= Q(company__name__icontains=company)
-        if worksite:
-            filters &= Q(worksite__name__icontains=worksite)
-        if group:
-            filters &= Q(group__name__icontains=group)
-        if customer:
-            filters &= Q(customer__name__icontains=customer)
-
-        payments = PaymenInvoice.objects.filter(filters)
-
-        # Sıralama
-        if order == 'asc':
-            payments = payments.order_by(f'-{order_by}')
-        else:
-            payments = payments.order_by(order_by)
+        sparse = sparse_params(request)
+        payments = self.eager(payment_entry_queryset(request.query_params), PaymenInvoiceReadSerializer, **sparse)
+
+        # ?stream=json|ndjson: filtrelenmiş sonucun tamamı sayfalanmadan akıtılır
+        stream_format = get_stream_format(request)
+        if stream_format:
+            return stream_response(payments, PaymenInvoiceReadSerializer, stream_format, serializer_kwargs=sparse)
 
         # Sayfalama
         paginator = PaymentPagination()
         paginator.request = request  # <-- BU SATIR ÖNEMLİ!
-        result_page = paginator.paginate_queryset(payments, request)
-
-        serializer = PaymenInvoiceReadSerializer(result_page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(paginator, payments, request, PaymenInvoiceReadSerializer,
+                                  etag=invoice_page_etag, **sparse)
     
     def post(self, request):
         serializer = PaymenInvoiceSerializer(data=request.data)
@@ -633,14 +795,66 @@ class PaymentEntryView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PaymentEntryDetailView(APIView):
+class PaymentEntryImportView(APIView):
+    """
+    Excel'den toplu ödeme/fatura girişi. `file` alanında .xlsx beklenir;
+    `sheet` ile sayfa seçilebilir, `dry_run=true` sadece doğrulama yapar.
+    Şantiye/grup/şirket/müşteri adla, ad belirsizse "Müşteri ID" gibi id kolonuyla verilir.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Excel dosyası (file) gönderilmeli.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        importer = PaymenInvoiceImporter(user=request.user, dry_run=dry_run)
+        try:
+            created = importer.run(upload, sheet_name=request.data.get('sheet') or None)
+        except ExcelImportError as exc:
+            return Response({'created': 0, 'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        except (KeyError, OSError, ValueError, BadZipFile, InvalidFileException) as exc:
+            # .xlsx olmayan dosya: BadZipFile / InvalidFileException
+            return Response({'error': f'Dosya okunamadı: {exc}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'created': created, 'dry_run': dry_run, 'errors': []},
+                        status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+class PaymentEntryBulkView(APIView):
+    """
+    Toplu ekleme/güncelleme/silme. Gövde bir işlem listesidir (ya da
+    {"operations": [...]}):
+        [{"op": "create", "data": {...}},
+         {"op": "update", "id": 12, "data": {...}},
+         {"op": "delete", "id": 13}]
+    Güncellemeler kısmidir (sadece gönderilen alanlar). Bir işlem bile hatalıysa
+    hiçbir değişiklik yapılmaz ve hatalar işlem sırasıyla (index) döner.
+    """
+
+    def post(self, request):
+        operations = request.data
+        if isinstance(operations, dict):
+            operations = operations.get('operations')
+
+        processor = PaymenInvoiceBulkProcessor(user=request.user)
+        try:
+            result = processor.run(operations)
+        except BulkOperationError as exc:
+            return Response({'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class PaymentEntryDetailView(EagerLoadingMixin, APIView):
     def get(self, request, pk):
-        payment_entry = get_object_or_404(PaymenInvoice, pk=pk)
-        serializer = PaymenInvoiceReadSerializer(payment_entry)
+        sparse = sparse_params(request)
+        payment_entry = get_object_or_404(self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer, **sparse), pk=pk)
+        serializer = PaymenInvoiceReadSerializer(payment_entry, **sparse)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        payment_entry = get_object_or_404(PaymenInvoice, pk=pk)
+        payment_entry = get_object_or_404(self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer), pk=pk)
         serializer = PaymenInvoiceSerializer(payment_entry, data=request.data)
         
         if serializer.is_valid():
@@ -657,52 +871,23 @@ class PaymentEntryDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class InvoicePagination(PageNumberPagination):
+class InvoicePagination(KeysetPaginationMixin, PageNumberPagination):
     page_size = 10
 
-class InvoiceView(APIView):
+class InvoiceView(EagerLoadingMixin, APIView):
     def get(self, request):
-        # Parametreleri al
-        entry_type = request.query_params.get('type', 'invoice')  # Varsayılan: 'invoice'
-        order_by = request.query_params.get('order_by', 'date')  # Varsayılan: 'date'
-        order = request.query_params.get('order', 'asc')  # Varsayılan: 'desc'
-        worksite = request.query_params.get('worksite', '')
-        group = request.query_params.get('group', '')
-        company = request.query_params.get('company', '')
-        customer = request.query_params.get('customer', '')
-
-        # Sorguyu başlat
-        filters = Q()
-
-        # Tür filtresi
-        if entry_type:
-            filters &= Q(type=entry_type)
-
-        # Diğer filtreler (case-insensitive)
-        if company:
-            filters &= Q(company__name__icontains=company)
-        if worksite:
-            filters &= Q(worksite__name__icontains=worksite)
-        if group:
-            filters &= Q(group__name__icontains=group)
-        if customer:
-            filters &= Q(customer__name__icontains=customer)
-
-        # Filtreleri uygula
-        invoices = PaymenInvoice.objects.filter(filters)
-
-        # Sıralama uygula
-        if order == 'asc':
-            invoices = invoices.order_by(f'-{order_by}')
-        else:
-            invoices = invoices.order_by(order_by)
+        sparse = sparse_params(request)
+        invoices = self.eager(payment_entry_queryset(request.query_params), PaymenInvoiceReadSerializer, **sparse)
+
+        # ?stream=json|ndjson: filtrelenmiş sonucun tamamı sayfalanmadan akıtılır
+        stream_format = get_stream_format(request)
+        if stream_format:
+            return stream_response(invoices, PaymenInvoiceReadSerializer, stream_format, serializer_kwargs=sparse)
 
         # Sayfalama işlemi
         paginator = PaymentPagination()
-        result_page = paginator.paginate_queryset(invoices, request)
-        serializer = PaymenInvoiceReadSerializer(result_page, many=True)
-
-        return paginator.get_paginated_response(serializer.data)
+        return paginated_response(paginator, invoices, request, PaymenInvoiceReadSerializer,
+                                  etag=invoice_page_etag, **sparse)
 
     def post(self, request):
         serializer = PaymenInvoiceSerializer(data=request.data)
@@ -713,14 +898,15 @@ class InvoiceView(APIView):
     
 
 
-class InvoiceDetailView(APIView):
+class InvoiceDetailView(EagerLoadingMixin, APIView):
     def get(self, request, pk):
-        invoice = get_object_or_404(PaymenInvoice, pk=pk)
-        serializer = PaymenInvoiceReadSerializer(invoice)
+        sparse = sparse_params(request)
+        invoice = get_object_or_404(self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer, **sparse), pk=pk)
+        serializer = PaymenInvoiceReadSerializer(invoice, **sparse)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        invoice = get_object_or_404(PaymenInvoice, pk=pk)
+        invoice = get_object_or_404(self.eager(PaymenInvoice.objects.all(), PaymenInvoiceReadSerializer), pk=pk)
         serializer = PaymenInvoiceSerializer(invoice, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -734,3 +920,60 @@ class InvoiceDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class RollupView(APIView):
+    """
+    Dashboard toplamları; PaymenInvoiceMonthlyRollup üzerinden okunur.
+    ?by=customer|worksite|group|company|month (virgülle birden fazla),
+    ?start=YYYY-MM&end=YYYY-MM ay aralığı, ?customer=&worksite=&group=&company= id filtreleri.
+    """
+    dimensions = ('customer', 'worksite', 'group', 'company')
+
+    def get(self, request):
+        by = [name.strip() for name in request.query_params.get('by', 'customer').split(',') if name.strip()]
+        invalid = [name for name in by if name not in self.dimensions + ('month',)]
+        if invalid:
+            return Response({'error': f"Geçersiz kırılım: {', '.join(invalid)}"}, status=400)
+
+        rollups = PaymenInvoiceMonthlyRollup.objects.all()
+        for param, lookup in (('start', 'month__gte'), ('end', 'month__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    month = parse_date(f'{value}-01' if len(value) == 7 else value)
+                except ValueError:
+                    # Biçim doğru ama tarih geçersiz (ör. 2024-13)
+                    month = None
+                if month is None:
+                    return Response({'error': 'Tarih formatı hatalı. Format: YYYY-MM olmalı.'}, status=400)
+                rollups = rollups.filter(**{lookup: month.replace(day=1)})
+
+        for name in self.dimensions:
+            value = request.query_params.get(name)
+            if value:
+                try:
+                    ids = [int(pk) for pk in value.split(',') if pk.strip()]
+                except ValueError:
+                    return Response({'error': f'{name} ID formatı hatalı.'}, status=400)
+                rollups = rollups.filter(**{f'{name}_id__in': ids})
+
+        group_by = []
+        for name in by:
+            group_by += ['month'] if name == 'month' else [f'{name}_id', f'{name}__name']
+        rows = (
+            rollups.order_by(*group_by).values(*group_by)
+            .annotate(**{f'total_{name}': Sum(name) for name in ROLLUP_VALUES})
+        )
+
+        results = []
+        for row in rows:
+            item = {}
+            for name in by:
+                if name == 'month':
+                    item['month'] = row['month'].strftime('%Y-%m')
+                else:
+                    item[name] = {'id': row[f'{name}_id'], 'name': row[f'{name}__name']}
+            for name in ROLLUP_VALUES:
+                value = row[f'total_{name}']
+                item[name] = value if name == 'row_count' else f'{value:.2f}'
+            results.append(item)
+        return Response(results)
@@ -0,0 +1,244 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from auditlog.cid import get_cid
+from auditlog.diff import model_instance_diff
+from auditlog.models import DEFAULT_OBJECT_REPR, LogEntry
+from auditlog.receivers import check_disable, log_update as auditlog_log_update
+from auditlog.registry import auditlog
+from auditlog.signals import pre_log
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import close_old_connections, transaction
+from django.db.models.signals import pre_save
+from django.utils.encoding import smart_str
+
+from website.archive import spill_entries
+
+logger = logging.getLogger(__name__)
+
+QUEUED_ACTIONS = (LogEntry.Action.CREATE, LogEntry.Action.DELETE)
+
+
+class AuditLogWriter:
+    """
+    Auditlog kayıtlarını istek içinde hazırlar, veritabanına yazmayı arka plan
+    thread'ine bırakır. Kayıtlar transaction commit olduktan sonra kuyruğa
+    girer, thread bunları `bulk_create` ile toplu yazar.
+
+    Kuyruk dolarsa kayıt istek içinde senkron yazılır. Process kapanırken
+    kuyrukta kalanlar atexit ile yazılır; process çökerse (SIGKILL, OOM)
+    kuyruktaki, yani son ~FLUSH_INTERVAL saniyede commit olmuş kayıtlar
+    kaybolur. Bu pencere kabul edilemiyorsa AUDITLOG_ASYNC_WRITES=False.
+
+    Yazma hatasında kayıtlar atılmaz, bkz. `write`.
+    """
+
+    def __init__(self, batch_size, queue_size, flush_interval, retries, retry_delay):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, entry):
+        transaction.on_commit(lambda: self.enqueue(entry))
+
+    def enqueue(self, entry):
+        self.start()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning('Auditlog kuyruğu dolu, kayıt senkron yazılıyor.')
+            self.write([entry])
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._thread is None:
+                atexit.register(self.stop)
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self.run, name='auditlog-writer', daemon=True)
+            self._thread.start()
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                entry = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                close_old_connections()
+                continue
+            batch = [entry]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.write(batch)
+
+    def write(self, entries):
+        """
+        Toplu yazma hata verirse `retries` kez artan beklemelerle yeniden
+        dener. Yine yazılamazsa kayıtlar tek tek yazılır; onların da
+        yazılamayanları AUDITLOG_SPILL_FILE'a eklenir, `restore_auditlog_spill`
+        komutuyla tabloya geri yüklenir.
+        """
+        with self._write_lock:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.retry_delay * 2 ** (attempt - 1))
+                    self.reset_connection()
+                try:
+                    LogEntry.objects.bulk_create(reset_pks(entries), batch_size=self.batch_size)
+                    return
+                except Exception:
+                    logger.warning('%s auditlog kaydı yazılamadı (deneme %s/%s).',
+                                   len(entries), attempt + 1, self.retries + 1, exc_info=True)
+
+            failed = []
+            for entry in entries:
+                try:
+                    LogEntry.objects.bulk_create(reset_pks([entry]))
+                except Exception:
+                    failed.append(entry)
+            if failed:
+                spill_entries(failed)
+
+    def reset_connection(self):
+        # Kopan bağlantı sadece writer thread'inde kapatılır; istek thread'inin
+        # bağlantısı (ve varsa transaction'ı) isteğe aittir.
+        if threading.current_thread() is self._thread:
+            close_old_connections()
+
+    def flush(self):
+        """Kuyrukta bekleyen kayıtları çağıran thread'de hemen yazar."""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(self.flush_interval + 1)
+        self.flush()
+
+
+writer = AuditLogWriter(
+    batch_size=getattr(settings, 'AUDITLOG_WRITER_BATCH_SIZE', 200),
+    queue_size=getattr(settings, 'AUDITLOG_WRITER_QUEUE_SIZE', 10000),
+    flush_interval=getattr(settings, 'AUDITLOG_WRITER_FLUSH_INTERVAL', 1.0),
+    retries=getattr(settings, 'AUDITLOG_WRITER_RETRIES', 3),
+    retry_delay=getattr(settings, 'AUDITLOG_WRITER_RETRY_DELAY', 0.5),
+)
+
+
+def reset_pks(entries):
+    # Geri alınan bir bulk_create'in verdiği id'ler bir sonraki denemeye taşınmaz
+    for entry in entries:
+        entry.pk = None
+    return entries
+
+
+def is_queued(model):
+    # Ayar her kayıtta okunur (override_settings ile açılıp kapatılabilir);
+    # serialize_data isteyen modeller auditlog'un senkron yolunda kalır.
+    return (
+        getattr(settings, 'AUDITLOG_ASYNC_WRITES', True)
+        and auditlog.contains(model)
+        and not auditlog.get_serialize_options(model)['serialize_data']
+    )
+
+
+@check_disable
+def log_update(sender, instance, update_fields=None, **kwargs):
+    """
+    auditlog'un pre_save receiver'ının yerine bağlanır (bkz. `install`).
+    Kuyruğa giden modellerde eski kayıt auditlog'daki gibi tek sorguyla
+    okunur ve diff'i aynı üretilir; pre_log'dan sonra tekrar okunmaz.
+    Diğer modeller auditlog'un log_update'ine bırakılır.
+    """
+    if not is_queued(sender):
+        return auditlog_log_update(sender, instance, update_fields=update_fields, **kwargs)
+    if instance._state.adding:
+        return None
+    old = sender._default_manager.filter(pk=instance.pk).first()
+    changes = model_instance_diff(old, instance, fields_to_check=update_fields)
+    if changes:
+        queue_entry(instance, LogEntry.Action.UPDATE, changes)
+    return None
+
+
+def queue_log_entry(sender, instance, action, **kwargs):
+    """
+    auditlog'un pre_log signal'ı (oluşturma ve silme): kaydı auditlog ile
+    aynı diff'le istek içinde hazırlar, writer'a verir ve False dönerek
+    auditlog'un senkron yazmasını iptal eder.
+    """
+    if action not in QUEUED_ACTIONS or not is_queued(sender):
+        return None
+
+    if action == LogEntry.Action.CREATE:
+        changes = model_instance_diff(None, instance)
+    else:
+        changes = model_instance_diff(instance, None)
+    if changes:
+        queue_entry(instance, action, changes)
+    return False
+
+
+def queue_entry(instance, action, changes):
+    """
+    LogEntry'yi auditlog'un log_create'i gibi doldurup commit sonrası
+    kuyruğa verir. object_repr o anki nesneden üretilir; silinen kayıtlar
+    da gerçek adlarıyla loglanır.
+    """
+    try:
+        object_repr = smart_str(instance)
+    except ObjectDoesNotExist:
+        object_repr = DEFAULT_OBJECT_REPR
+    entry = LogEntry(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_pk=smart_str(instance.pk),
+        object_id=instance.pk if isinstance(instance.pk, int) else None,
+        object_repr=object_repr,
+        action=action,
+        changes=changes,
+        cid=get_cid(),
+    )
+    get_additional_data = getattr(instance, 'get_additional_data', None)
+    if callable(get_additional_data):
+        entry.additional_data = get_additional_data()
+    # actor ve remote_addr auditlog'un set_actor receiver'ıyla doldurulur
+    pre_save.send(sender=LogEntry, instance=entry, raw=False, using=LogEntry.objects.db, update_fields=None)
+    writer.submit(entry)
+
+
+def install():
+    """
+    AUDITLOG_ASYNC_WRITES kapalıyken receiver'lar auditlog'un senkron
+    yazmasına dokunmaz. website, INSTALLED_APPS'te auditlog'dan önce
+    geldiği için bu fonksiyon auditlog modelleri kaydetmeden önce çalışır;
+    kaydedilen her model pre_save'de auditlog'un log_update'i yerine
+    buradaki log_update'e bağlanır.
+    """
+    auditlog._signals[pre_save] = log_update
+    pre_log.connect(queue_log_entry, dispatch_uid='audit_writer.queue_log_entry')
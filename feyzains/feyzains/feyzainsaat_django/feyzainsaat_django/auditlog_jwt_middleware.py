@@ -1,16 +1,66 @@
 import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from auditlog.cid import set_cid
+from auditlog.context import set_actor
+from auditlog.middleware import AuditlogMiddleware
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import aauthenticate_request, authenticate_request
 
 logger = logging.getLogger(__name__)
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
     def process_request(self, request):
-        # Authenticate the user using JWT
-        user_auth_tuple = JWTAuthentication().authenticate(request)
+        # Authenticate the user using JWT (sonuç request'te saklanır, DRF tekrar çözmez)
+        user_auth_tuple = authenticate_request(request)
         if user_auth_tuple is not None:
             user, _ = user_auth_tuple
             request.user = user
             logger.debug(f"JWTAuthenticationMiddleware: User authenticated as {user}")
         else:
-            logger.debug("JWTAuthenticationMiddleware: No user authenticated")
\ No newline at end of file
+            logger.debug("JWTAuthenticationMiddleware: No user authenticated")
+
+    async def __acall__(self, request):
+        # ASGI: önbellekte olan kullanıcı için thread'e geçilmez
+        user_auth_tuple = await aauthenticate_request(request)
+        if user_auth_tuple is not None:
+            user, _ = user_auth_tuple
+            request.user = user
+
+            async def auser():
+                return user
+            request.auser = auser
+            logger.debug(f"JWTAuthenticationMiddleware: User authenticated as {user}")
+        else:
+            logger.debug("JWTAuthenticationMiddleware: No user authenticated")
+        return await self.get_response(request)
+
+
+class AsyncAuditlogMiddleware(AuditlogMiddleware):
+    """
+    AuditlogMiddleware'in ASGI altında thread'e geçmeden çalışan hali.
+    Actor `request.auser()` ile alınır; session kullanıcısı async yüklenir.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        remote_addr = self._get_remote_addr(request)
+        auser = getattr(request, 'auser', None)
+        if auser is not None:
+            request.user = await auser()
+        user = self._get_actor(request)
+
+        set_cid(request)
+
+        with set_actor(actor=user, remote_addr=remote_addr):
+            return await self.get_response(request)
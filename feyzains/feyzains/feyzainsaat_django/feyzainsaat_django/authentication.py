@@ -0,0 +1,210 @@
+import time
+from collections import OrderedDict
+from copy import copy
+from threading import Lock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# request üzerinde saklanan kimlik doğrulama sonucu; DRF aynı istekte tekrar çözmez
+REQUEST_AUTH_ATTR = '_jwt_auth'
+_MISSING = object()
+# Process'ler arasında paylaşılmayan backend'ler; invalidation versiyonu diğer worker'lara ulaşmaz
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+class TTLUserCache:
+    """
+    Süre sınırlı, boyut sınırlı LRU önbellek (process başına). Anahtar
+    (user_id, versiyon) olduğu için versiyon değişince eski kayıt kendiliğinden
+    kullanılmaz hale gelir, LRU ile düşer.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key in self._items if key[0] == user_id]:
+                del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+user_cache = TTLUserCache(
+    max_size=getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 300),
+)
+
+
+def user_cache_enabled():
+    """
+    Kullanıcı önbelleği, invalidation versiyonları tüm worker'ların gördüğü
+    ortak bir önbellekteyse (memcached, redis, veritabanı) kullanılır.
+    LocMem/Dummy backend'de başka worker'da pasife alınan ya da şifresi
+    değişen kullanıcı TTL boyunca doğrulanmaya devam edeceği için kullanıcı
+    her istekte veritabanından okunur. Tek process'li kurulumlar
+    AUTH_USER_CACHE_SINGLE_PROCESS=True ile açabilir.
+    """
+    if getattr(settings, 'AUTH_USER_CACHE_SINGLE_PROCESS', False):
+        return True
+    return not isinstance(caches['default'], PROCESS_LOCAL_CACHES)
+
+
+@checks.register(checks.Tags.caches)
+def check_user_cache(app_configs, **kwargs):
+    if user_cache_enabled():
+        return []
+    return [checks.Warning(
+        'JWT kullanıcı önbelleği kapalı: varsayılan önbellek process başına (LocMem/Dummy), '
+        'kullanıcı her istekte veritabanından okunur.',
+        hint='CACHES["default"] için ortak bir backend (memcached, redis) tanımlayın ya da tek '
+             'process için AUTH_USER_CACHE_SINGLE_PROCESS=True ayarlayın.',
+        id='auth.W001',
+    )]
+
+
+def user_version_key(user_id):
+    return f'auth:user:{user_id}:version'
+
+
+def get_user_version(user_id):
+    return cache.get(user_version_key(user_id), 0)
+
+
+def invalidate_user(user_id):
+    """
+    Kullanıcı güncellendiğinde/silindiğinde çağrılır. Bu process'teki kayıt hemen
+    atılır; paylaşılan önbellekteki versiyon artırıldığı için diğer worker'lar
+    da bir sonraki istekte kullanıcıyı yeniden yükler.
+    """
+    user_id = str(user_id)
+    user_cache.discard_user(user_id)
+
+    def bump():
+        key = user_version_key(user_id)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+        user_cache.discard_user(user_id)
+    transaction.on_commit(bump)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Token istek başına bir kez çözülür: middleware'in sonucu request üzerinde
+    saklanır, DRF aynı sonucu kullanır. Kullanıcı nesnesi (user_id, versiyon)
+    anahtarıyla process içinde önbelleğe alınır; sabit durumda kimlik
+    doğrulama veritabanına gitmez. Önbellek sadece ortak bir cache
+    backend'iyle açıktır, bkz. `user_cache_enabled`.
+    """
+
+    def authenticate(self, request):
+        django_request = getattr(request, '_request', request)
+        result = getattr(django_request, REQUEST_AUTH_ATTR, _MISSING)
+        if result is not _MISSING:
+            return result
+        result = super().authenticate(request)
+        setattr(django_request, REQUEST_AUTH_ATTR, result)
+        return result
+
+    def get_user(self, validated_token):
+        if not user_cache_enabled():
+            return super().get_user(validated_token)
+        try:
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        key = (user_id, get_user_version(user_id))
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        # Her istek kendi kopyasını alır; istek sırasında eklenen özellikler
+        # (yetki önbelleği vb.) diğer isteklere taşınmaz.
+        return copy(user)
+
+    async def aget_user(self, validated_token):
+        """Önbellekteyse thread'e geçmeden döner; değilse veritabanı okuması thread'de yapılır."""
+        if not user_cache_enabled():
+            return await sync_to_async(self.get_user)(validated_token)
+        try:
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        user = user_cache.get((user_id, get_user_version(user_id)))
+        if user is not None:
+            return copy(user)
+        return await sync_to_async(self.get_user)(validated_token)
+
+    async def aauthenticate(self, request):
+        django_request = getattr(request, '_request', request)
+        result = getattr(django_request, REQUEST_AUTH_ATTR, _MISSING)
+        if result is not _MISSING:
+            return result
+
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            result = None
+        else:
+            validated_token = self.get_validated_token(raw_token)
+            result = (await self.aget_user(validated_token), validated_token)
+        setattr(django_request, REQUEST_AUTH_ATTR, result)
+        return result
+
+
+def authenticate_request(request):
+    """
+    Middleware'ler için: geçerli token varsa (user, token) döner, yoksa ya da
+    token geçersizse None. Hata DRF tarafında tekrar değerlendirilip 401 döner.
+    """
+    try:
+        return CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+
+
+async def aauthenticate_request(request):
+    """authenticate_request'in async hali (async middleware'ler için)."""
+    try:
+        return await CachedJWTAuthentication().aauthenticate(request)
+    except AuthenticationFailed:
+        return None
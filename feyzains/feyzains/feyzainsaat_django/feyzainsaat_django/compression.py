@@ -0,0 +1,135 @@
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # opsiyonel; yoksa sadece gzip kullanılır
+    brotli = None
+
+re_accepts_gzip = re.compile(r'\bgzip\b')
+re_accepts_br = re.compile(r'\bbr\b')
+
+# Anlık gönderilmesi gereken akışlar sıkıştırılmaz (SSE bildirimleri)
+SKIP_CONTENT_TYPES = ('text/event-stream',)
+GZIP_LEVEL = 6
+# Dinamik cevaplar için hız/oran dengesi; 11 (varsayılan) çok yavaş
+BROTLI_QUALITY = 5
+
+
+class StreamCompressor:
+    """
+    Akan cevap için tek bir gzip/brotli akışı; her parça flush edilir, böylece
+    istemci parçaları geldikçe açabilir.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return self.compressor.process(chunk) + self.compressor.flush()
+        return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    `COMPRESSION_MIN_SIZE` baytın üstündeki cevapları istemci destekliyorsa
+    brotli (kuruluysa) ya da gzip ile sıkıştırır; akan cevaplar (export'lar)
+    boyuttan bağımsız sıkıştırılır. Sync ve async çalışır, thread değiştirmez.
+
+    Django'nun GZipMiddleware'i gibi güçlü ETag'i sıkıştırılınca zayıf
+    (W/) yapar; If-None-Match karşılaştırması zayıf yapıldığı için 304 yine döner.
+    """
+
+    sync_capable = True
+    async_capable = True
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def get_encoding(self, request):
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and re_accepts_br.search(accept):
+            return 'br'
+        if re_accepts_gzip.search(accept):
+            return 'gzip'
+        return None
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').startswith(SKIP_CONTENT_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.get_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compressor = StreamCompressor(encoding)
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(response.streaming_content, compressor)
+            else:
+                response.streaming_content = self.compress_stream(response.streaming_content, compressor)
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress(response.content, encoding)
+            # Sıkıştırma kazandırmıyorsa olduğu gibi gönderilir
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=BROTLI_QUALITY)
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def compress_stream(self, content, compressor):
+        for chunk in content:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    async def compress_async_stream(self, content, compressor):
+        async for chunk in content:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
@@ -0,0 +1,77 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def row_versions(rows, model, fields):
+    """
+    Satırların (pk, *fields) değerleri. Satırlar model nesnesi ya da values()
+    sözlüğü olabilir; alan yüklenmemişse (only()/defer() ya da projeksiyonda
+    kolon yok) değerler tek bir pk sorgusuyla tamamlanır.
+    """
+    pk_name = model._meta.pk.attname
+    versions = []
+    missing = []
+    for row in rows:
+        if isinstance(row, dict):
+            pk = row.get(pk_name, row.get('pk'))
+            loaded = all(field in row for field in fields)
+            values = tuple(row.get(field) for field in fields) if loaded else None
+        else:
+            pk = row.pk
+            loaded = not (set(fields) & row.get_deferred_fields())
+            values = tuple(getattr(row, field) for field in fields) if loaded else None
+        if values is None:
+            missing.append(pk)
+        versions.append((pk, values))
+
+    if missing:
+        fetched = {
+            pk: values for pk, *values in
+            model._default_manager.filter(pk__in=missing).values_list('pk', *fields)
+        }
+        versions = [(pk, values if values is not None else tuple(fetched.get(pk, ())))
+                    for pk, values in versions]
+    return versions
+
+
+def make_etag(*parts):
+    """Parçaların repr'inden güçlü (weak olmayan) ETag."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def page_etag(paginator, rows, model, fields, *extra):
+    """
+    Sayfa ETag'i: satır id'leri ve versiyon alanları (ör. updated_date),
+    sayfalama bilgisi (count / next / previous) ve `extra` (ör. iç içe dönen
+    listelerin versiyonları). Serialize etmeden hesaplanır.
+    """
+    meta = paginator.get_paginated_response(None).data
+    return make_etag(row_versions(rows, model, fields), sorted(meta.items()), *extra)
+
+
+def queryset_etag(queryset, stamp_field, *extra):
+    """
+    Sayfalanmayan tam listeler için: satır sayısı, en büyük id ve en son
+    değişiklik zamanı tek bir aggregate sorgusuyla alınır.
+    """
+    summary = queryset.order_by().aggregate(count=Count('pk'), last_id=Max('pk'), stamp=Max(stamp_field))
+    return make_etag(sorted(summary.items()), *extra)
+
+
+def not_modified(request, etag):
+    """İstemcideki ETag güncelse 304 cevabı, değilse None."""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+def with_etag(response, etag):
+    response['ETag'] = etag
+    # Tarayıcı saklayabilir ama her seferinde ETag ile doğrulamalı
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,278 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+
+# Gecikme histogramı sınırları (saniye)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = 'unmatched'
+
+# İstek boyunca biriken ölçümler (sorgu sayısı/süresi, serializer süresi)
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'query_time', 'serializer_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+
+
+class EndpointStats:
+    __slots__ = ('buckets', 'count', 'duration', 'queries', 'query_time', 'serializer_time',
+                 'response_bytes', 'statuses')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+class MetricsRegistry:
+    """
+    Process içi sayaçlar; anahtar (url adı, HTTP metodu). Her worker kendi
+    değerlerini tutar, Prometheus her worker'ı ayrı hedef olarak toplar.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = Lock()
+
+    def observe(self, view, method, status, duration, metrics, response_bytes):
+        with self._lock:
+            stats = self._stats.get((view, method))
+            if stats is None:
+                stats = self._stats[(view, method)] = EndpointStats()
+            stats.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats.count += 1
+            stats.duration += duration
+            stats.queries += metrics.queries
+            stats.query_time += metrics.query_time
+            stats.serializer_time += metrics.serializer_time
+            stats.response_bytes += response_bytes
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (list(stats.buckets), stats.count, stats.duration, stats.queries, stats.query_time,
+                      stats.serializer_time, stats.response_bytes, dict(stats.statuses))
+                for key, stats in self._stats.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+registry = MetricsRegistry()
+
+
+def label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_metrics():
+    """Prometheus metin formatı (text/plain; version=0.0.4)."""
+    snapshot = sorted(registry.snapshot().items())
+    lines = [
+        '# HELP http_request_duration_seconds Istek suresi.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for (view, method), (buckets, count, duration, *_rest) in snapshot:
+        labels = f'view="{label(view)}",method="{label(method)}"'
+        cumulative = 0
+        for bound, value in zip(LATENCY_BUCKETS, buckets):
+            cumulative += value
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'http_request_duration_seconds_sum{{{labels}}} {duration:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+
+    lines += ['# HELP http_requests_total Istek sayisi.', '# TYPE http_requests_total counter']
+    for (view, method), (*_head, statuses) in snapshot:
+        for status, value in sorted(statuses.items()):
+            lines.append(f'http_requests_total{{view="{label(view)}",method="{label(method)}",status="{status}"}} {value}')
+
+    counters = (
+        ('http_db_queries_total', 'Istek icinde calisan SQL sorgu sayisi.', 3, '{}'),
+        ('http_db_query_seconds_total', 'SQL sorgularinda gecen sure.', 4, '{:.6f}'),
+        ('http_serializer_seconds_total', 'Serializer .data uretiminde gecen sure.', 5, '{:.6f}'),
+        ('http_response_bytes_total', 'Cevap govdesi boyutu.', 6, '{}'),
+    )
+    for name, help_text, index, fmt in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (view, method), values in snapshot:
+            lines.append(f'{name}{{view="{label(view)}",method="{label(method)}"}} {fmt.format(values[index])}')
+    return '\n'.join(lines) + '\n'
+
+
+def query_timer(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_time += time.perf_counter() - start
+
+
+def install_query_timer(connection, **kwargs):
+    """
+    Zamanlayıcı bağlantıya kalıcı olarak eklenir; istek dışında ölçüm yoktur.
+    Async view'larda sorgular sync_to_async thread'lerinin bağlantılarında
+    çalışır, ContextVar oraya da taşındığı için aynı isteğe sayılır.
+    """
+    if query_timer not in connection.execute_wrappers:
+        # Başa eklenir: `execute_wrapper()` context manager'ları çıkarken son
+        # elemanı siler, sona eklenseydi onların yerine bu silinirdi.
+        connection.execute_wrappers.insert(0, query_timer)
+
+
+def install_serializer_timer():
+    """
+    DRF serializer'larının `.data` özelliğini süre ölçecek şekilde sarar.
+    İç içe serializer'lar `.data` değil `to_representation` kullandığı için
+    süre bir kez sayılır.
+    """
+    data = serializers.BaseSerializer.data
+    if getattr(data.fget, 'timed', False):
+        return
+
+    def timed_data(self):
+        metrics = _current.get()
+        if metrics is None:
+            return data.fget(self)
+        start = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+    timed_data.timed = True
+    serializers.BaseSerializer.data = property(timed_data)
+
+
+class MetricsMiddleware:
+    """
+    URL adı bazında gecikme, SQL sayısı/süresi, serializer süresi ve cevap
+    boyutu toplar. Listenin başında olmalı ki diğer middleware'ler de ölçülsün.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        install_serializer_timer()
+        connection_created.connect(install_query_timer, dispatch_uid='metrics_query_timer')
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, metrics, start)
+
+    def observe(self, request, response, metrics, start):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None and match.view_name else UNMATCHED
+        if response.streaming:
+            # Gövde view döndükten sonra üretilir; süre, sorgular ve boyut akış bitince kaydedilir
+            count = self.count_async_streaming if response.is_async else self.count_streaming
+            response.streaming_content = count(
+                response.streaming_content, view, request.method, response.status_code, metrics, start,
+            )
+        else:
+            registry.observe(view, request.method, response.status_code, time.perf_counter() - start,
+                             metrics, len(response.content))
+        return response
+
+    def count_streaming(self, content, view, method, status, metrics, start):
+        size = 0
+        content = iter(content)
+        try:
+            while True:
+                # Parça üretilirken çalışan sorgular da bu isteğe sayılır
+                token = _current.set(metrics)
+                try:
+                    chunk = next(content)
+                except StopIteration:
+                    break
+                finally:
+                    _current.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.observe(view, method, status, time.perf_counter() - start, metrics, size)
+
+    async def count_async_streaming(self, content, view, method, status, metrics, start):
+        size = 0
+        content = aiter(content)
+        try:
+            while True:
+                token = _current.set(metrics)
+                try:
+                    chunk = await anext(content)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _current.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.observe(view, method, status, time.perf_counter() - start, metrics, size)
+
+
+def client_ip(request):
+    """
+    Uygulama proxy arkasındaysa REMOTE_ADDR her istekte proxy'nin adresidir.
+    METRICS_CLIENT_IP_HEADER verilirse adres proxy'nin yazdığı başlıktan
+    okunur; X-Forwarded-For gibi listelerde en sağdaki (proxy'nin eklediği)
+    değer alınır, soldakileri istemci kendisi gönderebilir.
+    """
+    header = getattr(settings, 'METRICS_CLIENT_IP_HEADER', None)
+    if not header:
+        return request.META.get('REMOTE_ADDR')
+    return request.META.get(header, '').rsplit(',', 1)[-1].strip() or None
+
+
+def metrics_view(request):
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed and client_ip(request) not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,9 +1,18 @@
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
-    max_page_size = 100  
+    max_page_size = 100
 
     def get_paginated_response(self, data):
         return Response({
@@ -12,4 +21,215 @@ class CustomPageNumberPagination(PageNumberPagination):
             'count': self.page.paginator.count,
             'page_size': self.get_page_size(self.request),
             'results': data
-        })
\ No newline at end of file
+        })
+
+
+class KeysetPaginationMixin:
+    """
+    PageNumberPagination sınıflarına isteğe bağlı cursor (keyset) modu ekler.
+
+    İstekte `?cursor=` varsa COUNT(*) ve OFFSET yerine `(sıralama alanı, id)`
+    ikilisi üzerinden sayfalama yapılır; `id` eşit değerler için sabit
+    tie-breaker'dır. Parametre yoksa eski sayfa numaralı cevap aynen döner.
+
+    NULL değerler MySQL/SQLite'taki gibi en küçük değer kabul edilir.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Geçersiz cursor.'
+    cursor_mode = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        queryset, page_size, position, reverse = self.prepare_cursor_page(queryset, request)
+        return self.finish_cursor_page(list(queryset[:page_size + 1]), page_size, position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset'in async ORM ile çalışan hali (async view'lar için).
+        Sayfa numaralı modda COUNT `acount()` ile alınır.
+        """
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return await self.apaginate_page_number(queryset, request)
+
+        queryset, page_size, position, reverse = self.prepare_cursor_page(queryset, request)
+        rows = [obj async for obj in queryset[:page_size + 1]]
+        return self.finish_cursor_page(rows, page_size, position, reverse)
+
+    async def apaginate_page_number(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count cached_property; sorgu async atılıp sonuç yerine konur
+        paginator.__dict__['count'] = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        offset = (number - 1) * page_size
+        rows = [obj async for obj in queryset[offset:offset + page_size]]
+        self.page = Page(rows, number, paginator)
+        self.request = request
+        return rows
+
+    def prepare_cursor_page(self, queryset, request):
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.page_query_param)
+        page_size = self.get_page_size(request)
+        field_name, descending = self.get_sort_key(queryset)
+        self.sort_field = field_name
+
+        position = self.decode_cursor(request, queryset.model, field_name)
+        reverse = bool(position and position['r'])
+        if reverse:
+            descending = not descending
+
+        queryset = self.order_for_keyset(queryset, field_name, descending)
+
+        if position:
+            queryset = queryset.filter(
+                self.build_position_filter(queryset.model, field_name, position, descending)
+            )
+        return queryset, page_size, position, reverse
+
+    def finish_cursor_page(self, rows, page_size, position, reverse):
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_cursor = self.encode_cursor(rows[-1], reverse=False) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], reverse=True) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return self.get_cursor_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_cursor_paginated_response(self, data):
+        return Response({
+            'next': self.get_cursor_link(self.next_cursor),
+            'previous': self.get_cursor_link(self.previous_cursor),
+            'results': data
+        })
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def order_for_keyset(self, queryset, field_name, descending):
+        if field_name == 'id':
+            return queryset.order_by('-id' if descending else 'id')
+        return queryset.order_by(f'-{field_name}' if descending else field_name, '-id' if descending else 'id')
+
+    def iterate_chunks(self, queryset, chunk_size):
+        """
+        Sorgunun kendi sıralamasını koruyarak tüm satırları keyset ile
+        `chunk_size`'lık parçalar halinde döner; OFFSET ve sunucu tarafında
+        tüm sonucu bellekte tutma yoktur.
+        """
+        field_name, descending = self.get_sort_key(queryset)
+        self.sort_field = field_name
+        queryset = self.order_for_keyset(queryset, field_name, descending)
+        position = None
+        while True:
+            chunk = queryset
+            if position:
+                chunk = chunk.filter(self.build_position_filter(queryset.model, field_name, position, descending))
+            rows = list(chunk[:chunk_size])
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            position = {'v': self.get_position_value(rows[-1]), 'id': self.get_row_pk(rows[-1]), 'r': 0}
+
+    def get_sort_key(self, queryset):
+        # Sadece ilk sıralama alanı kullanılır, geri kalanının yerini `id` alır.
+        order_by = [key for key in queryset.query.order_by if isinstance(key, str)]
+        if not order_by:
+            return 'id', True
+        key = order_by[0]
+        descending = key.startswith('-')
+        field_name = key.lstrip('-')
+        if field_name == 'pk':
+            field_name = 'id'
+        return field_name, descending
+
+    def resolve_field(self, model, field_name):
+        field = None
+        nullable = False
+        for part in field_name.split('__'):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                raise NotFound(self.invalid_cursor_message)
+            nullable = nullable or field.null
+            if field.is_relation:
+                model = field.related_model
+        return field, nullable
+
+    def build_position_filter(self, model, field_name, position, descending):
+        value, last_id = position['v'], position['id']
+        if field_name == 'id':
+            return Q(id__lt=last_id) if descending else Q(id__gt=last_id)
+
+        _, nullable = self.resolve_field(model, field_name)
+        op = 'lt' if descending else 'gt'
+        if value is None:
+            condition = Q(**{f'{field_name}__isnull': True, f'id__{op}': last_id})
+            if not descending:
+                condition |= Q(**{f'{field_name}__isnull': False})
+            return condition
+
+        condition = Q(**{f'{field_name}__{op}': value}) | Q(**{field_name: value, f'id__{op}': last_id})
+        if nullable and descending:
+            condition |= Q(**{f'{field_name}__isnull': True})
+        return condition
+
+    def get_position_value(self, obj):
+        if self.sort_field == 'id':
+            return None
+        if isinstance(obj, dict):
+            # values() satırı (bkz. core/projection.py)
+            return obj.get(self.sort_field)
+        return reduce(lambda o, attr: getattr(o, attr, None) if o is not None else None,
+                      self.sort_field.split('__'), obj)
+
+    def get_row_pk(self, obj):
+        return obj['id'] if isinstance(obj, dict) else obj.pk
+
+    def encode_cursor(self, obj, reverse):
+        value = self.get_position_value(obj)
+        if value is not None:
+            value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        payload = json.dumps({'v': value, 'id': self.get_row_pk(obj), 'r': int(reverse)}, separators=(',', ':'))
+        return b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request, model, field_name):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(b64decode(encoded.encode()).decode())
+            position['id'] = int(position['id'])
+            position['r'] = int(position.get('r', 0))
+            if position['v'] is not None and field_name != 'id':
+                field, _ = self.resolve_field(model, field_name)
+                position['v'] = field.to_python(position['v'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position
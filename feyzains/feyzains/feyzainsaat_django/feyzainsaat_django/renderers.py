@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # opsiyonel; yoksa DRF'in JSONRenderer'ı kullanılır
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    orjson kuruluysa JSON'u onunla üretir; çıktı DRF'in JSONRenderer'ı ile
+    aynıdır (compact, UTF-8, \\u2028/\\u2029 kaçışlı). Girintili istek, ASCII
+    ayarı ya da orjson'un aynı şekilde yazamadığı bir değer (64 bit üstü
+    tamsayı, üstel gösterime düşen Decimal, str olmayan sözlük anahtarı)
+    olursa DRF'in renderer'ına düşer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+
+        def default(obj):
+            if isinstance(obj, Decimal):
+                value = float(obj)
+                # Python bu aralığın dışında üstel gösterim kullanır, orjson farklı yazar
+                if value and not 1e-4 <= abs(value) < 1e16:
+                    raise TypeError
+                return value
+            return encoder.default(obj)
+
+        try:
+            ret = orjson.dumps(data, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -52,14 +53,48 @@ INSTALLED_APPS = [
     'auditlog',
 
 ]
+# Bildirimlerdeki kısmi indeks (notif_user_unread_idx) MySQL'de oluşturulmaz; bilerek.
+SILENCED_SYSTEM_CHECKS = ['models.W037']
+
 AUDITLOG_INCLUDE_ALL_MODELS=True
+# Auditlog kayıtları commit sonrası kuyruğa alınır, arka planda toplu yazılır.
+# False yapılırsa auditlog kayıtları istek içinde senkron yazar. Testlerde
+# kapalıdır: writer thread'i test transaction'ı dışında ayrı bir bağlantıyla
+# yazar (SQLite'ta "database table is locked"); kuyruğu test eden testler
+# override_settings ile açar.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+AUDITLOG_ASYNC_WRITES = not TESTING and os.environ.get('AUDITLOG_ASYNC_WRITES', 'True') == 'True'
+AUDITLOG_WRITER_BATCH_SIZE = 200
+AUDITLOG_WRITER_QUEUE_SIZE = 10000
+AUDITLOG_WRITER_FLUSH_INTERVAL = 1.0  # saniye
+# Yazma hatasında artan beklemelerle (0.5, 1, 2 sn) yeniden denenir; yine
+# yazılamayan kayıtlar bu dosyaya eklenir (`manage.py restore_auditlog_spill`)
+AUDITLOG_WRITER_RETRIES = 3
+AUDITLOG_WRITER_RETRY_DELAY = 0.5  # saniye
+AUDITLOG_SPILL_FILE = os.environ.get('AUDITLOG_SPILL_FILE', os.path.join(BASE_DIR, 'auditlog_spill.ndjson'))
+# Son N ay tabloda kalır, daha eskiler `archive_auditlog` ile aylık gzip dosyalarına taşınır
+AUDITLOG_RETENTION_MONTHS = int(os.environ.get('AUDITLOG_RETENTION_MONTHS', 12))
+AUDITLOG_ARCHIVE_DIR = os.environ.get('AUDITLOG_ARCHIVE_DIR', os.path.join(BASE_DIR, 'auditlog_archive'))
 
 AUDITLOG_EXCLUDE_TRACKING_MODELS = (
     "sessions",
+    # Türetilmiş sayaç/özet tabloları
+    "accounts.notificationcounter",
+    "core.paymeninvoicemonthlyrollup",
+)
+
+# core/search.py'deki türetilmiş arama kolonları loglanmasın
+AUDITLOG_EXCLUDE_TRACKING_FIELDS = (
+    "search_name",
+    "bank_search",
+    "check_no_search",
+    "material_search",
 )
  
 
 MIDDLEWARE = [
+    'feyzainsaat_django.metrics.MetricsMiddleware',
+    'feyzainsaat_django.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -69,9 +104,18 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'feyzainsaat_django.auditlog_jwt_middleware.JWTAuthenticationMiddleware',
-    'auditlog.middleware.AuditlogMiddleware', 
+    'feyzainsaat_django.auditlog_jwt_middleware.AsyncAuditlogMiddleware',
 ]
 
+# Bu boyutun (bayt) altındaki cevaplar sıkıştırılmaz; brotli paketi kuruluysa gzip yerine o kullanılır
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+
+# /metrics sadece bu adreslerden okunabilir (boş liste: herkese açık)
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip]
+# Proxy arkasında istemci adresinin okunacağı başlık (ör. HTTP_X_REAL_IP, HTTP_X_FORWARDED_FOR).
+# Sadece uygulamaya proxy dışından erişilemiyorsa ve proxy bu başlığı her istekte yazıyorsa verilmeli.
+METRICS_CLIENT_IP_HEADER = os.environ.get('METRICS_CLIENT_IP_HEADER', '')
+
 CORS_ALLOW_ALL_ORIGINS = True
 # CORS_ORIGIN_WHITELIST = [
 #     'http://localhost:3000',
@@ -203,15 +247,47 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication + istek başına tek çözümleme ve kullanıcı önbelleği
+        'feyzainsaat_django.authentication.CachedJWTAuthentication',
         # 'rest_framework.authentication.SessionAuthentication',
 
     ),
     'DEFAULT_PERMISSION_CLASSES': (
     'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    # orjson kuruluysa onunla, değilse DRF'in JSONRenderer'ı ile (çıktı aynı)
+    'DEFAULT_RENDERER_CLASSES': (
+        'feyzainsaat_django.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# Liste endpoint'lerinde serializer yerine values() projeksiyonu (core/projection.py)
+FAST_LIST_SERIALIZATION = os.environ.get('FAST_LIST_SERIALIZATION', 'True') == 'True'
+
+# Referans listesi önbelleği (core/reference_cache.py). LocMemCache her worker'a
+# ayrıdır; birden fazla worker ile çalışırken versiyonların paylaşılması için
+# memcached/redis gibi ortak bir backend tanımlanmalı.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'feyzainsaat'),
+    }
+}
+
+# CachedJWTAuthentication'ın process başına kullanıcı önbelleği. Geçersiz kılma
+# versiyonları CACHES['default']'ta tutulur; LocMem/Dummy backend'de (process
+# başına) diğer worker'lar pasife alınan kullanıcıyı göremeyeceği için önbellek
+# kapalıdır (check: auth.W001). Tek process'li kurulumda True yapılabilir.
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_TTL = 300  # saniye
+AUTH_USER_CACHE_SINGLE_PROCESS = os.environ.get('AUTH_USER_CACHE_SINGLE_PROCESS', 'False') == 'True'
+
+# Bildirim akışı (accounts/stream.py). LocalBroker sadece aynı process'teki
+# bağlantılara ulaşır; çok worker'lı kurulumda paylaşımlı bir backend verilmeli.
+NOTIFICATION_BROKER = 'accounts.stream.LocalBroker'
+NOTIFICATION_STREAM_HEARTBEAT = 15  # saniye
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
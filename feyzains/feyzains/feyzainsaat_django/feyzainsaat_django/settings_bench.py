@@ -0,0 +1,40 @@
+"""
+Benchmark profili: `python manage.py bench_seed --settings=feyzainsaat_django.settings_bench`
+ve ardından `bench_run` ile kullanılır. Varsayılan veritabanı yerel SQLite dosyasıdır;
+BENCH_DB=mysql verilirse BENCH_MYSQL_* değişkenleriyle yerel MySQL kullanılır.
+"""
+from .settings import *  # noqa
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+if os.environ.get('BENCH_DB', 'sqlite') == 'mysql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': os.environ.get('BENCH_MYSQL_NAME', 'feyzainsaat_bench'),
+            'USER': os.environ.get('BENCH_MYSQL_USER', 'root'),
+            'PASSWORD': os.environ.get('BENCH_MYSQL_PASSWORD', ''),
+            'HOST': os.environ.get('BENCH_MYSQL_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('BENCH_MYSQL_PORT', '3306'),
+            'OPTIONS': {
+                'charset': 'utf8mb4',
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('BENCH_SQLITE_PATH', os.path.join(BASE_DIR, 'bench.sqlite3')),
+        }
+    }
+
+# Ölçümü etkilemesin: konsola log yok, auditlog okuma yolunda zaten yazmıyor
+LOGGING = {'version': 1, 'disable_existing_loggers': False}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench',
+    }
+}
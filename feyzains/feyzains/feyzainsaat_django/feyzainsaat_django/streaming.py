@@ -0,0 +1,69 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .pagination import KeysetPaginationMixin
+
+STREAM_QUERY_PARAM = 'stream'
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+# Her satır için ayrı yazmak yerine ~64KB biriktirip gönderiyoruz.
+FLUSH_BYTES = 64 * 1024
+
+
+def get_stream_format(request):
+    value = request.query_params.get(STREAM_QUERY_PARAM, '').lower()
+    return value if value in STREAM_FORMATS else None
+
+
+def iter_rows(queryset, serializer_class, context=None, chunk_size=CHUNK_SIZE, serializer_kwargs=None):
+    """
+    Sorguyu keyset parçaları halinde okuyup her satırı serialize eder.
+    MySQL sürücüsü `iterator()` ile bile tüm sonucu belleğe aldığı için
+    parçalama veritabanı tarafında yapılır.
+    """
+    serializer = serializer_class(context=context or {}, **(serializer_kwargs or {}))
+    keyset = KeysetPaginationMixin()
+    for rows in keyset.iterate_chunks(queryset, chunk_size):
+        for obj in rows:
+            yield serializer.to_representation(obj)
+
+
+def iter_encoded(rows, stream_format):
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    buffer = []
+    size = 0
+    first = True
+
+    if stream_format == 'json':
+        buffer.append('[')
+    for row in rows:
+        data = encoder.encode(row)
+        if stream_format == 'json':
+            data = data if first else ',' + data
+        else:
+            data += '\n'
+        first = False
+        buffer.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    if stream_format == 'json':
+        buffer.append(']')
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def stream_response(queryset, serializer_class, stream_format='json', context=None, serializer_kwargs=None):
+    response = StreamingHttpResponse(
+        iter_encoded(iter_rows(queryset, serializer_class, context, serializer_kwargs=serializer_kwargs),
+                     stream_format),
+        content_type=STREAM_FORMATS[stream_format],
+    )
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -24,6 +24,7 @@ from rest_framework_simplejwt.views import (
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from .metrics import metrics_view
 
 
 urlpatterns = [
@@ -37,6 +38,8 @@ urlpatterns = [
     path('core/', include('core.urls')),  # <--- core app varsa böyle bir şey olmalı
     path('website/', include('website.urls')),
 
+    path('metrics', metrics_view, name='metrics'),
+
 ]
 
 
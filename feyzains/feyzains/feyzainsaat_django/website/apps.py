@@ -5,3 +5,7 @@ class WebsiteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'website'
 
+
+    def ready(self):
+        from feyzainsaat_django.audit_writer import install
+        install()
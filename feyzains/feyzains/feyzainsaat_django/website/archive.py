@@ -0,0 +1,286 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+
+from auditlog.models import LogEntry
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+
+logger = logging.getLogger(__name__)
+
+# Arşiv dizini: her ay için YYYY-MM.ndjson.gz dosyası ve hepsini listeleyen manifest.json
+MANIFEST_NAME = 'manifest.json'
+CHUNK_SIZE = 2000
+
+ENTRY_FIELDS = (
+    'id', 'object_pk', 'object_id', 'object_repr', 'serialized_data', 'action',
+    'changes_text', 'changes', 'actor_id', 'cid', 'remote_addr', 'additional_data',
+)
+
+
+def archive_dir():
+    return str(settings.AUDITLOG_ARCHIVE_DIR)
+
+
+def month_key(month):
+    return month.strftime('%Y-%m')
+
+
+def month_bounds(month):
+    """Ayın başı ve sonraki ayın başı (yerel saat, aware)."""
+    start = date(month.year, month.month, 1)
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end, time.min)),
+    )
+
+
+def retention_cutoff(months=None):
+    """Bu tarihten (ay başı) eski kayıtlar arşivlenir."""
+    if months is None:
+        months = settings.AUDITLOG_RETENTION_MONTHS
+    today = timezone.localdate()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(archive_dir(), MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'months': {}}
+
+
+def write_manifest(manifest):
+    path = os.path.join(archive_dir(), MANIFEST_NAME)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f'{path}.tmp', path)
+
+
+def entry_to_dict(entry):
+    row = {name: getattr(entry, name) for name in ENTRY_FIELDS}
+    content_type = ContentType.objects.get_for_id(entry.content_type_id)
+    row['content_type'] = [content_type.app_label, content_type.model]
+    row['timestamp'] = entry.timestamp.isoformat()
+    return row
+
+
+def dict_to_entry(row, timestamp=None):
+    """Arşiv satırından (kaydedilmeyen) LogEntry; serializer'lar aynen kullanılabilir."""
+    entry = LogEntry(**{name: row.get(name) for name in ENTRY_FIELDS})
+    entry.content_type = ContentType.objects.get_by_natural_key(*row['content_type'])
+    entry.timestamp = timestamp or parse_datetime(row['timestamp'])
+    return entry
+
+
+def spill_file():
+    return str(settings.AUDITLOG_SPILL_FILE)
+
+
+def spill_entries(entries):
+    """
+    Veritabanına yazılamayan (kaydedilmemiş) LogEntry'leri arşiv satırı
+    formatında spill dosyasına ekler; `restore_spill` ile geri yüklenir.
+    """
+    path = spill_file()
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry_to_dict(entry), ensure_ascii=False, separators=(',', ':'), default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        logger.exception('%s auditlog kaydı yazılamadı ve %s dosyasına da eklenemedi.', len(entries), path)
+        return
+    logger.error('%s auditlog kaydı yazılamadı, %s dosyasına eklendi; '
+                 '`manage.py restore_auditlog_spill` ile yüklenmeli.', len(entries), path)
+
+
+def restore_spill():
+    """
+    Spill dosyasındaki kayıtları tabloya yazar, dosyayı siler. Dosya önce
+    yeniden adlandırılır; bu sırada gelen yeni kayıtlar yeni dosyaya eklenir
+    ve aynı çalıştırmada onlar da yüklenir. Önceki çalıştırmadan kalan
+    dosya varsa önce o yüklenir.
+    """
+    path = spill_file()
+    restoring = f'{path}.restoring'
+    total = 0
+    while True:
+        if not os.path.exists(restoring):
+            if not os.path.exists(path):
+                return total
+            os.replace(path, restoring)
+
+        with open(restoring, encoding='utf-8') as f:
+            entries = [dict_to_entry(json.loads(line)) for line in f if line.strip()]
+        with transaction.atomic():
+            LogEntry.objects.bulk_create(entries, batch_size=CHUNK_SIZE)
+        os.remove(restoring)
+        total += len(entries)
+
+
+def read_archive(month):
+    path = os.path.join(archive_dir(), f'{month_key(month)}.ndjson.gz')
+    if not os.path.exists(path):
+        return
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def archive_month(month, dry_run=False):
+    """
+    Bir ayın LogEntry kayıtlarını sıkıştırılmış NDJSON dosyasına yazar,
+    manifest'i günceller ve kayıtları tablodan siler. Ay daha önce
+    arşivlendiyse (sonradan eklenen kayıtlar) dosya yeni kayıtlarla
+    birleştirilir; dosyada zaten olan id'ler tekrar yazılmaz.
+    Dosya diske yazılıp manifest güncellenmeden hiçbir kayıt silinmez.
+    """
+    start, end = month_bounds(month)
+    entries = LogEntry.objects.filter(timestamp__gte=start, timestamp__lt=end).order_by('id')
+    if dry_run:
+        return entries.count()
+
+    os.makedirs(archive_dir(), exist_ok=True)
+    name = f'{month_key(month)}.ndjson.gz'
+    path = os.path.join(archive_dir(), name)
+    digest = hashlib.sha256()
+    archived_ids = []
+    rows = 0
+    first_timestamp = last_timestamp = None
+
+    def write_line(f, row):
+        line = json.dumps(row, ensure_ascii=False, separators=(',', ':'), default=str) + '\n'
+        digest.update(line.encode('utf-8'))
+        f.write(line)
+
+    with gzip.open(f'{path}.tmp', 'wt', encoding='utf-8') as f:
+        existing_ids = set()
+        for row in read_archive(month):
+            existing_ids.add(row['id'])
+            write_line(f, row)
+            rows += 1
+            first_timestamp = min(first_timestamp or row['timestamp'], row['timestamp'])
+            last_timestamp = max(last_timestamp or row['timestamp'], row['timestamp'])
+        for entry in entries.iterator(chunk_size=CHUNK_SIZE):
+            archived_ids.append(entry.id)
+            if entry.id in existing_ids:
+                continue
+            row = entry_to_dict(entry)
+            write_line(f, row)
+            rows += 1
+            first_timestamp = min(first_timestamp or row['timestamp'], row['timestamp'])
+            last_timestamp = max(last_timestamp or row['timestamp'], row['timestamp'])
+    if not archived_ids:
+        os.remove(f'{path}.tmp')
+        return 0
+    os.replace(f'{path}.tmp', path)
+
+    manifest = read_manifest()
+    manifest['months'][month_key(month)] = {
+        'file': name,
+        'rows': rows,
+        'sha256': digest.hexdigest(),
+        'first_timestamp': first_timestamp,
+        'last_timestamp': last_timestamp,
+        'archived_at': timezone.now().isoformat(),
+    }
+    write_manifest(manifest)
+
+    for index in range(0, len(archived_ids), CHUNK_SIZE):
+        with transaction.atomic():
+            LogEntry.objects.filter(id__in=archived_ids[index:index + CHUNK_SIZE]).delete()
+    return len(archived_ids)
+
+
+def months_to_archive(cutoff):
+    """`cutoff`'tan önceki, tabloda kaydı olan aylar."""
+    start = timezone.make_aware(datetime.combine(cutoff, time.min))
+    return list(LogEntry.objects.filter(timestamp__lt=start).dates('timestamp', 'month'))
+
+
+def archived_months(start=None, end=None):
+    """Manifest'teki aylardan [start, end] aralığıyla kesişenler (yeniden eskiye)."""
+    months = []
+    for key in read_manifest()['months']:
+        month = date(int(key[:4]), int(key[5:7]), 1)
+        if start is not None and month < start.replace(day=1):
+            continue
+        if end is not None and month > end:
+            continue
+        months.append(month)
+    return sorted(months, reverse=True)
+
+
+def archive_days(start=None, end=None):
+    """Filtrelerdeki [start, end) aralığının (aware) yerel gün olarak ilk ve son günü."""
+    start_day = timezone.localtime(start).date() if start else None
+    end_day = timezone.localtime(end - timedelta(microseconds=1)).date() if end else None
+    return start_day, end_day
+
+
+def archive_versions(start=None, end=None):
+    """
+    [start, end) ile kesişen arşiv aylarının (ay, sha256) listesi. Sadece
+    manifest okunur; ETag dosyalar açılmadan hesaplanabilsin diye.
+    """
+    months = read_manifest()['months']
+    return [(month_key(month), months[month_key(month)]['sha256'])
+            for month in archived_months(*archive_days(start, end))]
+
+
+def archived_entries(start=None, end=None, actor=None, content_type=None, object_id=None):
+    """
+    Arşivdeki kayıtları canlı tablodaki gibi filtreleyip (timestamp, id)
+    sırasıyla yeniden eskiye LogEntry listesi olarak döner. Sadece aralıkla
+    kesişen ay dosyaları okunur ve sadece filtreye uyan satırlar bellekte
+    tutulur; çağıran aralığı sınırlamalıdır. Actor'lar `attach_actors` ile
+    sadece gösterilecek kayıtlar için yüklenir.
+    """
+    natural_key = [content_type.app_label, content_type.model] if content_type else None
+
+    entries = []
+    for month in archived_months(*archive_days(start, end)):
+        rows = []
+        for row in read_archive(month):
+            if actor is not None and row['actor_id'] != actor:
+                continue
+            if natural_key is not None and row['content_type'] != natural_key:
+                continue
+            if object_id is not None and row['object_id'] != object_id:
+                continue
+            timestamp = parse_datetime(row['timestamp'])
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp >= end:
+                continue
+            rows.append(dict_to_entry(row, timestamp))
+        rows.sort(key=lambda entry: (entry.timestamp, entry.id), reverse=True)
+        entries.extend(rows)
+    return entries
+
+
+def attach_actors(entries):
+    """Arşivden gelen kayıtların actor'larını tek sorguda yükler; canlı kayıtlar atlanır."""
+    archived = [entry for entry in entries if entry._state.adding and entry.actor_id]
+    actors = User.objects.prefetch_related('groups', 'user_permissions').in_bulk(
+        {entry.actor_id for entry in archived}
+    )
+    for entry in archived:
+        # Silinmiş kullanıcı için actor boş döner (canlı tablodaki SET_NULL gibi)
+        entry.actor = actors.get(entry.actor_id)
@@ -0,0 +1,144 @@
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from auditlog.models import LogEntry
+from auditlog.registry import auditlog
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+# ?archived=1 ile okunabilecek en uzun aralık; arşiv dosyaları her istekte açılır
+MAX_ARCHIVE_DAYS = 92
+
+
+@lru_cache(maxsize=None)
+def audited_models():
+    """Auditlog'a kayıtlı modeller, model adına göre ({'paymeninvoice': PaymenInvoice, ...})."""
+    return {model._meta.model_name: model for model in auditlog.get_models()}
+
+
+def content_type_for(model_name):
+    """
+    Model adından ContentType; ContentType.objects.get_for_model kendi
+    önbelleğini kullandığı için istek başına sorgu atılmaz. Bilinmeyen ad için None.
+    """
+    model = audited_models().get(model_name)
+    if model is None:
+        return None
+    return ContentType.objects.get_for_model(model)
+
+
+@lru_cache(maxsize=None)
+def verbose_field_names(content_type_id):
+    """Alan adı (ve FK için `_id`'li hali) -> verbose_name eşlemesi, model başına bir kez üretilir."""
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model is None:
+        return {}
+    names = {}
+    for field in model._meta.get_fields():
+        verbose_name = getattr(field, 'verbose_name', None)
+        if verbose_name is None:
+            continue
+        names[field.name] = str(verbose_name)
+        attname = getattr(field, 'attname', None)
+        if attname:
+            names.setdefault(attname, str(verbose_name))
+    return names
+
+
+def parse_day(value, name):
+    day = parse_date(value)
+    if day is None:
+        raise ValidationError({name: 'Tarih formatı hatalı. Format: YYYY-MM-DD olmalı.'})
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_log_filters(params):
+    """
+    ?actor=<kullanıcı id>, ?model=<model adı>, ?start= / ?end= (YYYY-MM-DD, ikisi de dahil).
+    Bilinmeyen model adı için content_type False döner (sonuç boş).
+    """
+    filters = {'actor': None, 'content_type': None, 'start': None, 'end': None}
+    actor = params.get('actor')
+    if actor:
+        if not actor.isdigit():
+            raise ValidationError({'actor': 'Geçerli bir kullanıcı id gönderilmeli.'})
+        filters['actor'] = int(actor)
+
+    model_name = params.get('model')
+    if model_name:
+        filters['content_type'] = content_type_for(model_name.lower()) or False
+
+    if params.get('start'):
+        filters['start'] = parse_day(params['start'], 'start')
+    if params.get('end'):
+        filters['end'] = parse_day(params['end'], 'end') + timedelta(days=1)
+    return filters
+
+
+def check_archive_range(filters):
+    """Arşiv modunda start ve end zorunludur, aralık MAX_ARCHIVE_DAYS günü geçemez."""
+    if filters['start'] is None or filters['end'] is None:
+        raise ValidationError({'archived': 'Arşivli sorguda start ve end (YYYY-MM-DD) gönderilmeli.'})
+    days = (filters['end'] - filters['start']).days
+    if days <= 0:
+        raise ValidationError({'end': 'end, start tarihinden önce olamaz.'})
+    if days > MAX_ARCHIVE_DAYS:
+        raise ValidationError({'archived': f'Arşivli sorguda aralık en fazla {MAX_ARCHIVE_DAYS} gün olabilir.'})
+
+
+def filter_log_entries(queryset, filters):
+    """Sorgular (content_type, timestamp) ve (actor, timestamp) indekslerini kullanır."""
+    if filters['content_type'] is False:
+        return queryset.none()
+    if filters['actor'] is not None:
+        queryset = queryset.filter(actor_id=filters['actor'])
+    if filters['content_type'] is not None:
+        queryset = queryset.filter(content_type=filters['content_type'])
+    if filters['start'] is not None:
+        queryset = queryset.filter(timestamp__gte=filters['start'])
+    if filters['end'] is not None:
+        queryset = queryset.filter(timestamp__lt=filters['end'])
+    return queryset
+
+
+class CombinedLogEntries:
+    """
+    Canlı tablo sorgusu + arşivden okunan kayıtlar. Arşivdeki aylar canlı
+    tablodakilerden eski olduğu için sıra korunur: önce sorgu, sonra arşiv.
+    Paginator'ın beklediği count() ve dilimlemeyi destekler.
+    """
+
+    def __init__(self, queryset, archived):
+        self.queryset = queryset
+        self.archived = archived
+        self._hot_count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.queryset.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count() + len(self.archived)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        hot = self.hot_count()
+        rows = list(self.queryset[start:min(stop, hot)]) if start < hot else []
+        rows.extend(self.archived[max(start - hot, 0):max(stop - hot, 0)])
+        return rows
+
+
+def log_entries():
+    # UserSerializer grupları ve yetkileri de döndüğü için onlar da önceden yüklenir
+    return (
+        LogEntry.objects.select_related('actor', 'content_type')
+        .prefetch_related('actor__groups', 'actor__user_permissions')
+    )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from website.archive import archive_dir, archive_month, months_to_archive, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Saklama süresinden (AUDITLOG_RETENTION_MONTHS) eski auditlog kayıtlarını aylık "
+        "sıkıştırılmış NDJSON dosyalarına taşır ve tablodan siler. Arşivlenen aylar "
+        "manifest.json'da listelenir; denetim ekranı ?archived=1 ile bunları da okur."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, help='Tabloda tutulacak ay sayısı (varsayılan ayardaki değer).')
+        parser.add_argument('--before', help='Bu aydan (YYYY-MM) önceki kayıtları arşivle.')
+        parser.add_argument('--dry-run', action='store_true', help='Sadece arşivlenecek kayıt sayılarını göster.')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            cutoff = parse_date(f"{options['before']}-01")
+            if cutoff is None:
+                raise CommandError('--before formatı hatalı. Format: YYYY-MM.')
+        else:
+            cutoff = retention_cutoff(options['months'])
+
+        months = months_to_archive(cutoff)
+        if not months:
+            self.stdout.write(f"{cutoff:%Y-%m} öncesinde arşivlenecek kayıt yok.")
+            return
+
+        total = 0
+        for month in months:
+            count = archive_month(month, dry_run=options['dry_run'])
+            total += count
+            self.stdout.write(f"{month:%Y-%m}: {count} kayıt")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Deneme: {total} kayıt arşivlenecek."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{total} kayıt {archive_dir()} altına arşivlendi."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from website.archive import restore_spill, spill_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Auditlog yazıcısının veritabanına yazamayıp AUDITLOG_SPILL_FILE'a eklediği "
+        "kayıtları tabloya yükler ve dosyayı siler."
+    )
+
+    def handle(self, *args, **options):
+        count = restore_spill()
+        if not count:
+            self.stdout.write(f"{spill_file()} içinde yüklenecek kayıt yok.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"{count} auditlog kaydı yüklendi."))
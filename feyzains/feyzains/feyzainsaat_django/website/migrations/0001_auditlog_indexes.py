@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+# auditlog'un LogEntry tablosuna, denetim ekranındaki filtreler için bileşik indeksler.
+# Tablo üçüncü parti uygulamaya ait olduğu için model state'ine dokunulmaz,
+# indeksler doğrudan şema üzerinde oluşturulur.
+INDEXES = [
+    models.Index(fields=['content_type', 'object_id', '-timestamp'], name='auditlog_ct_object_ts_idx'),
+    models.Index(fields=['content_type', '-timestamp'], name='auditlog_ct_ts_idx'),
+    models.Index(fields=['actor', '-timestamp'], name='auditlog_actor_ts_idx'),
+]
+
+
+def add_indexes(apps, schema_editor):
+    LogEntry = apps.get_model('auditlog', 'LogEntry')
+    for index in INDEXES:
+        schema_editor.add_index(LogEntry, index)
+
+
+def remove_indexes(apps, schema_editor):
+    LogEntry = apps.get_model('auditlog', 'LogEntry')
+    for index in INDEXES:
+        schema_editor.remove_index(LogEntry, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditlog', '0015_alter_logentry_changes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
@@ -1,9 +1,7 @@
 from rest_framework import serializers
 from auditlog.models import LogEntry
 from accounts.serializers import UserSerializer
-from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import FieldDoesNotExist
-from django.db.models.fields.related import ForeignKey, ManyToManyField, OneToOneField
+from .audit import verbose_field_names
 
 class LogEntrySerializer(serializers.ModelSerializer):
     action = serializers.SerializerMethodField()
@@ -22,19 +20,6 @@ class LogEntrySerializer(serializers.ModelSerializer):
         return obj.content_type.model
 
     def get_changes(self, obj):
-        changes = obj.changes
-        verbose_changes = {}
-        for field, change in changes.items():
-            verbose_field_name = self.get_verbose_field_name(obj, field)
-            verbose_changes[verbose_field_name] = change
-        return verbose_changes
-
-    def get_verbose_field_name(self, obj, field_name):
-        model = obj.content_type.model_class()
-        try:
-            field = model._meta.get_field(field_name)
-            if isinstance(field, (ForeignKey, ManyToManyField, OneToOneField)):
-                return field.verbose_name
-            return field.verbose_name if hasattr(field, 'verbose_name') else field_name
-        except FieldDoesNotExist:
-            return field_name
\ No newline at end of file
+        changes = obj.changes or {}
+        names = verbose_field_names(obj.content_type_id)
+        return {names.get(field, field): change for field, change in changes.items()}
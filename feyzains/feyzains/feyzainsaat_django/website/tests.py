@@ -1,3 +1,339 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from auditlog.context import set_actor
+from auditlog.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.models import Company, Customer, Group, PaymenInvoice, Worksite
+from feyzainsaat_django import audit_writer
+from feyzainsaat_django.audit_writer import writer
+from feyzainsaat_django.metrics import MetricsMiddleware, metrics_view, registry
+
+
+@override_settings(AUDITLOG_ASYNC_WRITES=True)
+class AuditLogWriterTests(TestCase):
+    """
+    Auditlog kayıtları commit sonrası kuyruğa girer; flush() ile yazılınca
+    satırlar, object_repr'ler ve actor senkron yazmadaki gibi olmalı.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('audit@test.com', 'Audit', 'Test', 'secret')
+        cls.worksite = Worksite.objects.create(name='Şantiye', created_by=cls.user)
+        cls.group = Group.objects.create(name='Grup', created_by=cls.user)
+        cls.company = Company.objects.create(name='Şirket', created_by=cls.user)
+
+    def setUp(self):
+        # Arka plan thread'i test transaction'ının dışında yazmasın; kuyruk flush() ile boşaltılır
+        writer.stop()
+        patcher = mock.patch.object(writer, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        LogEntry.objects.all().delete()
+
+    def entries(self, model):
+        return list(
+            LogEntry.objects.get_for_model(model)
+            .order_by('id').values_list('action', 'object_repr', 'actor_id')
+        )
+
+    def test_entries_are_queued_until_commit_and_written_on_flush(self):
+        with self.captureOnCommitCallbacks() as callbacks, set_actor(self.user, '10.0.0.1'):
+            customer = Customer.objects.create(name='Ahmet', created_by=self.user)
+        # Kuyruğa commit'te girer; istek içinde tabloya yazılmaz
+        self.assertFalse(LogEntry.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertFalse(LogEntry.objects.exists())
+
+        writer.flush()
+        entry = LogEntry.objects.get_for_object(customer).get()
+        self.assertEqual(entry.action, LogEntry.Action.CREATE)
+        self.assertEqual(entry.object_repr, 'Ahmet')
+        self.assertEqual(entry.actor, self.user)
+        self.assertEqual(entry.remote_addr, '10.0.0.1')
+
+    def test_rolled_back_changes_are_not_logged(self):
+        with self.captureOnCommitCallbacks(execute=True), set_actor(self.user):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Customer.objects.create(name='Ahmet', created_by=self.user)
+                raise RuntimeError
+        writer.flush()
+        self.assertFalse(LogEntry.objects.exists())
+
+    def test_repr_is_taken_when_the_change_happens(self):
+        with self.captureOnCommitCallbacks(execute=True), set_actor(self.user):
+            customer = Customer.objects.create(name='Ahmet', created_by=self.user)
+            invoice = PaymenInvoice.objects.create(
+                date=datetime(2025, 1, 1, tzinfo=timezone.utc),
+                worksite=self.worksite, group=self.group, company=self.company,
+                customer=customer, type='payment', debt=Decimal('10.00'),
+                check_no='C1', created_by=self.user,
+            )
+            customer.name = 'Mehmet'
+            customer.save()
+            invoice.check_no = 'C2'
+            invoice.save(update_fields=['check_no'])
+            # Fatura müşteriyle birlikte (cascade) silinir
+            customer.delete()
+        writer.flush()
+
+        self.assertEqual(self.entries(Customer), [
+            (LogEntry.Action.CREATE, 'Ahmet', self.user.pk),
+            (LogEntry.Action.UPDATE, 'Mehmet', self.user.pk),
+            (LogEntry.Action.DELETE, 'Mehmet', self.user.pk),
+        ])
+        self.assertEqual(self.entries(PaymenInvoice), [
+            (LogEntry.Action.CREATE, 'Ahmet - C1', self.user.pk),
+            (LogEntry.Action.UPDATE, 'Mehmet - C2', self.user.pk),
+            (LogEntry.Action.DELETE, 'Mehmet - C2', self.user.pk),
+        ])
+        update = LogEntry.objects.get_for_model(PaymenInvoice).get(action=LogEntry.Action.UPDATE)
+        self.assertEqual(set(update.changes_dict), {'check_no'})
+
+    def test_flush_writes_every_queued_entry(self):
+        with self.captureOnCommitCallbacks(execute=True), set_actor(self.user):
+            customers = [Customer.objects.create(name=f'Müşteri {index}', created_by=self.user)
+                         for index in range(5)]
+            for customer in customers:
+                customer.name += ' (yeni)'
+                customer.save()
+        self.assertEqual(writer.queue.qsize(), 10)
+        writer.flush()
+        self.assertEqual(writer.queue.qsize(), 0)
+        self.assertEqual(LogEntry.objects.get_for_model(Customer).count(), 10)
+        self.assertEqual(
+            LogEntry.objects.filter(action=LogEntry.Action.UPDATE).count(), 5,
+        )
+
+    def test_update_reads_the_old_row_once(self):
+        customer = Customer.objects.create(name='Ahmet', created_by=self.user)
+        customer.name = 'Mehmet'
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            customer.save()
+        selects = [query['sql'] for query in queries
+                   if query['sql'].startswith('SELECT') and 'FROM "core_customer"' in query['sql']]
+        self.assertEqual(len(selects), 1, selects)
+        writer.flush()
+        update = LogEntry.objects.get_for_object(customer).get(action=LogEntry.Action.UPDATE)
+        self.assertEqual(update.changes_dict['name'], ['Ahmet', 'Mehmet'])
+
+    @override_settings(AUDITLOG_ASYNC_WRITES=False)
+    def test_disabled_writes_synchronously(self):
+        with set_actor(self.user):
+            Customer.objects.create(name='Ahmet', created_by=self.user)
+        self.assertEqual(writer.queue.qsize(), 0)
+        self.assertEqual(self.entries(Customer), [(LogEntry.Action.CREATE, 'Ahmet', self.user.pk)])
+
+    def test_unchanged_save_is_not_logged(self):
+        with self.captureOnCommitCallbacks(execute=True), set_actor(self.user):
+            customer = Customer.objects.create(name='Ahmet', created_by=self.user)
+            customer.save(update_fields=['name'])
+        writer.flush()
+        self.assertEqual(self.entries(Customer), [(LogEntry.Action.CREATE, 'Ahmet', self.user.pk)])
+
+
+class AuditLogWriterFailureTests(TestCase):
+    """Yazılamayan kayıtlar yeniden denenir, olmazsa spill dosyasından geri yüklenir; atılmaz."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('spill@test.com', 'Spill', 'Test', 'secret')
+
+    def setUp(self):
+        writer.stop()
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        settings = override_settings(AUDITLOG_SPILL_FILE=f'{spill_dir}/spill.ndjson')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        sleep = mock.patch.object(audit_writer.time, 'sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+        LogEntry.objects.all().delete()
+        self.bulk_create = LogEntry.objects.bulk_create
+
+    def entries(self, count):
+        content_type = ContentType.objects.get_for_model(User)
+        return [
+            LogEntry(content_type=content_type, object_pk=str(self.user.pk), object_id=self.user.pk,
+                     object_repr=f'Kayıt {index}', action=LogEntry.Action.UPDATE,
+                     changes={'first_name': ['A', 'B']}, actor=self.user)
+            for index in range(count)
+        ]
+
+    def failing(self, times):
+        calls = []
+
+        def bulk_create(*args, **kwargs):
+            calls.append(args)
+            if len(calls) <= times:
+                raise OperationalError('database table is locked')
+            return self.bulk_create(*args, **kwargs)
+        return mock.patch.object(LogEntry.objects, 'bulk_create', side_effect=bulk_create)
+
+    def test_failed_batch_is_retried_with_backoff(self):
+        with self.failing(times=2), self.assertLogs(audit_writer.logger, 'WARNING'):
+            writer.write(self.entries(3))
+        self.assertEqual(LogEntry.objects.count(), 3)
+        self.assertEqual([call.args for call in self.sleep.call_args_list], [(0.5,), (1.0,)])
+
+    def test_unwritable_entries_are_spilled_and_restored(self):
+        with self.failing(times=100), self.assertLogs(audit_writer.logger, 'WARNING'), \
+                self.assertLogs('website.archive', 'ERROR') as logs:
+            writer.write(self.entries(3))
+        self.assertIn('restore_auditlog_spill', logs.output[-1])
+        self.assertFalse(LogEntry.objects.exists())
+
+        call_command('restore_auditlog_spill', stdout=StringIO())
+        self.assertEqual(
+            sorted(LogEntry.objects.values_list('object_repr', 'actor_id', 'changes')),
+            [(f'Kayıt {index}', self.user.pk, {'first_name': ['A', 'B']}) for index in range(3)],
+        )
+        # Dosya silinir; ikinci çalıştırma bir şey yüklemez
+        call_command('restore_auditlog_spill', stdout=StringIO())
+        self.assertEqual(LogEntry.objects.count(), 3)
+
+    def test_only_the_rows_that_still_fail_are_spilled(self):
+        # Toplu yazma ve yeniden denemeler hata verir; tek tek yazmada ilk kayıt da hata verir
+        with self.failing(times=writer.retries + 2), self.assertLogs(audit_writer.logger, 'WARNING'), \
+                self.assertLogs('website.archive', 'ERROR'):
+            writer.write(self.entries(2))
+        self.assertEqual(list(LogEntry.objects.values_list('object_repr', flat=True)), ['Kayıt 1'])
+        call_command('restore_auditlog_spill', stdout=StringIO())
+        self.assertEqual(sorted(LogEntry.objects.values_list('object_repr', flat=True)), ['Kayıt 0', 'Kayıt 1'])
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+        self.request = RequestFactory().get('/stream')
+
+    def stats(self):
+        (key, (buckets, count, duration, queries, query_time, serializer_time, size, statuses)), = (
+            registry.snapshot().items()
+        )
+        return count, queries, size, statuses
+
+    def test_streaming_response_is_recorded_after_the_body(self):
+        def body():
+            for _ in range(3):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                yield b'chunk'
+
+        response = MetricsMiddleware(lambda request: StreamingHttpResponse(body()))(self.request)
+        # Gövde okunmadan kayıt yok
+        self.assertEqual(registry.snapshot(), {})
+        self.assertEqual(b''.join(response.streaming_content), b'chunk' * 3)
+        self.assertEqual(self.stats(), (1, 3, 15, {200: 1}))
+
+    def test_plain_response_is_recorded_immediately(self):
+        MetricsMiddleware(lambda request: HttpResponse(b'ok'))(self.request)
+        self.assertEqual(self.stats(), (1, 0, 2, {200: 1}))
+
+
+@override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'])
+class MetricsViewAccessTests(TestCase):
+    def get(self, **meta):
+        return metrics_view(RequestFactory().get('/metrics', **meta)).status_code
+
+    def test_remote_addr_is_used_without_proxy_header(self):
+        self.assertEqual(self.get(REMOTE_ADDR='10.0.0.5'), 200)
+        self.assertEqual(self.get(REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR='10.0.0.5'), 403)
+
+    @override_settings(METRICS_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_proxy_header_uses_the_address_added_by_the_proxy(self):
+        self.assertEqual(self.get(REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='10.0.0.5'), 200)
+        # İstemcinin kendi yazdığı (soldaki) adres dikkate alınmaz
+        self.assertEqual(self.get(REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='10.0.0.5, 10.0.0.9'), 403)
+        self.assertEqual(self.get(REMOTE_ADDR='10.0.0.5'), 403)
+
+
+class AuditLogArchiveTests(TestCase):
+    """Arşive taşınan kayıtlar ?archived=1 ile tablodayken döndükleri gibi dönmeli."""
+
+    url = '/website/auditlog/?archived=1&start=2024-01-01&end=2024-02-29&page_size=2'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('archive@test.com', 'Arşiv', 'Test', 'secret')
+        cls.customer = Customer.objects.create(name='Ahmet', created_by=cls.user)
+        # Kurulumun kendi kayıtları arşiv aralığının dışında kalsın diye silinir
+        LogEntry.objects.all().delete()
+        content_type = ContentType.objects.get_for_model(Customer)
+        timestamps = [
+            datetime(2024, 1, 10, 9), datetime(2024, 1, 31, 23, 30), datetime(2024, 2, 5, 12),
+            datetime(2024, 2, 29, 18), datetime(2024, 3, 1, 8),
+        ]
+        for index, timestamp in enumerate(timestamps):
+            entry = LogEntry.objects.create(
+                content_type=content_type, object_pk=str(cls.customer.pk), object_id=cls.customer.pk,
+                object_repr=f'Ahmet {index}', action=LogEntry.Action.UPDATE,
+                changes={'name': [f'Ahmet {index - 1}', f'Ahmet {index}']},
+                actor=cls.user if index % 2 else None,
+            )
+            LogEntry.objects.filter(pk=entry.pk).update(timestamp=django_timezone.make_aware(timestamp))
+
+    def setUp(self):
+        writer.stop()
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+        settings = override_settings(AUDITLOG_ARCHIVE_DIR=archive_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def pages(self, url):
+        results = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            results += response.json()['results']
+            url = response.json()['next']
+        return results
+
+    def test_archived_entries_round_trip(self):
+        before = self.pages(self.url)
+        self.assertEqual([entry['object_repr'] for entry in before], ['Ahmet 3', 'Ahmet 2', 'Ahmet 1', 'Ahmet 0'])
+
+        call_command('archive_auditlog', before='2024-03', stdout=StringIO())
+        self.assertEqual(list(LogEntry.objects.values_list('object_repr', flat=True)), ['Ahmet 4'])
+
+        self.assertEqual(self.pages(self.url), before)
+        # Canlı tablodaki mart kaydı arşivdekilerden önce gelir
+        after = self.pages('/website/auditlog/?archived=1&start=2024-01-20&end=2024-03-31&page_size=2')
+        self.assertEqual([entry['object_repr'] for entry in after], ['Ahmet 4', 'Ahmet 3', 'Ahmet 2', 'Ahmet 1'])
+
+    def test_not_modified_does_not_open_archive(self):
+        call_command('archive_auditlog', before='2024-03', stdout=StringIO())
+        etag = self.client.get(self.url)['ETag']
+        with mock.patch('website.archive.read_archive', side_effect=AssertionError('arşiv okundu')):
+            response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        # Arşivdeki kaydın actor'u değişirse sayfa değişir
+        self.user.first_name = 'Yeni'
+        self.user.save()
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_archived_mode_requires_a_bounded_range(self):
+        for query in ('', '&start=2024-01-01', '&end=2024-01-01',
+                      '&start=2024-03-01&end=2024-01-01', '&start=2023-01-01&end=2024-01-01'):
+            response = self.client.get(f'/website/auditlog/?archived=1{query}')
+            self.assertEqual(response.status_code, 400, query)
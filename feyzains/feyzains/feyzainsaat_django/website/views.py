@@ -1,36 +1,100 @@
 from auditlog.models import LogEntry
-from django.contrib.contenttypes.models import ContentType
 from rest_framework.generics import ListAPIView
-from rest_framework.response import Response
+from accounts.models import User
+from accounts.serializers import user_versions, users_etag
+from .archive import archive_versions, archived_entries, attach_actors
+from .audit import (
+    CombinedLogEntries, check_archive_range, content_type_for, filter_log_entries, log_entries,
+    parse_log_filters,
+)
 from .serializers import LogEntrySerializer
-from feyzainsaat_django.pagination import CustomPageNumberPagination
+from feyzainsaat_django.conditional import not_modified, page_etag, queryset_etag, with_etag
+from feyzainsaat_django.pagination import CustomPageNumberPagination, KeysetPaginationMixin
 
-class ModelAuditLogView(ListAPIView):
+
+class AuditLogPagination(KeysetPaginationMixin, CustomPageNumberPagination):
+    """`?cursor=` ile (timestamp, id) üzerinden sayfalama; COUNT(*) ve OFFSET yapılmaz."""
+
+
+class AuditLogListMixin:
+    """
+    `?archived=1` verilirse arşive taşınmış aylar da (aynı filtrelerle)
+    sonuca eklenir; bu modda start/end zorunludur ve sayfa numaralı
+    sayfalama kullanılır.
+    """
     serializer_class = LogEntrySerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = AuditLogPagination
+
+    def get_filters(self):
+        return parse_log_filters(self.request.query_params)
+
+    def get_base_queryset(self, filters):
+        return log_entries()
 
     def get_queryset(self):
-        model_name = self.kwargs['model_name']
-        object_id = self.kwargs['object_id']
-        try:
-            content_type = ContentType.objects.get(model=model_name)
-            return LogEntry.objects.filter(content_type=content_type, object_id=object_id).order_by('-timestamp')
-        except ContentType.DoesNotExist:
-            return LogEntry.objects.none()
+        filters = self.get_filters()
+        queryset = filter_log_entries(self.get_base_queryset(filters), filters)
+        return queryset.order_by('-timestamp')
+
+    def get_archived(self, filters):
+        return archived_entries(
+            start=filters['start'], end=filters['end'], actor=filters['actor'],
+            content_type=filters['content_type'],
+        )
 
     def list(self, request, *args, **kwargs):
+        if request.query_params.get('archived') in ('1', 'true', 'True'):
+            return self.list_archived(request)
+        paginator = self.paginator
+        page = paginator.paginate_queryset(self.filter_queryset(self.get_queryset()), request, view=self)
+
+        # Kayıtlar değişmez; sayfa ancak yeni kayıt ya da actor değişikliğiyle değişir
+        etag = page_etag(paginator, page, LogEntry, ('timestamp',),
+                         user_versions(entry.actor for entry in page if entry.actor is not None))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(page, many=True)
+        return with_etag(paginator.get_paginated_response(serializer.data), etag)
+
+    def list_archived(self, request):
+        filters = self.get_filters()
+        check_archive_range(filters)
         queryset = self.get_queryset()
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        # Arşiv dosyaları sadece archive_auditlog ile değişir (manifest'teki sha256);
+        # ETag dosyalar açılmadan hesaplanır, 304'te arşiv okunmaz.
+        etag = queryset_etag(queryset, 'timestamp', request.get_full_path(),
+                             archive_versions(filters['start'], filters['end']),
+                             users_etag(User.objects.all()))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
 
-class AllChangesAuditLogView(ListAPIView):
-    serializer_class = LogEntrySerializer
-    pagination_class = CustomPageNumberPagination
+        archived = [] if filters['content_type'] is False else self.get_archived(filters)
+        paginator = CustomPageNumberPagination()
+        page = paginator.paginate_queryset(CombinedLogEntries(queryset, archived), request, view=self)
+        attach_actors(page)
+        serializer = self.get_serializer(page, many=True)
+        return with_etag(paginator.get_paginated_response(serializer.data), etag)
 
-    def get_queryset(self):
-        return LogEntry.objects.all().order_by('-timestamp')
\ No newline at end of file
+
+class ModelAuditLogView(AuditLogListMixin, ListAPIView):
+
+    def get_filters(self):
+        filters = super().get_filters()
+        filters['content_type'] = content_type_for(self.kwargs['model_name']) or False
+        return filters
+
+    def get_base_queryset(self, filters):
+        return log_entries().filter(object_id=self.kwargs['object_id'])
+
+    def get_archived(self, filters):
+        return archived_entries(
+            start=filters['start'], end=filters['end'], actor=filters['actor'],
+            content_type=filters['content_type'], object_id=self.kwargs['object_id'],
+        )
+
+
+class AllChangesAuditLogView(AuditLogListMixin, ListAPIView):
+    pass